@@ -0,0 +1,51 @@
+"""
+Workers sharded by CPU (``runcelery --cpu_shards``).
+
+One worker is started per CPU or per CPU set and pinned to it with
+``os.sched_setaffinity`` (Linux only), so the scheduler does not move the
+worker and its pool between the cores and the load tests give stable numbers.
+"""
+
+from __future__ import annotations
+
+import os
+
+
+def is_supported() -> bool:
+    return hasattr(os, 'sched_setaffinity')
+
+
+def available_cpus() -> list[int]:
+    try:
+        return sorted(os.sched_getaffinity(0))
+    except AttributeError:  # not available on Windows and macOS
+        return list(range(os.cpu_count() or 1))
+
+
+def parse_cpu_shards(spec: str) -> list[tuple[int, ...]]:
+    """
+    Parses the CPU sets of the shards: 'auto' - one shard per available CPU,
+    '0,2,4-7' - the shards on CPU 0, on CPU 2 and on CPUs 4 to 7.
+    """
+    if spec == 'auto':
+        return [(cpu,) for cpu in available_cpus()]
+    shards = []
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        first, _, last = item.partition('-')
+        cpus = tuple(range(int(first), int(last or first) + 1))
+        if not cpus:
+            raise ValueError(item)
+        shards.append(cpus)
+    return shards
+
+
+def format_cpus(cpus: tuple[int, ...]) -> str:
+    return str(cpus[0]) if len(cpus) == 1 else f'{cpus[0]}-{cpus[-1]}'
+
+
+def pin(value: str) -> None:
+    """
+    Pins the process to the CPUs ('2' or '4-7'), the children inherit the affinity.
+    """
+    if is_supported():
+        os.sched_setaffinity(0, parse_cpu_shards(value)[0])
@@ -0,0 +1,270 @@
+"""
+Archive of the output of the celery processes (``runcelery --archive``) and its search (``--grep``).
+
+Every line is appended to a segment file and described by a fixed-size record of
+the side index: the moment, the offset and the length of the line, the process,
+the level and the task id found in the line. The segments roll over at
+``segment_bytes``, the oldest ones are removed above ``max_segments`` and every
+session of runcelery starts a new one. The search maps the indexes with mmap:
+the time range is found by bisection of the records and the task id by ``find``
+of its 16 bytes, so the text of the logs is read only for the matching lines.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import re
+import struct
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import IO, TYPE_CHECKING, NamedTuple
+
+if TYPE_CHECKING:
+    from collections.abc import Iterator
+
+DEFAULT_DIR = os.path.join('.runcelery', 'logs')
+SEGMENT_BYTES = 64 * 2**20
+MAX_SEGMENTS = 64
+FLUSH_INTERVAL = 1.0  # seconds
+PROCESSES_FILE = 'processes.json'
+
+# moment, offset and length of the line in the segment, process, level, task id.
+RECORD = struct.Struct('<dQIHBx16s')
+TASK_OFFSET = 24
+NO_TASK = bytes(16)
+LEVELS = {'DEBUG': 10, 'INFO': 20, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+# [2026-10-18 13:34:00,962: WARNING/MainProcess]
+LEVEL_RE = re.compile(r': (DEBUG|INFO|WARNING|ERROR|CRITICAL)/')
+TASK_ID_RE = re.compile(r'[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}')
+RELATIVE_TIME_RE = re.compile(r'(\d+(?:\.\d+)?)([smhd])')
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+class Match(NamedTuple):
+    timestamp: float
+    process: str
+    level: int
+    line: str
+
+
+def archive_dir(base_dir: str, value: str | bool | None) -> str | None:
+    """
+    Returns the directory of the archive for the value of the option:
+    a path (relative to the base directory) or True for the default one.
+    """
+    if not value:
+        return None
+    return os.path.join(base_dir, DEFAULT_DIR if value is True else value)
+
+
+def segments(directory: str) -> list[int]:
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return sorted(int(name[:-4]) for name in names if name.endswith('.log') and name[:-4].isdigit())
+
+
+def segment_path(directory: str, seq: int, suffix: str) -> str:
+    return os.path.join(directory, f'{seq:08d}{suffix}')
+
+
+def read_processes(directory: str) -> dict[str, int]:
+    try:
+        with open(os.path.join(directory, PROCESSES_FILE)) as file:
+            return dict(json.load(file))
+    except (OSError, ValueError):
+        return {}
+
+
+def parse_line(line: str) -> tuple[int, bytes]:
+    """
+    Returns the level of the celery log line and the 16 bytes of the task id in it.
+    """
+    level = LEVEL_RE.search(line)
+    task_id = TASK_ID_RE.search(line)
+    return (
+        LEVELS[level.group(1)] if level else 0,
+        uuid.UUID(task_id.group()).bytes if task_id else NO_TASK,
+    )
+
+
+def parse_time(value: str, now: float) -> float:
+    """
+    Parses the moment: ISO format in the local time or the time ago ('30s', '15m', '2h', '1d').
+    """
+    relative = RELATIVE_TIME_RE.fullmatch(value)
+    if relative:
+        return now - float(relative.group(1)) * UNITS[relative.group(2)]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def format_match(match: Match) -> str:
+    moment = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(match.timestamp))
+    return f'{moment}.{int(match.timestamp % 1 * 1000):03d} [{match.process}] {match.line}'
+
+
+class LogArchive:
+    """
+    Appends the lines of the processes to the segments, ``append`` is a listener of the log multiplexer.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = SEGMENT_BYTES,
+        max_segments: int = MAX_SEGMENTS,
+    ) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.max_segments = max_segments
+        os.makedirs(directory, exist_ok=True)
+        self._processes = read_processes(directory)
+        # Level and task of the last line of every process, inherited by the tracebacks.
+        self._context: dict[str, tuple[int, bytes]] = {}
+        # The pipes are drained by a thread per pipe on Windows.
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._log: IO[bytes]
+        self._index: IO[bytes]
+        self._open(max(segments(directory), default=0) + 1)
+
+    def _open(self, seq: int) -> None:
+        self._seq = seq
+        self._log = open(segment_path(self.directory, seq, '.log'), 'ab')  # noqa: SIM115
+        self._index = open(segment_path(self.directory, seq, '.idx'), 'ab')  # noqa: SIM115
+        self._size = self._log.tell()
+        for old in segments(self.directory)[: -self.max_segments]:
+            for suffix in ('.log', '.idx'):
+                path = segment_path(self.directory, old, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def _process_id(self, name: str) -> int:
+        if name not in self._processes:
+            self._processes[name] = len(self._processes)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'w') as file:
+                json.dump(self._processes, file)
+            os.replace(tmp_path, os.path.join(self.directory, PROCESSES_FILE))
+        return self._processes[name]
+
+    def append(self, name: str, line: str) -> None:
+        data = line.encode(errors='replace')
+        level, task = parse_line(line)
+        if line.startswith('[') or name not in self._context:
+            self._context[name] = (level, task)
+        else:
+            level, task = self._context[name]
+
+        with self._lock:
+            if self._size >= self.segment_bytes:
+                self.close()
+                self._open(self._seq + 1)
+            self._log.write(data + b'\n')
+            self._index.write(
+                RECORD.pack(time.time(), self._size, len(data), self._process_id(name), level, task)
+            )
+            self._size += len(data) + 1
+
+    def flush(self) -> None:
+        with self._lock:
+            # The text goes first, so the flushed records point to the flushed lines.
+            self._log.flush()
+            self._index.flush()
+
+    def close(self) -> None:
+        self._log.close()
+        self._index.close()
+
+    def start(self) -> None:
+        """
+        Flushes the segment every second, so the search sees the fresh lines.
+        """
+        threading.Thread(target=self._flush_loop, name='runcelery-archive', daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.flush()
+
+    def _flush_loop(self) -> None:
+        while not self._stopped.wait(FLUSH_INTERVAL):
+            self.flush()
+
+
+def _bisect(index: mmap.mmap, count: int, moment: float) -> int:
+    """
+    Returns the number of the first record not earlier than the moment.
+    """
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        if RECORD.unpack_from(index, middle * RECORD.size)[0] < moment:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+
+def _positions(index: mmap.mmap, first: int, last: int, task: bytes | None) -> Iterator[int]:
+    if task is None:
+        yield from range(first, last)
+        return
+    start, end = first * RECORD.size, last * RECORD.size
+    while True:
+        found = index.find(task, start, end)
+        if found == -1:
+            return
+        # The bytes of the task id may also be found across the other fields.
+        if found % RECORD.size == TASK_OFFSET:
+            yield found // RECORD.size
+        start = found + 1
+
+
+def search(
+    directory: str,
+    task_id: str | None = None,
+    since: float | None = None,
+    until: float | None = None,
+    level: int = 0,
+) -> Iterator[Match]:
+    """
+    Returns the archived lines of the task (any if None) in the time range, not lower than the level.
+    Raises ValueError if the task id is not a UUID.
+    """
+    task = uuid.UUID(task_id).bytes if task_id else None
+    names = {number: name for name, number in read_processes(directory).items()}
+    for seq in segments(directory):
+        try:
+            log_file = open(segment_path(directory, seq, '.log'), 'rb')  # noqa: SIM115
+            index_file = open(segment_path(directory, seq, '.idx'), 'rb')  # noqa: SIM115
+        except FileNotFoundError:
+            # Removed by the running archive.
+            continue
+        with log_file, index_file:
+            # The last record may be written partially.
+            count = os.fstat(index_file.fileno()).st_size // RECORD.size
+            size = os.fstat(log_file.fileno()).st_size
+            if not count or not size:
+                continue
+            with mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ) as index:  # noqa: SIM117
+                with mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ) as text:
+                    first = 0 if since is None else _bisect(index, count, since)
+                    last = count if until is None else _bisect(index, count, until)
+                    for i in _positions(index, first, last, task):
+                        moment, offset, length, process, line_level, _ = RECORD.unpack_from(
+                            index, i * RECORD.size
+                        )
+                        if line_level < level or offset + length > size:
+                            continue
+                        yield Match(
+                            moment,
+                            names.get(process, '?'),
+                            line_level,
+                            text[offset : offset + length].decode(errors='replace'),
+                        )
@@ -0,0 +1,181 @@
+"""
+Control of the messages queued while the worker was not running (``runcelery --backlog``).
+
+At the start of runcelery the queues of the workers can be purged, reduced to
+the newest N messages of every task or drained at a fixed rate: the backlog is
+moved to a parking queue next to every queue and replayed from it in a thread,
+so the worker gets at most ``rate`` of the old messages per second. The parked
+queues are listed in a marker file until the drain is finished, the messages left
+in them by a run stopped before the end of the drain are drained at the next start.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from kombu import Producer, Queue
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+    from celery import Celery
+
+MODES = ('keep', 'purge', 'newest', 'drain')
+PARKING_SUFFIX = '.runcelery-backlog'
+# Properties of the message which are passed to the republished message.
+PROPERTIES = ('correlation_id', 'reply_to', 'priority', 'expiration', 'message_id')
+
+
+def task_name(message: Any) -> str:
+    headers = message.headers or {}
+    if 'task' in headers:
+        return str(headers['task'])
+    # Protocol 1 keeps the name in the body.
+    try:
+        payload = message.decode()
+    except Exception:
+        return ''
+    return str(payload.get('task', '')) if isinstance(payload, dict) else ''
+
+
+def read_marker(path: str) -> list[str]:
+    """
+    Returns the queues listed in the marker file, their messages were parked and not drained yet.
+    """
+    try:
+        with open(path) as file:
+            queues = json.load(file)
+    except (OSError, ValueError):
+        return []
+    return [str(queue) for queue in queues] if isinstance(queues, list) else []
+
+
+class Backlog:
+    """
+    Operations on the queues of the workers, every method returns the counts by queue.
+    ``marker`` is the file which lists the parked queues until they are drained.
+    """
+
+    def __init__(self, app: Celery, queues: Iterable[str], marker: str | None = None) -> None:
+        self.app = app
+        self.queues = list(dict.fromkeys(queues))
+        self.marker = marker
+
+    def _messages(self, channel: Any, queue: str) -> Iterator[Any]:
+        bound = Queue(queue, no_declare=True).bind(channel)
+        while True:
+            message = bound.get(no_ack=False)
+            if message is None:
+                return
+            yield message
+
+    def _republish(self, channel: Any, message: Any, queue: str) -> None:
+        properties = {key: message.properties[key] for key in PROPERTIES if key in message.properties}
+        Producer(channel).publish(
+            message.body,
+            exchange='',
+            routing_key=queue,
+            headers=message.headers,
+            content_type=message.content_type,
+            content_encoding=message.content_encoding,
+            **properties,
+        )
+        message.ack()
+
+    def purge(self) -> dict[str, int]:
+        with self.app.connection_for_write() as connection:
+            channel = connection.default_channel
+            return {
+                queue: Queue(queue, no_declare=True).bind(channel).purge() or 0 for queue in self.queues
+            }
+
+    def keep_newest(self, count: int) -> dict[str, tuple[int, int]]:
+        """
+        Keeps the newest ``count`` messages of every task, returns the dropped and the kept ones.
+        Only ``count`` messages of every task are held in memory.
+        """
+        result = {}
+        with self.app.connection_for_write() as connection:
+            channel = connection.default_channel
+            for queue in self.queues:
+                newest: dict[str, deque[tuple[int, Any]]] = {}
+                dropped = 0
+                for i, message in enumerate(self._messages(channel, queue)):
+                    messages = newest.setdefault(task_name(message), deque())
+                    messages.append((i, message))
+                    if len(messages) > count:
+                        messages.popleft()[1].ack()
+                        dropped += 1
+                # The kept messages are queued again in their order.
+                kept = sorted(item for messages in newest.values() for item in messages)
+                for _, message in kept:
+                    self._republish(channel, message, queue)
+                result[queue] = (dropped, len(kept))
+        return result
+
+    def parked(self) -> dict[str, int]:
+        """
+        Returns the counts of the messages left in the parking queues which are not empty.
+        """
+        result = {}
+        with self.app.connection_for_write() as connection:
+            for queue in self.queues:
+                # The broker closes the channel if the queue does not exist.
+                with connection.channel() as channel:
+                    try:
+                        _, count, _ = (
+                            Queue(queue + PARKING_SUFFIX, no_declare=True)
+                            .bind(channel)
+                            .queue_declare(passive=True)
+                        )
+                    except connection.channel_errors:
+                        continue
+                if count:
+                    result[queue] = count
+        return result
+
+    def park(self) -> dict[str, int]:
+        """
+        Moves the messages of every queue to its parking queue.
+        """
+        result = {}
+        with self.app.connection_for_write() as connection:
+            channel = connection.default_channel
+            for queue in self.queues:
+                parking = queue + PARKING_SUFFIX
+                Queue(parking, routing_key=parking, durable=True).bind(channel).declare()
+                moved = 0
+                for message in self._messages(channel, queue):
+                    self._republish(channel, message, parking)
+                    moved += 1
+                result[queue] = moved
+        queues = [queue for queue, moved in result.items() if moved]
+        if self.marker and queues:
+            with open(self.marker, 'w') as file:
+                json.dump(list(dict.fromkeys(read_marker(self.marker) + queues)), file)
+        return result
+
+    def drain(self, rate: float, sleep: Callable[[float], None] = time.sleep) -> dict[str, int]:
+        """
+        Moves the messages of the parking queues back to the queues, ``rate`` messages per second.
+        """
+        result = dict.fromkeys(self.queues, 0)
+        with self.app.connection_for_write() as connection:
+            channel = connection.default_channel
+            parked = {queue: self._messages(channel, queue + PARKING_SUFFIX) for queue in self.queues}
+            while parked:
+                for queue, messages in list(parked.items()):
+                    message = next(messages, None)
+                    if message is None:
+                        del parked[queue]
+                        continue
+                    self._republish(channel, message, queue)
+                    result[queue] += 1
+                    sleep(1 / rate)
+        if self.marker and os.path.exists(self.marker):
+            os.remove(self.marker)
+        return result
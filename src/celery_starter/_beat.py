@@ -0,0 +1,176 @@
+"""
+Schedule store of beat managed by runcelery (``runcelery --beat_catchup``).
+
+The moments of the last runs are kept in a SQLite file next to the pidfile of beat,
+a row is written in its own transaction as soon as the task is sent, so a restart
+of beat neither loses the runs nor repeats them, unlike the shelve file which is
+synced every few minutes. The runs missed while beat was not running are handled by
+the catch-up policy: ``skip`` - wait for the next run, ``once`` - run every missed
+entry once at the start (the behaviour of celery), ``spread`` - run them once,
+spread evenly over the window, so the restart does not send a burst of periodic
+tasks to the worker.
+"""
+
+from __future__ import annotations
+
+import heapq
+import os
+import sqlite3
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from celery import beat
+from celery.schedules import schedstate
+from celery.utils.log import get_logger
+
+from ._bootstrap import BEAT_CATCHUP_ENV, BEAT_CATCHUP_WINDOW_ENV
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = get_logger(__name__)
+
+POLICIES = ('skip', 'once', 'spread')
+DEFAULT_WINDOW = 300.0  # seconds
+SCHEDULER = 'celery_starter._beat:Scheduler'
+# The processes forked by the zygote keep its command line.
+ZYGOTE_MODULE = b'celery_starter._zygote'
+
+
+def is_beat_process(pid: int) -> bool:
+    """
+    Checks that the process from the pidfile is beat, the pid of a crashed beat may belong
+    to another process. Beat forked by the zygote has the command line of the zygote,
+    the caller excludes the running zygote itself.
+    Without /proc (macOS, Windows) the process is assumed to be beat.
+    """
+    try:
+        with open(f'/proc/{pid}/cmdline', 'rb') as file:
+            args = file.read().split(b'\0')
+    except FileNotFoundError:
+        return not os.path.isdir('/proc/self')
+    except OSError:
+        return False
+    return b'beat' in args or ZYGOTE_MODULE in args
+
+
+class Scheduler(beat.Scheduler):
+    """
+    Scheduler storing the last run of every entry in SQLite and catching up the missed runs.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        self.schedule_filename = kwargs.get('schedule_filename') or 'celerybeat-schedule.sqlite3'
+        self.catchup = os.environ.get(BEAT_CATCHUP_ENV) or 'once'
+        self.window = float(os.environ.get(BEAT_CATCHUP_WINDOW_ENV) or DEFAULT_WINDOW)
+        # Entry name -> timestamp before which the missed run is not sent.
+        self.deferred: dict[str, float] = {}
+        self._db: sqlite3.Connection | None = None
+        super().__init__(*args, **kwargs)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.schedule_filename, isolation_level=None, check_same_thread=False)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute(
+            'CREATE TABLE IF NOT EXISTS entries '
+            '(name TEXT PRIMARY KEY, last_run_at REAL NOT NULL, total_run_count INTEGER NOT NULL)'
+        )
+        return db
+
+    def setup_schedule(self) -> None:
+        try:
+            self._db = self._connect()
+        except sqlite3.DatabaseError as exc:
+            logger.error('Removing corrupted schedule file %r: %r', self.schedule_filename, exc)
+            for suffix in ('', '-wal', '-shm'):
+                if os.path.exists(self.schedule_filename + suffix):
+                    os.remove(self.schedule_filename + suffix)
+            self._db = self._connect()
+        self.merge_inplace(self.app.conf.beat_schedule)
+        self.install_default_entries(self.schedule)
+
+        stored = {
+            name: (last_run_at, count)
+            for name, last_run_at, count in self._db.execute('SELECT * FROM entries')
+        }
+        for name, entry in self.schedule.items():
+            if name in stored:
+                last_run_at, entry.total_run_count = stored[name]
+                entry.last_run_at = datetime.fromtimestamp(last_run_at, self.app.timezone)
+        self.catch_up(time.time())
+
+        with self._db:
+            self._db.execute('BEGIN')
+            names = list(self.schedule)
+            self._db.execute(
+                f'DELETE FROM entries WHERE name NOT IN ({",".join("?" * len(names))})', names
+            )
+            self._save(self.schedule.values())
+
+    def catch_up(self, now: float) -> None:
+        """
+        Applies the policy to the entries whose runs were missed while beat was not running.
+        """
+        missed = sorted(name for name, entry in self.schedule.items() if entry.is_due().is_due)
+        if not missed:
+            return
+        logger.warning('beat: %d missed entries, catch-up policy: %s', len(missed), self.catchup)
+        if self.catchup == 'skip':
+            for name in missed:
+                entry = self.schedule[name]
+                entry.last_run_at = entry.default_now()
+        elif self.catchup == 'spread':
+            step = self.window / len(missed)
+            self.deferred = {name: now + i * step for i, name in enumerate(missed)}
+
+    def _save(self, entries: Iterable[beat.ScheduleEntry]) -> None:
+        assert self._db is not None
+        self._db.executemany(
+            'INSERT OR REPLACE INTO entries VALUES (?, ?, ?)',
+            [(entry.name, entry.last_run_at.timestamp(), entry.total_run_count) for entry in entries],
+        )
+
+    def is_due(self, entry: beat.ScheduleEntry) -> schedstate:
+        not_before = self.deferred.get(entry.name)
+        if not_before is not None:
+            delay = not_before - time.time()
+            if delay > 0:
+                return schedstate(is_due=False, next=delay)
+            del self.deferred[entry.name]
+        return entry.is_due()
+
+    def populate_heap(self, event_t: Any = beat.event_t, heapify: Any = heapq.heapify) -> None:
+        """
+        Same as in celery, but the deferred entries are placed at their moments,
+        so they do not hold back the entries behind them.
+        """
+        self._heap = []
+        for entry in self.schedule.values():
+            is_due, next_call_delay = self.is_due(entry)
+            self._heap.append(
+                event_t(self._when(entry, 0 if is_due else next_call_delay) or 0, 5, entry)
+            )
+        heapify(self._heap)
+
+    def reserve(self, entry: beat.ScheduleEntry) -> beat.ScheduleEntry:
+        new_entry = super().reserve(entry)
+        if self._db is not None:
+            self._save([new_entry])
+        return new_entry
+
+    def sync(self) -> None:
+        if self._db is not None:
+            with self._db:
+                self._db.execute('BEGIN')
+                self._save(self.schedule.values())
+
+    def close(self) -> None:
+        self.sync()
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    @property
+    def info(self) -> str:
+        return f'    . db -> {self.schedule_filename}\n    . catch-up -> {self.catchup}'
@@ -0,0 +1,312 @@
+"""
+Benchmark of the worker pools (``runcelery --bench``).
+
+For every candidate pool and concurrency a worker is started on a private
+queue of the kombu filesystem transport, so no broker has to run, or of the
+given brokers to compare them with the local one. The
+benchmark enqueues N calls of the task and measures the throughput and the
+latency from the enqueue to the end of every task. The worker runs with the
+bootstrap wrapper, which records the moment every task has finished.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from celery import Celery, shared_task
+from kombu.utils.url import maybe_sanitize_url
+
+from . import _bootstrap, _broker, _pool
+from ._timings import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Iterator
+
+SYNTHETIC_TASKS = {'cpu': 'celery_starter.bench_cpu', 'io': 'celery_starter.bench_io'}
+BENCH_QUEUE = 'runcelery-bench'
+LOCAL = 'local'
+POLLING_INTERVAL = 0.01
+READY_TIMEOUT = 60.0
+FINISH_TIMEOUT = 300.0
+
+
+@shared_task(name=SYNTHETIC_TASKS['cpu'])  # type: ignore[untyped-decorator]
+def bench_cpu() -> int:
+    return sum(i * i for i in range(200_000))
+
+
+@shared_task(name=SYNTHETIC_TASKS['io'])  # type: ignore[untyped-decorator]
+def bench_io() -> None:
+    time.sleep(0.05)
+
+
+def broker_conf(broker: str, directory: str) -> dict[str, Any]:
+    """
+    Returns the celery settings of the broker, ``local`` is the filesystem transport in the directory.
+    """
+    if broker == LOCAL:
+        return _broker.filesystem_conf(directory, POLLING_INTERVAL)
+    return {'broker_url': broker}
+
+
+class Candidate(NamedTuple):
+    pool: str
+    concurrency: int
+
+    def __str__(self) -> str:
+        return f'{self.pool}:{self.concurrency}'
+
+
+class Result(NamedTuple):
+    candidate: Candidate
+    finished: int
+    throughput: float  # tasks per second
+    p50: float  # seconds
+    p99: float
+    error: str = ''
+    broker: str = LOCAL
+
+
+def default_candidates(pools: Iterable[str] | None = None, cpus: int | None = None) -> list[Candidate]:
+    pools = list(_pool.installed_pools() if pools is None else pools)
+    cpus = _pool.cpu_limit() if cpus is None else cpus
+    concurrency = {
+        'solo': 1,
+        'threads': min(cpus * _pool.THREADS_PER_CPU, _pool.MAX_THREADS),
+        'prefork': cpus,
+        'gevent': _pool.GREEN_CONCURRENCY,
+        'eventlet': _pool.GREEN_CONCURRENCY,
+    }
+    return [Candidate(pool, concurrency[pool]) for pool in concurrency if pool in pools]
+
+
+def parse_candidates(value: str) -> list[Candidate]:
+    """
+    Parses 'solo,threads:8,prefork:4', the pools without the concurrency get the default one.
+    """
+    defaults = {candidate.pool: candidate for candidate in default_candidates()}
+    candidates = []
+    for item in filter(None, (part.strip() for part in value.split(','))):
+        pool, _, concurrency = item.partition(':')
+        if concurrency:
+            candidates.append(Candidate(pool, int(concurrency)))
+        else:
+            candidates.append(defaults.get(pool, Candidate(pool, 1)))
+    return candidates
+
+
+def _finished_lines(directory: str, prefix: str = 'finished.') -> Iterator[list[str]]:
+    """
+    Returns the id, the moment and the state of every finished task, recorded by the bootstrap wrapper.
+    """
+    for name in os.listdir(directory):
+        if name.startswith(prefix):
+            with open(os.path.join(directory, name)) as file:
+                for line in file:
+                    # The line being written is skipped.
+                    if line.endswith('\n'):
+                        yield line.split()
+
+
+def read_finished(directory: str) -> dict[str, float]:
+    return {fields[0]: float(fields[1]) for fields in _finished_lines(directory)}
+
+
+def read_failed(directory: str) -> set[str]:
+    return {fields[0] for fields in _finished_lines(directory) if fields[2:] != ['SUCCESS']}
+
+
+def read_cpu(directory: str) -> tuple[float, float]:
+    """
+    Returns the CPU and the wall time taken by the finished tasks, recorded by the bootstrap wrapper.
+    """
+    cpu_time = wall_time = 0.0
+    for fields in _finished_lines(directory, 'cpu.'):
+        cpu_time += float(fields[1])
+        wall_time += float(fields[2])
+    return cpu_time, wall_time
+
+
+def summarize(
+    candidate: Candidate,
+    enqueued: dict[str, float],
+    finished: dict[str, float],
+    error: str = '',
+    broker: str = LOCAL,
+) -> Result:
+    latencies = [
+        finished[task_id] - moment for task_id, moment in enqueued.items() if task_id in finished
+    ]
+    if not latencies:
+        return Result(candidate, 0, 0.0, 0.0, 0.0, error or 'no task has finished', broker)
+    elapsed = max(finished[task_id] for task_id in enqueued if task_id in finished) - min(
+        enqueued.values()
+    )
+    return Result(
+        candidate,
+        len(latencies),
+        len(latencies) / elapsed if elapsed > 0 else 0.0,
+        percentile(latencies, 50),
+        percentile(latencies, 99),
+        error,
+        broker,
+    )
+
+
+def run_candidate(
+    worker_cmd: list[str],
+    candidate: Candidate,
+    task_name: str,
+    count: int,
+    cwd: str | None = None,
+    broker: str = LOCAL,
+) -> Result:
+    """
+    Starts the worker with the pool of the candidate, runs the tasks and stops it.
+    ``worker_cmd`` is the worker command line without the pool and the concurrency.
+    """
+    with started_worker(worker_cmd, candidate, cwd, broker) as (producer, directory, worker):
+        error = wait_worker_ready(worker, directory)
+        enqueued: dict[str, float] = {}
+        if not error:
+            with producer.connection_for_write() as connection:
+                for _ in range(count):
+                    moment = time.time()
+                    result = producer.send_task(task_name, queue=BENCH_QUEUE, connection=connection)
+                    enqueued[result.id] = moment
+            error = wait_finished(worker, directory, count)
+        return summarize(candidate, enqueued, read_finished(directory), error, broker)
+
+
+def sample_workload(
+    worker_cmd: list[str], task_names: Iterable[str], runs: int = 3, cwd: str | None = None
+) -> tuple[str | None, float, str]:
+    """
+    Runs the tasks (without arguments) in the solo worker of the benchmark, not in this process,
+    and compares the CPU time they used with the wall time. Returns the workload kind ('cpu' or 'io'),
+    the CPU share of the wall time and the error, the kind is None if the tasks have not finished.
+    """
+    task_names = list(task_names)
+    with started_worker(worker_cmd, Candidate('solo', 1), cwd) as (producer, directory, worker):
+        error = wait_worker_ready(worker, directory)
+        if not error:
+            with producer.connection_for_write() as connection:
+                for name in task_names:
+                    for _ in range(runs):
+                        producer.send_task(name, queue=BENCH_QUEUE, connection=connection)
+            error = wait_finished(worker, directory, len(task_names) * runs)
+        if not error and read_failed(directory):
+            error = 'the sampled tasks have failed'
+        cpu_time, wall_time = read_cpu(directory)
+    if error:
+        return None, 0.0, error
+    workload, ratio = _pool.classify_workload(cpu_time, wall_time)
+    return workload, ratio, ''
+
+
+@contextmanager
+def started_worker(
+    worker_cmd: list[str],
+    candidate: Candidate | None = None,
+    cwd: str | None = None,
+    broker: str = LOCAL,
+) -> Iterator[tuple[Celery, str, subprocess.Popen[bytes]]]:
+    """
+    Starts the worker on the private queue and stops it at the exit, yields the app sending
+    the tasks to it, the directory of its records and its process. Without the candidate
+    the worker keeps the pool and the concurrency of the command line.
+    """
+    directory = tempfile.mkdtemp(prefix='runcelery-bench-')
+    try:
+        conf = broker_conf(broker, directory)
+        producer = Celery('runcelery_bench', set_as_current=False)
+        producer.conf.update(conf)
+        if broker != LOCAL:
+            # The tasks left by an interrupted benchmark.
+            with producer.connection_for_write() as connection:
+                connection.default_channel.queue_purge(BENCH_QUEUE)
+
+        # The options given later override those of the worker command.
+        pool = ('-P', candidate.pool, '-c', str(candidate.concurrency)) if candidate else ()
+        cmd = [
+            *(sys.executable, '-m', 'celery_starter._bootstrap'),
+            *worker_cmd[1:],
+            *pool,
+            *('-Q', BENCH_QUEUE, '-n', f'bench-{candidate.pool if candidate else "replay"}@%h'),
+            *('-l', 'WARNING', '--without-mingle', '--without-gossip', '--without-heartbeat'),
+        ]
+        # The broker of the environment, like that of the local broker, is preferred to the settings.
+        env = dict(
+            os.environ,
+            CELERY_BROKER_URL=conf['broker_url'],
+            **{_bootstrap.BENCH_DIR_ENV: directory, _bootstrap.BENCH_BROKER_ENV: broker},
+        )
+        with open(os.path.join(directory, 'worker.log'), 'wb') as log:
+            worker = subprocess.Popen(cmd, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+        try:
+            yield producer, directory, worker
+        finally:
+            worker.terminate()
+            try:
+                worker.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.kill()
+                worker.wait()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _worker_error(worker: subprocess.Popen[bytes], directory: str) -> str:
+    with open(os.path.join(directory, 'worker.log'), errors='replace') as file:
+        lines = file.read().strip().splitlines()
+    return f'exited with code {worker.returncode}: {lines[-1] if lines else ""}'
+
+
+def wait_worker_ready(worker: subprocess.Popen[bytes], directory: str) -> str:
+    deadline = time.monotonic() + READY_TIMEOUT
+    while not os.path.exists(os.path.join(directory, 'ready')):
+        if worker.poll() is not None:
+            return _worker_error(worker, directory)
+        if time.monotonic() > deadline:
+            return 'not ready in time'
+        time.sleep(0.05)
+    return ''
+
+
+def wait_finished(worker: subprocess.Popen[bytes], directory: str, count: int) -> str:
+    deadline = time.monotonic() + FINISH_TIMEOUT
+    while len(read_finished(directory)) < count:
+        if worker.poll() is not None:
+            return _worker_error(worker, directory)
+        if time.monotonic() > deadline:
+            return 'not finished in time'
+        time.sleep(0.05)
+    return ''
+
+
+def format_table(results: list[Result]) -> list[str]:
+    header = ('broker', 'pool', 'tasks', 'tasks/s', 'p50 ms', 'p99 ms', '')
+    rows = [
+        (
+            maybe_sanitize_url(result.broker),
+            str(result.candidate),
+            str(result.finished),
+            f'{result.throughput:.1f}',
+            f'{result.p50 * 1000:.1f}',
+            f'{result.p99 * 1000:.1f}',
+            result.error,
+        )
+        for result in results
+    ]
+    widths = [max(len(row[i]) for row in (header, *rows)) for i in range(len(header))]
+    return [
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()  # noqa: B905
+        for row in (header, *rows)
+    ]
@@ -0,0 +1,314 @@
+"""
+Wrapper which runs the celery command with the hooks of runcelery installed.
+
+Runs as ``python -m celery_starter._bootstrap <celery arguments>``, the processes
+forked from the zygote call ``main`` directly. The hooks are configured by
+environment variables, so both ways behave the same:
+
+``CELERY_STARTER_IMPORTS_FILE`` - file to which the project files imported by the
+worker are written as JSON, when the worker is ready and after every task, since
+a task may import more modules. The supervisor restarts the worker only when
+one of these files changes.
+``CELERY_STARTER_BASE_DIR`` - directory of the project files.
+``CELERY_STARTER_HOT_RELOAD`` - registers the ``starter_reload`` remote control
+command, which reloads the changed task modules in the running worker.
+``CELERY_STARTER_BENCH_DIR`` - runs the worker of the pool benchmark on the filesystem
+transport in this directory and records the moment and the state of every finished task.
+``CELERY_STARTER_PROFILE_DIR`` - profiles the tasks with cProfile and writes the profiles
+to this directory, ``CELERY_STARTER_PROFILE_TASKS`` are the comma separated globs of
+the profiled task names, ``CELERY_STARTER_PROFILE_SAMPLE`` is the profiled fraction of
+them and ``CELERY_STARTER_PROFILE_MEMORY`` enables tracemalloc.
+``CELERY_STARTER_CPUS`` - CPUs to which the process is pinned ('2' or '4-7').
+``CELERY_STARTER_LOCAL_BROKER`` - directory of the local broker on the filesystem
+transport, the worker and beat are configured to use it.
+``CELERY_STARTER_BENCH_BROKER`` - broker of the pool benchmark, ``local`` - the filesystem one.
+``CELERY_STARTER_RECORD_FILE`` - file to which the tasks received by the worker are appended
+for ``runcelery --replay``.
+``CELERY_STARTER_BEAT_CATCHUP`` - catch-up policy of the runs missed while beat was not running
+(skip, once or spread), used by the scheduler of runcelery, ``CELERY_STARTER_BEAT_CATCHUP_WINDOW``
+is the window in seconds over which the missed runs are spread.
+``CELERY_STARTER_BEAT_READY_FILE`` - file created by beat after the first tick of its scheduler,
+the readiness probe when the log level of beat hides its startup lines.
+"""
+
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+IMPORTS_FILE_ENV = 'CELERY_STARTER_IMPORTS_FILE'
+BASE_DIR_ENV = 'CELERY_STARTER_BASE_DIR'
+HOT_RELOAD_ENV = 'CELERY_STARTER_HOT_RELOAD'
+BENCH_DIR_ENV = 'CELERY_STARTER_BENCH_DIR'
+BENCH_BROKER_ENV = 'CELERY_STARTER_BENCH_BROKER'
+LOCAL_BROKER_ENV = 'CELERY_STARTER_LOCAL_BROKER'
+CPUS_ENV = 'CELERY_STARTER_CPUS'
+RECORD_FILE_ENV = 'CELERY_STARTER_RECORD_FILE'
+BEAT_CATCHUP_ENV = 'CELERY_STARTER_BEAT_CATCHUP'
+BEAT_CATCHUP_WINDOW_ENV = 'CELERY_STARTER_BEAT_CATCHUP_WINDOW'
+BEAT_READY_FILE_ENV = 'CELERY_STARTER_BEAT_READY_FILE'
+PROFILE_DIR_ENV = 'CELERY_STARTER_PROFILE_DIR'
+PROFILE_TASKS_ENV = 'CELERY_STARTER_PROFILE_TASKS'
+PROFILE_SAMPLE_ENV = 'CELERY_STARTER_PROFILE_SAMPLE'
+PROFILE_MEMORY_ENV = 'CELERY_STARTER_PROFILE_MEMORY'
+HOT_RELOAD_COMMAND = 'starter_reload'
+# The pools which run the tasks in the process receiving the control command,
+# the prefork children keep the old modules.
+HOT_RELOAD_POOLS = ('solo', 'threads', 'gevent', 'eventlet')
+
+
+def imported_files(base_dir: str) -> list[str]:
+    """
+    Returns the real paths of the imported modules which are located in the base directory.
+    """
+    base_dir = os.path.realpath(base_dir)
+    files = (getattr(module, '__file__', None) for module in list(sys.modules.values()))
+    paths = {os.path.realpath(file) for file in files if file}
+    return sorted(path for path in paths if path.startswith(base_dir + os.sep))
+
+
+def read_imports(path: str) -> frozenset[str] | None:
+    """
+    Returns the files reported by the worker, None if it has not reported them yet.
+    """
+    try:
+        with open(path) as file:
+            return frozenset(json.load(file))
+    except (OSError, ValueError):
+        return None
+
+
+class ImportsReport:
+    """
+    Writes the project files imported by the process, only when new modules were imported.
+    Prefork children report into the same file, so the reported files are merged.
+    """
+
+    def __init__(self, path: str, base_dir: str) -> None:
+        self.path = path
+        self.base_dir = base_dir
+        self._modules_count = 0
+
+    def write(self, **kwargs: Any) -> None:
+        if len(sys.modules) == self._modules_count:
+            return
+        self._modules_count = len(sys.modules)
+
+        files = set(imported_files(self.base_dir)) | (read_imports(self.path) or set())
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(sorted(files), file)
+        os.replace(tmp_path, self.path)
+
+
+def hot_reload(state: Any, files: Iterable[str] = ()) -> dict[str, str]:
+    """
+    Remote control command which reloads the modules of the changed files
+    and registers their tasks on the app again. Only the modules which define tasks
+    are reloaded, the other modules keep their old references to a reloaded helper,
+    so the worker has to be restarted. If a module fails to reload, the tasks are
+    restored as they were.
+    """
+    files = {os.path.realpath(file) for file in files}
+    modules = []
+    for module in list(sys.modules.values()):
+        file = getattr(module, '__file__', None)
+        if file and os.path.realpath(file) in files:
+            modules.append(module)
+    if len(modules) != len(files):
+        return {'error': 'the files are not imported by the worker'}
+
+    app = state.app
+    task_modules = {getattr(task, '__module__', None) for task in app.tasks.values()}
+    without_tasks = [module.__name__ for module in modules if module.__name__ not in task_modules]
+    if without_tasks:
+        return {'error': 'no tasks are defined in ' + ', '.join(without_tasks)}
+
+    tasks = dict(app.tasks)
+    try:
+        for module in modules:
+            for name, task in list(app.tasks.items()):
+                if getattr(task, '__module__', None) == module.__name__:
+                    del app.tasks[name]
+            importlib.reload(module)
+        state.consumer.update_strategies()
+    except Exception as exc:
+        app.tasks.clear()
+        app.tasks.update(tasks)
+        return {'error': f'{type(exc).__name__}: {exc}'}
+    return {'ok': ', '.join(module.__name__ for module in modules)}
+
+
+class BenchRecorder:
+    """
+    Configures the worker of the pool benchmark and records the moments the tasks have finished
+    and the CPU and wall time they took, every process (the prefork children too) appends
+    to its own files.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self._started: dict[str, tuple[float, float]] = {}
+
+    def configure(self, conf: Any, **kwargs: Any) -> None:
+        from . import _bench
+
+        conf.update(
+            _bench.broker_conf(os.environ.get(BENCH_BROKER_ENV) or _bench.LOCAL, self.directory),
+            worker_enable_remote_control=False,
+            task_ignore_result=True,
+        )
+
+    def ready(self, **kwargs: Any) -> None:
+        open(os.path.join(self.directory, 'ready'), 'w').close()
+
+    def started(self, task_id: str | None = None, **kwargs: Any) -> None:
+        self._started[str(task_id)] = (time.thread_time(), time.perf_counter())
+
+    def finished(self, task_id: str | None = None, state: str | None = None, **kwargs: Any) -> None:
+        started = self._started.pop(str(task_id), None)
+        if started is not None:
+            cpu_time, wall_time = time.thread_time() - started[0], time.perf_counter() - started[1]
+            self._append(f'cpu.{os.getpid()}', f'{task_id} {cpu_time} {wall_time}\n')
+        self._append(f'finished.{os.getpid()}', f'{task_id} {time.time()} {state}\n')
+
+    def _append(self, name: str, line: str) -> None:
+        fd = os.open(os.path.join(self.directory, name), os.O_WRONLY | os.O_CREAT | os.O_APPEND)
+        try:
+            os.write(fd, line.encode())
+        finally:
+            os.close(fd)
+
+
+class LocalBroker:
+    """
+    Points the worker and beat to the local broker before they connect to it.
+    """
+
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+
+    def configure_worker(self, conf: Any, **kwargs: Any) -> None:
+        from . import _broker
+
+        conf.update(_broker.filesystem_conf(self.directory))
+
+    def configure_beat(self, sender: Any, **kwargs: Any) -> None:
+        from . import _broker
+
+        _broker.configure(sender.app, self.directory)
+
+
+class BeatReady:
+    """
+    Creates the ready file after the first tick of the scheduler of beat.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def watch(self, sender: Any, **kwargs: Any) -> None:
+        scheduler = sender.scheduler
+        tick = scheduler.tick
+
+        def first_tick(*args: Any, **kwargs: Any) -> Any:
+            result = tick(*args, **kwargs)
+            scheduler.tick = tick
+            open(self.path, 'w').close()
+            return result
+
+        scheduler.tick = first_tick
+
+
+def install() -> None:
+    cpus = os.environ.get(CPUS_ENV)
+    if cpus:
+        from ._affinity import pin
+
+        # Before the pool is started, its processes and threads inherit the affinity.
+        pin(cpus)
+
+    imports_file = os.environ.get(IMPORTS_FILE_ENV)
+    if imports_file:
+        from celery.signals import task_postrun, worker_ready
+
+        report = ImportsReport(imports_file, os.environ.get(BASE_DIR_ENV) or os.getcwd())
+        worker_ready.connect(report.write, weak=False)
+        task_postrun.connect(report.write, weak=False)
+
+    if os.environ.get(HOT_RELOAD_ENV):
+        from celery.worker.control import control_command
+
+        control_command(name=HOT_RELOAD_COMMAND, args=[('files', list)], signature='<files>')(hot_reload)
+
+    local_broker = os.environ.get(LOCAL_BROKER_ENV)
+    if local_broker:
+        from celery.signals import beat_init, celeryd_init
+
+        broker = LocalBroker(local_broker)
+        celeryd_init.connect(broker.configure_worker, weak=False)
+        beat_init.connect(broker.configure_beat, weak=False)
+
+    beat_ready_file = os.environ.get(BEAT_READY_FILE_ENV)
+    if beat_ready_file:
+        from celery.signals import beat_init
+
+        # After the local broker is configured, the scheduler is created here.
+        beat_init.connect(BeatReady(beat_ready_file).watch, weak=False)
+
+    bench_dir = os.environ.get(BENCH_DIR_ENV)
+    if bench_dir:
+        from celery.signals import celeryd_init, task_postrun, task_prerun, worker_ready
+
+        recorder = BenchRecorder(bench_dir)
+        celeryd_init.connect(recorder.configure, weak=False)
+        worker_ready.connect(recorder.ready, weak=False)
+        task_prerun.connect(recorder.started, weak=False)
+        task_postrun.connect(recorder.finished, weak=False)
+
+    profile_dir = os.environ.get(PROFILE_DIR_ENV)
+    if profile_dir:
+        from celery.signals import task_postrun, task_prerun
+
+        from ._profiling import TaskProfiler
+
+        profiler = TaskProfiler(
+            profile_dir,
+            patterns=(os.environ.get(PROFILE_TASKS_ENV) or '*').split(','),
+            sample=float(os.environ.get(PROFILE_SAMPLE_ENV) or 1),
+            memory=bool(os.environ.get(PROFILE_MEMORY_ENV)),
+        )
+        task_prerun.connect(profiler.start, weak=False)
+        task_postrun.connect(profiler.stop, weak=False)
+
+    record_file = os.environ.get(RECORD_FILE_ENV)
+    if record_file:
+        from celery.signals import task_received
+
+        from ._replay import TrafficRecorder
+
+        task_received.connect(TrafficRecorder(record_file).received, weak=False)
+
+
+def main(argv: list[str]) -> None:
+    """
+    Runs the celery command, ``argv`` are the arguments after ``celery``.
+    """
+    install()
+    sys.argv = ['celery', *argv]
+
+    from celery.__main__ import main as celery_main
+
+    celery_main()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,76 @@
+"""
+Local broker on the kombu filesystem transport (``runcelery --local_broker``).
+
+Every message is a file in the directory of the broker, so the worker, beat and
+the code which enqueues the tasks need no running broker. The transport does not
+fsync the messages, the polling interval is lowered, since it bounds the latency
+of every task. The processes started by runcelery are configured by the bootstrap
+wrapper, the other processes of the project (runserver, shell, tests) by the
+``CELERY_STARTER_LOCAL_BROKER`` setting.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import TYPE_CHECKING, Any
+
+from ._bootstrap import LOCAL_BROKER_ENV
+
+if TYPE_CHECKING:
+    from celery import Celery
+
+POLLING_INTERVAL = 0.05
+DEFAULT_DIR = os.path.join('.runcelery', 'broker')
+
+
+def filesystem_conf(directory: str, polling_interval: float = POLLING_INTERVAL) -> dict[str, Any]:
+    """
+    Returns the celery settings of the kombu filesystem transport in the directory.
+    """
+    queue_dir = os.path.join(directory, 'queue')
+    control_dir = os.path.join(directory, 'control')
+    for path in (queue_dir, control_dir):
+        os.makedirs(path, exist_ok=True)
+    return {
+        'broker_url': 'filesystem://',
+        'broker_transport_options': {
+            'data_folder_in': queue_dir,
+            'data_folder_out': queue_dir,
+            'control_folder': control_dir,
+            'store_processed': False,
+            'polling_interval': polling_interval,
+        },
+    }
+
+
+def local_broker_dir(base_dir: str, value: Any) -> str | None:
+    """
+    Returns the directory of the broker for the value of the setting or the option:
+    a path (relative to the base directory) or True for the default one.
+    """
+    if not value:
+        return None
+    path = DEFAULT_DIR if value is True else str(value)
+    return os.path.join(base_dir, path)
+
+
+def results_url(directory: str) -> str:
+    path = os.path.join(os.path.abspath(directory), 'results')
+    os.makedirs(path, exist_ok=True)
+    return 'file://' + path
+
+
+def local_env(directory: str) -> dict[str, str]:
+    """
+    Returns the environment of the processes using the local broker, celery prefers
+    these variables to the settings. The results are stored in files next to the messages.
+    """
+    return {
+        'CELERY_BROKER_URL': 'filesystem://',
+        'CELERY_RESULT_BACKEND': results_url(directory),
+        LOCAL_BROKER_ENV: directory,
+    }
+
+
+def configure(app: Celery, directory: str) -> None:
+    app.conf.update(filesystem_conf(directory), result_backend=results_url(directory))
@@ -0,0 +1,187 @@
+"""
+Monitor of the worker events inside runcelery (``runcelery --events``).
+
+A lighter alternative to flower: the events sent by the workers started with ``-E``
+are consumed in a thread of runcelery and aggregated per task into the rates,
+the runtimes, the failures and the queue latency. The memory is bounded: the rates
+are kept in a ring of one-second buckets, the runtimes and the latencies in fixed-size
+samples of the latest tasks, the number of task names and of the tasks waiting to
+be started are limited.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict, deque
+from typing import TYPE_CHECKING, Any
+
+from ._timings import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from celery import Celery
+
+RATE_WINDOW = 60  # seconds
+SAMPLES = 1000
+MAX_TASK_NAMES = 500
+MAX_PENDING = 10000
+OTHER = '<other>'
+
+
+class RateWindow:
+    """
+    Number of the events per second over the last ``size`` seconds.
+    """
+
+    def __init__(self, size: int = RATE_WINDOW) -> None:
+        self.size = size
+        self._counts = [0] * size
+        self._seconds = [0] * size
+
+    def add(self, moment: float) -> None:
+        second = int(moment)
+        i = second % self.size
+        if self._seconds[i] != second:
+            self._seconds[i] = second
+            self._counts[i] = 0
+        self._counts[i] += 1
+
+    def rate(self, now: float) -> float:
+        oldest = int(now) - self.size
+        counts = zip(self._counts, self._seconds)  # noqa: B905
+        return sum(count for count, second in counts if second > oldest) / self.size
+
+
+class TaskStats:
+    __slots__ = ('failed', 'queue_latencies', 'rate', 'retried', 'runtimes', 'succeeded')
+
+    def __init__(self) -> None:
+        self.succeeded = 0
+        self.failed = 0
+        self.retried = 0
+        self.rate = RateWindow()
+        self.runtimes: deque[float] = deque(maxlen=SAMPLES)
+        self.queue_latencies: deque[float] = deque(maxlen=SAMPLES)
+
+
+class EventMonitor:
+    """
+    Aggregates the task events, ``on_event`` is the handler of the event receiver.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: dict[str, TaskStats] = {}
+        # uuid -> task name, moment the task was sent or received by the worker.
+        self._pending: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        self.changed = False
+        self.listeners: list[Callable[[dict[str, Any]], None]] = []
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        """
+        Adds a callback called with every event, from the thread consuming the events.
+        """
+        self.listeners.append(listener)
+
+    def stats(self, name: str) -> TaskStats:
+        if name not in self.tasks and len(self.tasks) >= MAX_TASK_NAMES:
+            name = OTHER
+        if name not in self.tasks:
+            self.tasks[name] = TaskStats()
+        return self.tasks[name]
+
+    def on_event(self, event: dict[str, Any]) -> None:
+        for listener in self.listeners:
+            listener(event)
+        kind = event.get('type', '')
+        uuid = event.get('uuid')
+        if not kind.startswith('task-') or not uuid:
+            return
+        moment = event.get('timestamp') or time.time()
+
+        if kind in ('task-sent', 'task-received'):
+            if uuid not in self._pending:
+                self._pending[uuid] = (event.get('name') or OTHER, moment)
+                if len(self._pending) > MAX_PENDING:
+                    self._pending.popitem(last=False)
+            return
+
+        pending = self._pending.get(uuid)
+        if pending is None:
+            return
+        name, queued_at = pending
+        stats = self.stats(name)
+        self.changed = True
+        if kind == 'task-started':
+            stats.queue_latencies.append(max(moment - queued_at, 0.0))
+        elif kind == 'task-succeeded':
+            stats.succeeded += 1
+            stats.rate.add(moment)
+            stats.runtimes.append(event.get('runtime') or 0.0)
+            del self._pending[uuid]
+        elif kind in ('task-failed', 'task-rejected', 'task-revoked'):
+            stats.failed += 1
+            stats.rate.add(moment)
+            del self._pending[uuid]
+        elif kind == 'task-retried':
+            stats.retried += 1
+
+    def summary(self, now: float | None = None) -> list[str]:
+        now = time.time() if now is None else now
+        header = ('task', 'rate/s', 'ok', 'failed', 'retried', 'run p50/p95 ms', 'queue p50/p95 ms')
+        rows = [
+            (
+                name,
+                f'{stats.rate.rate(now):.2f}',
+                str(stats.succeeded),
+                str(stats.failed),
+                str(stats.retried),
+                _percentiles(stats.runtimes),
+                _percentiles(stats.queue_latencies),
+            )
+            for name, stats in sorted(self.tasks.items())
+        ]
+        widths = [max(len(row[i]) for row in (header, *rows)) for i in range(len(header))]
+        return [
+            '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()  # noqa: B905
+            for row in (header, *rows)
+        ]
+
+
+def _percentiles(samples: deque[float]) -> str:
+    if not samples:
+        return '-'
+    values = list(samples)
+    return f'{percentile(values, 50) * 1000:.0f}/{percentile(values, 95) * 1000:.0f}'
+
+
+def consume(
+    app: Celery,
+    monitor: EventMonitor,
+    interval: float,
+    write: Callable[[list[str]], None],
+    on_error: Callable[[str], None],
+) -> None:
+    """
+    Consumes the events of the workers forever and writes the summary every ``interval``
+    seconds when new events have come, reconnects to the broker after the errors.
+    """
+    printed = time.monotonic()
+
+    def write_summary() -> None:
+        nonlocal printed
+        if monitor.changed and time.monotonic() - printed >= interval:
+            monitor.changed = False
+            printed = time.monotonic()
+            write(monitor.summary())
+
+    while True:
+        try:
+            with app.connection_for_read() as connection:
+                receiver = app.events.Receiver(connection, handlers={'*': monitor.on_event})
+                # Called at least once a second, also when no events come.
+                receiver.on_iteration = write_summary
+                receiver.capture(limit=None, timeout=None, wakeup=False)
+        except Exception as exc:
+            on_error(f'{type(exc).__name__}: {exc}')
+            time.sleep(interval)
@@ -0,0 +1,271 @@
+"""
+File watcher built on inotify (Linux only, through ctypes).
+
+Unlike the StatReloader of Django, which stats every watched file once a second,
+the kernel reports the changes of the watched directories as they happen.
+The watched files are those of Django (the imported modules and the watched globs)
+or only the files matching the include globs, the exclude globs and the
+directories which are never watched (``.venv``, ``node_modules``, ``media``...) are skipped.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import re
+import select
+import signal
+import struct
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from django.utils import autoreload
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable, Iterator
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+
+EVENT = struct.Struct('iIII')  # wd, mask, cookie, len
+READ_SIZE = 65536
+# Seconds between the updates of the watched files, new modules may have been imported.
+REFRESH_TIME = 1.0
+ALWAYS_EXCLUDED = ('.git', '.venv', 'venv', 'node_modules', 'media', '__pycache__', '.runcelery')
+
+
+@lru_cache(maxsize=1)
+def _libc() -> Any:
+    libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+def is_supported() -> bool:
+    if not sys.platform.startswith('linux'):
+        return False
+    try:
+        return hasattr(_libc(), 'inotify_init1')
+    except OSError:
+        return False
+
+
+@lru_cache(maxsize=256)
+def glob_to_regex(pattern: str) -> re.Pattern[str]:
+    """
+    Translates the glob into a regex, ``**`` matches any number of directories.
+    """
+    regex = ''
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith('**/', i):
+            regex += '(?:.*/)?'
+            i += 3
+        elif pattern.startswith('**', i):
+            regex += '.*'
+            i += 2
+        elif pattern[i] == '*':
+            regex += '[^/]*'
+            i += 1
+        elif pattern[i] == '?':
+            regex += '[^/]'
+            i += 1
+        else:
+            regex += re.escape(pattern[i])
+            i += 1
+    return re.compile(regex + r'\Z')
+
+
+class InotifyReloader(autoreload.BaseReloader):
+    """
+    Reloader which watches the directories of the watched files with inotify.
+    """
+
+    def __init__(
+        self,
+        base_dir: str,
+        include: Iterable[str] = (),
+        exclude: Iterable[str] = (),
+        report: Callable[[Path, float], None] | None = None,
+    ) -> None:
+        super().__init__()
+        self.base_dir = Path(base_dir).resolve()
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self.report = report
+        self.files: set[Path] = set()
+        self._fd: int | None = None
+        self._dirs: dict[int, Path] = {}
+        self._watched_dirs: set[Path] = set()
+        self._modules_count = 0
+
+    @classmethod
+    def check_availability(cls) -> bool:
+        return is_supported()
+
+    def relative(self, path: Path, directory: Path | None = None) -> str:
+        """
+        Returns the path relative to the directory (the base directory by default),
+        the absolute path if it is outside of it.
+        """
+        try:
+            return path.relative_to(directory or self.base_dir).as_posix()
+        except ValueError:
+            return path.as_posix()
+
+    def is_excluded(self, path: Path) -> bool:
+        relative = self.relative(path)
+        if any(part in ALWAYS_EXCLUDED for part in relative.split('/')):
+            return True
+        return any(glob_to_regex(pattern).match(relative) for pattern in self.exclude)
+
+    def is_watched(self, path: Path) -> bool:
+        """
+        The file is watched if it matches the include globs or, without them,
+        if it is watched by Django, and it is not excluded.
+        """
+        if self.is_excluded(path):
+            return False
+        if self.include:
+            relative = self.relative(path)
+            return any(glob_to_regex(pattern).match(relative) for pattern in self.include)
+        if path in self.files:
+            return True
+        return any(
+            glob_to_regex(pattern).match(self.relative(path, directory))
+            for directory, patterns in self.directory_globs.items()
+            for pattern in patterns
+        )
+
+    def watched_dirs(self, walk: bool = True) -> set[Path]:
+        """
+        Returns the directories to watch: those of the watched files and, if ``walk`` is set,
+        the whole trees of the watched globs and, with the include globs, of the base directory.
+        The directories created later in these trees are watched on their creation.
+        """
+        self._modules_count = len(sys.modules)
+        self.files = set(self.watched_files(include_globs=False))
+        dirs = {file.parent for file in self.files}
+        if walk:
+            roots = list(self.directory_globs)
+            if self.include:
+                roots.append(self.base_dir)
+            for root in roots:
+                dirs.update(self.walk(Path(root)))
+        return {directory for directory in dirs if not self.is_excluded(directory)}
+
+    def walk(self, root: Path) -> Iterator[Path]:
+        for dirpath, dirnames, _ in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not self.is_excluded(Path(dirpath, name))]
+            yield Path(dirpath)
+
+    def add_watch(self, directory: Path) -> None:
+        if directory in self._watched_dirs or self._fd is None:
+            return
+        wd = _libc().inotify_add_watch(self._fd, os.fsencode(directory), WATCH_MASK)
+        if wd < 0:
+            # The directory has been removed or the limit of the watches is reached.
+            return
+        self._dirs[wd] = directory
+        self._watched_dirs.add(directory)
+
+    def update_watches(self, walk: bool = True) -> None:
+        for directory in self.watched_dirs(walk):
+            self.add_watch(directory)
+
+    def read_events(self) -> Iterator[Path]:
+        """
+        Returns the paths of the changed files, new directories are watched.
+        """
+        assert self._fd is not None
+        try:
+            data = os.read(self._fd, READ_SIZE)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT.unpack_from(data, offset)
+            offset += EVENT.size
+            name = data[offset : offset + length].rstrip(b'\0')
+            offset += length
+
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF):
+                self._dirs.pop(wd, None)
+                self._watched_dirs.discard(directory)
+                continue
+            path = directory / os.fsdecode(name)
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.is_excluded(path):
+                    for new_dir in self.walk(path):
+                        self.add_watch(new_dir)
+                continue
+            if mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                yield path
+
+    def tick(self) -> Iterator[None]:
+        fd = _libc().inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if fd < 0:
+            raise OSError(ctypes.get_errno(), os.strerror(ctypes.get_errno()))
+        self._fd = fd
+        try:
+            self.update_watches()
+            refreshed = time.monotonic()
+            while True:
+                try:
+                    ready, _, _ = select.select([fd], [], [], REFRESH_TIME)
+                except InterruptedError:
+                    ready = []
+                if ready:
+                    for path in dict.fromkeys(self.read_events()):
+                        if self.is_watched(path):
+                            self.notify_file_changed(path)
+                            self.report_latency(path)
+                if time.monotonic() - refreshed >= REFRESH_TIME:
+                    if len(sys.modules) != self._modules_count:
+                        self.update_watches(walk=False)
+                    refreshed = time.monotonic()
+                yield
+        finally:
+            self._fd = None
+            self._dirs.clear()
+            self._watched_dirs.clear()
+            os.close(fd)
+
+    def report_latency(self, path: Path) -> None:
+        """
+        Reports the time from the modification of the file to the notification about it.
+        """
+        if self.report is None:
+            return
+        try:
+            latency = time.time() - path.stat().st_mtime
+        except OSError:
+            return
+        self.report(path, max(latency, 0.0))
+
+
+def run_with_reloader(reloader: autoreload.BaseReloader, main_func: Callable[..., Any]) -> None:
+    """
+    django.utils.autoreload.run_with_reloader with the given reloader.
+    """
+    signal.signal(signal.SIGTERM, lambda *args: sys.exit(0))
+    try:
+        if os.environ.get(autoreload.DJANGO_AUTORELOAD_ENV) == 'true':
+            autoreload.start_django(reloader, main_func)
+        else:
+            sys.exit(autoreload.restart_with_reloader())
+    except KeyboardInterrupt:
+        pass
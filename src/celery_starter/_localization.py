@@ -17,8 +17,158 @@ beat_help = 'Full command line to run beat or options that extend the default co
 flower_help = 'Full command line to run flower or options that extend the default command line.'
 exclude_beat_help = 'Excludes the beat server at startup.'
 exclude_flower_help = 'Excludes the flower server at startup.'
-debug_help = 'Displays information about successful/unsuccessful completion of processes.'
+debug_help = (
+    'Displays how every process left by the previous run was stopped: stopped, killed or not running.'
+)
 constant_not_found = 'The %s constant could not be found in your project.'
+invalid_worker_spec = 'The CELERY_STARTER_WORKERS item must be a dict with a unique name: %r'
+zygote_help = """Keeps django and celery imported in a parent process
+ and forks the worker and beat from it on reload instead of a cold start."""
+zygote_not_supported = 'The zygote mode requires os.fork, celery will be restarted as usual.'
+restart_msg = 'Restart %s, because %d file(s) changed: %s'
+restart_on_any_change_help = """Restart the worker on a change of any watched file,
+ not only of the files imported by the worker."""
+hot_reload_help = """Reload the changed task modules in the running worker instead of restarting it,
+ only for the solo, threads, gevent and eventlet pools. The worker is restarted when the reload fails,
+ a changed module does not define tasks or the settings, the celery app module or the models change."""
+hot_reload_msg = 'Modules of %s are reloaded without a restart: %s'
+hot_reload_failed_msg = 'Modules of %s are not reloaded (%s), it is restarted'
+no_reply_reason = 'no reply'
+watcher_help = """File watcher: inotify - watches the directories with inotify (Linux only),
+ django - the reloader of Django (watchman if it is installed, otherwise stats every file once a second),
+ auto - inotify if it is available."""
+watch_include_help = """Glob of the files relative to BASE_DIR which are watched by the inotify watcher
+ instead of the imported modules, for example **/tasks.py, can be passed several times."""
+watch_exclude_help = """Glob of the files and directories relative to BASE_DIR which are not watched
+ by the inotify watcher, can be passed several times. .venv, node_modules and media are never watched."""
+inotify_not_supported = 'The inotify watcher is only available on Linux, the reloader of Django is used.'
+watch_latency_msg = 'Change of %s is noticed in %.1f ms'
+status_interval_help = """Seconds between the lines with the memory, CPU and file descriptors
+ used by every process and its children, 0 disables them and the recycling."""
+max_memory_help = 'Memory in MiB after which the process is gracefully restarted.'
+max_uptime_help = 'Seconds of work after which the process is gracefully restarted.'
+memory_reason = 'uses more than %d MiB'
+uptime_reason = 'works longer than %d seconds'
+recycle_msg = 'Restart %s, because it %s: %s'
+recycled_msg = '%s is restarted, before: %s, after: %s'
+resources_not_supported = 'Resource usage is only available on Linux or with psutil installed.'
+metrics_port_help = 'Port of the HTTP endpoint /metrics with the metrics in the Prometheus text format.'
+metrics_address_help = 'Address of the metrics endpoint (default 127.0.0.1).'
+metrics_msg = 'Metrics are served on http://%s:%d/metrics'
+bench_help = 'Compare the worker pools on a filesystem broker and exit, without starting celery.'
+bench_task_help = 'Task of the benchmark: cpu, io (synthetic tasks) or the name of a project task.'
+bench_tasks_help = 'Number of the task calls per pool.'
+bench_pools_help = (
+    "Pools to compare, for example 'solo,threads:8,prefork:4' (default: the installed pools)."
+)
+bench_msg = 'Benchmark of %s, %d calls on every pool: %s'
+bench_best_msg = 'Fastest: %s, start the worker with: -w "-P %s -c %d"'
+bench_failed_msg = 'No pool has finished the tasks'
+profile_tasks_help = (
+    "Profile the tasks matching the comma separated globs of their names ('*' - all tasks)."
+)
+profile_sample_help = 'Profiled fraction of the matching tasks (default 1.0).'
+profile_memory_help = 'Trace the peak memory of the profiled tasks with tracemalloc.'
+profile_dir_help = (
+    'Directory of the .pstats files of the profiled tasks (default: runcelery-profiles in the temp dir).'
+)
+profile_msg = 'The tasks %s are profiled, the profiles are written to %s'
+events_help = """Consume the events of the workers (started with -E) in runcelery and print
+ the rates, runtimes, failures and queue latency of the tasks, a light replacement of flower."""
+events_interval_help = 'Seconds between the summaries of the task events (default 10).'
+events_error_msg = 'The events of the workers are not received: %s'
+trace_help = """Write the timeline of the tasks from the events of the workers to this file
+ in the Chrome trace format, every --events_interval seconds and at the exit."""
+trace_msg = 'The timeline of the tasks is written to %s'
+trace_error_msg = 'The timeline of the tasks is not written: %s'
+local_broker_help = """Run the worker and beat on a local broker on the kombu filesystem transport
+ in this directory (default .runcelery/broker), without redis or rabbitmq, flower is not started."""
+local_broker_msg = 'Local broker: %s'
+bench_broker_help = (
+    "Broker of the benchmark, 'local' (default) or a broker URL, may be repeated to compare them."
+)
+cpu_shards_help = """Start one worker per CPU pinned to it: auto - every available CPU,
+ '0,2,4-7' - the workers on CPU 0, on CPU 2 and on CPUs 4 to 7 (Linux only)."""
+invalid_cpu_shards = 'Invalid --cpu_shards: %r, expected auto or CPUs like 0,2,4-7'
+affinity_not_supported = 'The workers are not pinned to the CPUs, it is only supported on Linux.'
+backlog_help = """What to do with the messages queued in the queues of the workers at the start:
+ keep (default), purge, newest - keep the newest --backlog_keep messages of every task,
+ drain - replay them at --backlog_rate messages per second."""
+backlog_keep_help = 'Messages of every task kept by --backlog newest (default 100).'
+backlog_rate_help = 'Messages per second replayed by --backlog drain (default 10).'
+backlog_purged_msg = '%s: %d messages are dropped'
+backlog_newest_msg = '%s: %d messages are dropped, %d newest are kept'
+backlog_parked_msg = '%s: %d messages are deferred and replayed at %s per second'
+backlog_drained_msg = '%s: %d deferred messages are replayed'
+backlog_error_msg = 'The backlog is not processed: %s'
+backlog_leftover_msg = '%s: %d messages deferred by the previous run are replayed at %s per second'
+positive_number_error = 'must be a number greater than 0: %r'
+beat_catchup_help = """Run beat with the schedule store of runcelery (SQLite next to the pidfile)
+ and this policy for the runs missed while beat was not running: skip, once or spread."""
+beat_catchup_window_help = (
+    'Seconds over which --beat_catchup spread runs the missed entries (default 300).'
+)
+archive_help = """Write the output of the processes to the segments of the log archive with an index
+ searched by --grep, in the directory (default .runcelery/logs)."""
+archive_segment_bytes_help = 'Size of a segment of the log archive in bytes (default 64 MiB).'
+archive_max_segments_help = 'Segments of the log archive kept, the oldest are removed (default 64).'
+archive_msg = 'The output of the processes is archived in %s'
+grep_help = """Print the lines of the log archive (--archive) of the task with this id, or of all tasks
+ without an id, instead of running celery."""
+grep_since_help = (
+    "Start of the time range of --grep: ISO time ('2026-10-18 13:30') or ago ('15m', '2h')."
+)
+grep_until_help = 'End of the time range of --grep, in the format of --grep_since.'
+grep_level_help = 'Lowest level of the lines printed by --grep.'
+grep_msg = '%d lines found in %.1f ms'
+grep_error_msg = 'The log archive is not searched: %s'
+record_help = 'Append the tasks received by the workers to this file for --replay.'
+record_msg = 'The tasks received by the workers are recorded to %s'
+replay_help = """Send the tasks recorded by --record to a fresh worker of the worker command
+ and report the throughput, the latency and the failures of every task instead of running celery."""
+replay_speed_help = 'Speed of --replay relative to the recorded rate, 0 - all tasks at once (default 1).'
+replay_baseline_help = """JSON file of the results of --replay to compare with,
+ it is written if it does not exist. The command fails on the regressions."""
+replay_tolerance_help = 'Allowed slowdown relative to --replay_baseline (default 0.2 - 20%%).'
+replay_msg = 'Replay of %d tasks recorded over %.1f s at the speed %s'
+replay_empty_msg = 'No tasks are recorded in %s'
+replay_error_msg = 'The replay is not complete: %s'
+replay_baseline_saved_msg = 'The results are saved as the baseline %s'
+replay_regression_msg = '%s: %s %.4g -> %.4g'
+replay_failed_msg = '%d regressions relative to the baseline %s'
+replay_passed_msg = 'No regressions relative to the baseline %s'
+stop_previous_msg = 'Stopping the processes left by the previous run: %s'
+stop_previous_pid_only_msg = (
+    'The start time of the processes is not available (no /proc and psutil is not installed), '
+    'the processes left by the previous run are matched by the pid only'
+)
+stop_previous_debug_msg = '%s (pid %d) of the previous run: %s'
+stopped_outcome = 'stopped'
+killed_outcome = 'killed, it has not stopped in time'
+not_running_outcome = 'not running'
+debounce_help = 'Seconds without file changes after which the collected changes cause one restart.'
+boot_cancelled_msg = 'Boot of %s is cancelled by a new file change'
+not_ready_msg = '%s is not ready: %s, last lines of its output:'
+exited_reason = 'exited with code %s'
+timeout_reason = 'startup timeout has passed'
+cancelled_reason = 'cancelled'
+beat_held_back_msg = 'Beat is not started until the workers are ready: %s'
+log_dir_help = 'Directory for rotating log files of every process, the files are not written by default.'
+log_max_bytes_help = 'Size of the log file in bytes after which it is rotated.'
+lines_dropped_msg = '... %d lines dropped, the console does not keep up'
+pool_sample_help = """Name of the task (without arguments) which is run a few times by a separate worker
+ to tell whether the workload is I/O-bound or CPU-bound for -P auto, can be passed several times."""
+pool_sample_error = 'Unknown --pool_sample task: %s. The registered tasks: %s'
+auto_pool_msg = 'Pool: %s, concurrency: %d (%s)'
+timings_json_help = 'File to which the timings of every restart and their p50/p95 are written as JSON.'
+workload_msg = ', sampled tasks are %s-bound, %.0f%% of the time on CPU'
+workload_error_msg = ', the tasks are not sampled: %s'
+restart_strategy_help = """How the worker is restarted: stop - stops the old worker and starts a new one,
+ overlap - starts a new worker and gives the old one a warm shutdown once the new one is ready."""
+drain_timeout_help = 'Seconds given to the old worker to finish its tasks before it is killed.'
+startup_timeout_help = 'Seconds given to the new process to become ready.'
+overlap_ready_msg = 'Worker %s is ready, the old worker is finishing its tasks'
+overlap_failed_msg = 'Worker %s did not become ready, the old worker keeps running'
 
 if localization == 'ru_RU':
     command_help = """Команда запускающая celery [worker, beat, flower]
@@ -34,5 +184,177 @@ if localization == 'ru_RU':
  или параметры расширяющие командную строку по умолчанию."""
     exclude_beat_help = 'Исключает beat сервер при запуске.'
     exclude_flower_help = 'Исключает flower сервер при запуске.'
-    debug_help = 'Отображает информацию о успешном/неудачном завершении процессов.'
+    debug_help = (
+        'Отображает, как остановлен каждый процесс, оставшийся от предыдущего запуска: '
+        'остановлен, убит или не запущен.'
+    )
     constant_not_found = 'Не удалось найти константу %s в вашем проекте.'
+    invalid_worker_spec = 'Элемент CELERY_STARTER_WORKERS должен быть словарём с уникальным name: %r'
+    zygote_help = """Держит django и celery импортированными в родительском процессе
+ и при перезагрузке порождает из него worker и beat вместо холодного старта."""
+    zygote_not_supported = 'Режим zygote требует os.fork, celery будет перезапускаться как обычно.'
+    restart_msg = 'Перезапуск %s, так как изменено файлов: %d: %s'
+    restart_on_any_change_help = """Перезапускать worker при изменении любого отслеживаемого файла,
+ а не только файлов, импортированных worker."""
+    hot_reload_help = """Перезагружать изменённые модули задач в работающем worker
+ вместо его перезапуска, только для пулов solo, threads, gevent и eventlet. Worker перезапускается,
+ если перезагрузка не удалась, изменённый модуль не определяет задач или изменены настройки,
+ модуль celery приложения или модели."""
+    hot_reload_msg = 'Модули %s перезагружены без перезапуска: %s'
+    hot_reload_failed_msg = 'Модули %s не перезагружены (%s), он перезапускается'
+    no_reply_reason = 'нет ответа'
+    watcher_help = """Отслеживание файлов: inotify - следит за директориями через inotify (только Linux),
+ django - reloader Django (watchman, если он установлен, иначе раз в секунду проверяет каждый файл),
+ auto - inotify, если он доступен."""
+    watch_include_help = """Glob файлов относительно BASE_DIR, которые отслеживает inotify
+ вместо импортированных модулей, например **/tasks.py, можно передать несколько раз."""
+    watch_exclude_help = """Glob файлов и директорий относительно BASE_DIR,
+ которые inotify не отслеживает, можно передать несколько раз.
+ .venv, node_modules и media не отслеживаются никогда."""
+    inotify_not_supported = (
+        'Отслеживание через inotify доступно только в Linux, используется reloader Django.'
+    )
+    watch_latency_msg = 'Изменение %s замечено за %.1f мс'
+    status_interval_help = """Секунды между строками с памятью, CPU и файловыми дескрипторами
+ каждого процесса и его детей, 0 отключает их и перезапуск по лимитам."""
+    max_memory_help = 'Память в MiB, после которой процесс мягко перезапускается.'
+    max_uptime_help = 'Секунды работы, после которых процесс мягко перезапускается.'
+    memory_reason = 'использует больше %d MiB'
+    uptime_reason = 'работает дольше %d секунд'
+    recycle_msg = 'Перезапуск %s, так как он %s: %s'
+    recycled_msg = '%s перезапущен, до: %s, после: %s'
+    resources_not_supported = (
+        'Использование ресурсов доступно только в Linux или с установленным psutil.'
+    )
+    metrics_port_help = 'Порт HTTP эндпоинта /metrics с метриками в текстовом формате Prometheus.'
+    metrics_address_help = 'Адрес эндпоинта метрик (по умолчанию 127.0.0.1).'
+    metrics_msg = 'Метрики доступны на http://%s:%d/metrics'
+    bench_help = 'Сравнить пулы воркера на файловом брокере и выйти, без запуска celery.'
+    bench_task_help = 'Задача бенчмарка: cpu, io (синтетические задачи) или имя задачи проекта.'
+    bench_tasks_help = 'Количество вызовов задачи на каждый пул.'
+    bench_pools_help = (
+        "Сравниваемые пулы, например 'solo,threads:8,prefork:4' (по умолчанию: установленные пулы)."
+    )
+    bench_msg = 'Бенчмарк %s, %d вызовов на каждом пуле: %s'
+    bench_best_msg = 'Быстрее всех: %s, запускайте воркер с: -w "-P %s -c %d"'
+    bench_failed_msg = 'Ни один пул не выполнил задачи'
+    profile_tasks_help = (
+        "Профилировать задачи, имена которых подходят под глобы через запятую ('*' - все задачи)."
+    )
+    profile_sample_help = 'Профилируемая доля подходящих задач (по умолчанию 1.0).'
+    profile_memory_help = 'Отслеживать пиковую память профилируемых задач с помощью tracemalloc.'
+    profile_dir_help = (
+        'Директория .pstats файлов профилируемых задач (по умолчанию: runcelery-profiles во временной).'
+    )
+    profile_msg = 'Задачи %s профилируются, профили пишутся в %s'
+    events_help = """Получать события воркеров (запущенных с -E) в runcelery и выводить
+ частоту, время выполнения, ошибки и время в очереди задач, лёгкая замена flower."""
+    events_interval_help = 'Секунды между сводками событий задач (по умолчанию 10).'
+    events_error_msg = 'События воркеров не получены: %s'
+    trace_help = """Записывать временную шкалу задач по событиям воркеров в этот файл
+ в формате Chrome trace, каждые --events_interval секунд и при выходе."""
+    trace_msg = 'Временная шкала задач записывается в %s'
+    trace_error_msg = 'Временная шкала задач не записана: %s'
+    local_broker_help = """Запускать воркер и beat на локальном брокере на файловом транспорте kombu
+ в этой директории (по умолчанию .runcelery/broker), без redis и rabbitmq, flower не запускается."""
+    local_broker_msg = 'Локальный брокер: %s'
+    bench_broker_help = (
+        "Брокер бенчмарка, 'local' (по умолчанию) или URL брокера, можно повторять для сравнения."
+    )
+    cpu_shards_help = """Запускать по воркеру на CPU, закреплённому за ним: auto - все доступные CPU,
+ '0,2,4-7' - воркеры на CPU 0, на CPU 2 и на CPU с 4 по 7 (только Linux)."""
+    invalid_cpu_shards = 'Неверный --cpu_shards: %r, ожидается auto или CPU вида 0,2,4-7'
+    affinity_not_supported = 'Воркеры не закреплены за CPU, это поддерживается только в Linux.'
+    backlog_help = """Что делать с сообщениями в очередях воркеров при запуске:
+ keep (по умолчанию), purge - удалить, newest - оставить --backlog_keep новейших сообщений каждой задачи,
+ drain - воспроизвести их со скоростью --backlog_rate сообщений в секунду."""
+    backlog_keep_help = 'Сообщений каждой задачи, оставляемых --backlog newest (по умолчанию 100).'
+    backlog_rate_help = 'Сообщений в секунду, воспроизводимых --backlog drain (по умолчанию 10).'
+    backlog_purged_msg = '%s: удалено сообщений: %d'
+    backlog_newest_msg = '%s: удалено сообщений: %d, оставлено новейших: %d'
+    backlog_parked_msg = '%s: отложено сообщений: %d, они воспроизводятся по %s в секунду'
+    backlog_drained_msg = '%s: воспроизведено отложенных сообщений: %d'
+    backlog_error_msg = 'Очереди при запуске не обработаны: %s'
+    backlog_leftover_msg = (
+        '%s: отложено предыдущим запуском сообщений: %d, они воспроизводятся по %s в секунду'
+    )
+    positive_number_error = 'должно быть числом больше 0: %r'
+    beat_catchup_help = """Запускать beat с хранилищем расписания runcelery (SQLite рядом с pid-файлом)
+ и этой политикой для пропущенных запусков: skip, once или spread."""
+    beat_catchup_window_help = (
+        'Секунд, за которые --beat_catchup spread выполняет пропущенные задачи (по умолчанию 300).'
+    )
+    archive_help = """Записывать вывод процессов в сегменты архива логов с индексом для поиска --grep,
+ в директорию (по умолчанию .runcelery/logs)."""
+    archive_segment_bytes_help = 'Размер сегмента архива логов в байтах (по умолчанию 64 MiB).'
+    archive_max_segments_help = 'Хранимых сегментов архива логов, старейшие удаляются (по умолчанию 64).'
+    archive_msg = 'Вывод процессов архивируется в %s'
+    grep_help = """Вывести строки архива логов (--archive) задачи с этим id или всех задач
+ без id вместо запуска celery."""
+    grep_since_help = (
+        "Начало интервала времени --grep: ISO время ('2026-10-18 13:30') или назад ('15m', '2h')."
+    )
+    grep_until_help = 'Конец интервала времени --grep, в формате --grep_since.'
+    grep_level_help = 'Наименьший уровень строк, выводимых --grep.'
+    grep_msg = 'Найдено строк: %d за %.1f мс'
+    grep_error_msg = 'Архив логов не просмотрен: %s'
+    record_help = 'Дописывать задачи, полученные воркерами, в этот файл для --replay.'
+    record_msg = 'Задачи, полученные воркерами, записываются в %s'
+    replay_help = """Отправить задачи, записанные --record, новому воркеру команды воркера
+ и вывести пропускную способность, задержки и ошибки каждой задачи вместо запуска celery."""
+    replay_speed_help = (
+        'Скорость --replay относительно записанной, 0 - все задачи сразу (по умолчанию 1).'
+    )
+    replay_baseline_help = """JSON файл с результатами --replay для сравнения,
+ он записывается, если не существует. Команда завершается ошибкой при регрессиях."""
+    replay_tolerance_help = (
+        'Допустимое замедление относительно --replay_baseline (по умолчанию 0.2 - 20%%).'
+    )
+    replay_msg = 'Воспроизведение %d задач, записанных за %.1f с, со скоростью %s'
+    replay_empty_msg = 'В %s нет записанных задач'
+    replay_error_msg = 'Воспроизведение не завершено: %s'
+    replay_baseline_saved_msg = 'Результаты сохранены как базовые в %s'
+    replay_regression_msg = '%s: %s %.4g -> %.4g'
+    replay_failed_msg = 'Регрессий относительно базовых результатов %s: %d'
+    replay_passed_msg = 'Нет регрессий относительно базовых результатов %s'
+    stop_previous_msg = 'Остановка процессов, оставшихся от предыдущего запуска: %s'
+    stop_previous_pid_only_msg = (
+        'Время запуска процессов недоступно (нет /proc и не установлен psutil), '
+        'процессы предыдущего запуска определяются только по pid'
+    )
+    stop_previous_debug_msg = '%s (pid %d) предыдущего запуска: %s'
+    stopped_outcome = 'остановлен'
+    killed_outcome = 'убит, так как не остановился вовремя'
+    not_running_outcome = 'не запущен'
+    debounce_help = (
+        'Секунды без изменений файлов, после которых собранные изменения вызывают один перезапуск.'
+    )
+    boot_cancelled_msg = 'Запуск %s отменён новым изменением файлов'
+    not_ready_msg = '%s не готов: %s, последние строки его вывода:'
+    exited_reason = 'завершился с кодом %s'
+    timeout_reason = 'время на запуск истекло'
+    cancelled_reason = 'отменён'
+    beat_held_back_msg = 'Beat не запускается, пока не готовы worker: %s'
+    log_dir_help = """Директория для ротируемых лог файлов каждого процесса,
+ по умолчанию файлы не пишутся."""
+    log_max_bytes_help = 'Размер лог файла в байтах, после которого он ротируется.'
+    lines_dropped_msg = '... пропущено строк: %d, консоль не успевает'
+    pool_sample_help = """Название задачи (без аргументов), которая запускается несколько раз
+ отдельным worker, чтобы определить для -P auto, ограничена ли нагрузка вводом-выводом или CPU,
+ можно передать несколько раз."""
+    pool_sample_error = 'Неизвестная задача --pool_sample: %s. Зарегистрированные задачи: %s'
+    auto_pool_msg = 'Пул: %s, concurrency: %d (%s)'
+    timings_json_help = (
+        'Файл, в который пишутся тайминги каждого перезапуска и их p50/p95 в формате JSON.'
+    )
+    workload_msg = ', задачи из выборки %s-bound, %.0f%% времени на CPU'
+    workload_error_msg = ', задачи не измерены: %s'
+    restart_strategy_help = """Способ перезапуска worker:
+ stop - останавливает старый worker и запускает новый,
+ overlap - запускает новый worker и мягко останавливает старый, когда новый готов."""
+    drain_timeout_help = (
+        'Секунды, отведённые старому worker на завершение задач, после чего он убивается.'
+    )
+    startup_timeout_help = 'Секунды, отведённые новому процессу на готовность.'
+    overlap_ready_msg = 'Worker %s готов, старый worker завершает свои задачи'
+    overlap_failed_msg = 'Worker %s не стал готов, старый worker продолжает работу'
@@ -0,0 +1,216 @@
+"""
+Log multiplexer for the output of the celery processes.
+
+A reader thread drains stdout and stderr of every child (selector-based,
+a thread per pipe on Windows where pipes cannot be selected), so a child never
+blocks on a full pipe. Lines are queued per process in bounded buffers and
+written to the console by a writer thread with a colour-coded tag of the process.
+When the console does not keep up, the oldest lines of the noisy process are
+dropped instead of stalling the others.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import selectors
+import sys
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from typing import IO, TYPE_CHECKING, Any
+
+from django.utils.termcolors import colorize
+
+from . import _localization as L  # noqa: N812
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+PALETTE = ('green', 'cyan', 'magenta', 'yellow', 'blue', 'red')
+READ_SIZE = 65536
+MAX_LINE_LENGTH = 65536
+LOG_BACKUP_COUNT = 5
+
+
+class LogMux:
+    """
+    Collects lines from the registered pipes and writes them to one console.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], None],
+        color: bool = True,
+        max_lines: int = 10000,
+        log_dir: str | None = None,
+        log_max_bytes: int = 10 * 1024 * 1024,
+    ) -> None:
+        self.write = write
+        self.color = color
+        self.max_lines = max_lines
+        self.log_dir = log_dir
+        self.log_max_bytes = log_max_bytes
+        self.listeners: list[Callable[[str, str], None]] = []
+
+        self._lines: dict[str, deque[str]] = {}
+        self._dropped: dict[str, int] = {}
+        self._tags: dict[str, str] = {}
+        self._files: dict[str, logging.Logger] = {}
+        self._lines_ready = threading.Condition()
+        self._pending: deque[tuple[str, IO[bytes]]] = deque()
+        self._wakeup_r, self._wakeup_w = os.pipe()
+        self._stopped = threading.Event()
+
+    def add_listener(self, listener: Callable[[str, str], None]) -> None:
+        """
+        Adds a callback called with the process name and every line of its output.
+        It is called from the reader thread, so it must be fast.
+        """
+        self.listeners.append(listener)
+
+    def register(self, name: str, pipe: IO[bytes]) -> None:
+        """
+        Starts draining the pipe of the process with the given name.
+        """
+        with self._lines_ready:
+            if name not in self._lines:
+                self._lines[name] = deque(maxlen=self.max_lines)
+                self._dropped[name] = 0
+                self._tags[name] = self._make_tag(name, len(self._tags))
+                if self.log_dir:
+                    self._files[name] = self._make_file_logger(name)
+
+        if sys.platform == 'win32':
+            threading.Thread(target=self._read_pipe, args=(name, pipe), daemon=True).start()
+        else:
+            self._pending.append((name, pipe))
+            os.write(self._wakeup_w, b'\0')
+
+    def start(self) -> None:
+        if sys.platform != 'win32':
+            threading.Thread(target=self._select_loop, name='runcelery-logs-reader', daemon=True).start()
+        threading.Thread(target=self._write_loop, name='runcelery-logs-writer', daemon=True).start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        os.write(self._wakeup_w, b'\0')
+        with self._lines_ready:
+            self._lines_ready.notify()
+
+    def _make_tag(self, name: str, index: int) -> str:
+        tag = f'[{name}]'
+        if self.color:
+            tag = colorize(tag, fg=PALETTE[index % len(PALETTE)], opts=('bold',))
+        tag += ' ' * max(8 - len(name), 1)
+        return tag
+
+    def _make_file_logger(self, name: str) -> logging.Logger:
+        os.makedirs(self.log_dir, exist_ok=True)  # type: ignore[arg-type]
+        handler = RotatingFileHandler(
+            os.path.join(self.log_dir, f'{name}.log'),  # type: ignore[arg-type]
+            maxBytes=self.log_max_bytes,
+            backupCount=LOG_BACKUP_COUNT,
+            encoding='utf-8',
+        )
+        logger = logging.getLogger(f'celery_starter.{name}')
+        logger.handlers = [handler]
+        logger.propagate = False
+        logger.setLevel(logging.INFO)
+        return logger
+
+    def _push(self, name: str, line: str) -> None:
+        for listener in self.listeners:
+            try:
+                listener(name, line)
+            except Exception:
+                pass
+        if name in self._files:
+            self._files[name].info(line)
+        with self._lines_ready:
+            lines = self._lines[name]
+            if len(lines) == lines.maxlen:
+                self._dropped[name] += 1
+            lines.append(line)
+            self._lines_ready.notify()
+
+    def _feed(self, name: str, buffer: bytearray, data: bytes) -> None:
+        buffer += data
+        while True:
+            end = buffer.find(b'\n')
+            if end != -1:
+                line = bytes(buffer[:end]).rstrip(b'\r')
+                del buffer[: end + 1]
+            elif len(buffer) >= MAX_LINE_LENGTH:
+                line = bytes(buffer[:MAX_LINE_LENGTH])
+                del buffer[:MAX_LINE_LENGTH]
+            else:
+                return
+            self._push(name, line.decode(errors='replace'))
+
+    def _read_pipe(self, name: str, pipe: IO[bytes]) -> None:
+        buffer = bytearray()
+        fd = pipe.fileno()
+        while True:
+            data = os.read(fd, READ_SIZE)
+            if not data:
+                break
+            self._feed(name, buffer, data)
+        if buffer:
+            self._push(name, buffer.decode(errors='replace'))
+        pipe.close()
+
+    def _select_loop(self) -> None:
+        selector = selectors.DefaultSelector()
+        selector.register(self._wakeup_r, selectors.EVENT_READ)
+        buffers: dict[int, bytearray] = {}
+
+        while not self._stopped.is_set():
+            for key, _ in selector.select():
+                if key.fd == self._wakeup_r:
+                    os.read(self._wakeup_r, READ_SIZE)
+                    while self._pending:
+                        name, pipe = self._pending.popleft()
+                        buffers[pipe.fileno()] = bytearray()
+                        selector.register(pipe, selectors.EVENT_READ, name)
+                    continue
+
+                name, pipe = key.data, key.fileobj
+                data = os.read(key.fd, READ_SIZE)
+                if data:
+                    self._feed(name, buffers[key.fd], data)
+                    continue
+
+                selector.unregister(pipe)
+                buffer = buffers.pop(key.fd)
+                if buffer:
+                    self._push(name, buffer.decode(errors='replace'))
+                pipe.close()
+
+    def _next_lines(self) -> list[tuple[str, str, int]]:
+        """
+        Takes one line of every process with pending output, round-robin.
+        """
+        with self._lines_ready:
+            while not any(self._lines.values()) and not self._stopped.is_set():
+                self._lines_ready.wait()
+            taken = []
+            for name, lines in self._lines.items():
+                if lines:
+                    taken.append((name, lines.popleft(), self._dropped[name]))
+                    self._dropped[name] = 0
+            return taken
+
+    def _write_loop(self) -> None:
+        while not self._stopped.is_set():
+            for name, line, dropped in self._next_lines():
+                tag = self._tags[name]
+                if dropped:
+                    self._safe_write(tag + L.lines_dropped_msg % dropped)
+                self._safe_write(tag + line)
+
+    def _safe_write(self, msg: Any) -> None:
+        try:
+            self.write(msg)
+        except (OSError, ValueError):
+            pass
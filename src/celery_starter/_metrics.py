@@ -0,0 +1,207 @@
+"""
+Metrics of the supervisor in the Prometheus text format.
+
+A small registry of counters, gauges and histograms with labels and an HTTP server
+running in a background thread, which serves them on ``/metrics``. The gauges
+which describe the current state are updated by the collectors right before
+every scrape.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    pairs = ','.join(f'{key}="{_escape(str(value))}"' for key, value in labels)
+    return '{' + pairs + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    kind = ''
+
+    def __init__(self, name: str, help_text: str) -> None:
+        self.name = name
+        self.help_text = help_text
+        self._values: dict[tuple[tuple[str, str], ...], Any] = {}
+        self._lock = threading.Lock()
+
+    def render(self) -> list[str]:
+        lines = [f'# HELP {self.name} {self.help_text}', f'# TYPE {self.name} {self.kind}']
+        with self._lock:
+            items = list(self._values.items())
+        for labels, value in items:
+            lines.extend(self._render_sample(labels, value))
+        return lines
+
+    def _render_sample(self, labels: tuple[tuple[str, str], ...], value: Any) -> list[str]:
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, help_text: str, buckets: Iterable[float]) -> None:
+        super().__init__(name, help_text)
+        self.buckets = (*sorted(buckets), math.inf)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _render_sample(self, labels: tuple[tuple[str, str], ...], value: Any) -> list[str]:
+        counts, total = value
+        lines = [
+            f'{self.name}_bucket{_format_labels((*labels, ("le", _format_value(bound))))} {count}'
+            for bound, count in zip(self.buckets, counts)  # noqa: B905
+        ]
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(total)}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {counts[-1]}')
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.metrics: list[Metric] = []
+        self.collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._add(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._add(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Iterable[float]) -> Histogram:
+        return self._add(Histogram(name, help_text, buckets))
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        """
+        Adds a callback which updates the gauges before every scrape.
+        """
+        self.collectors.append(collector)
+
+    def render(self) -> str:
+        for collector in self.collectors:
+            collector()
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+    def _add(self, metric: Any) -> Any:
+        self.metrics.append(metric)
+        return metric
+
+
+class SupervisorMetrics(Registry):
+    """
+    Metrics of the runcelery supervisor.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.restarts = self.counter('runcelery_restarts_total', 'Restarts of the process.')
+        self.restart_duration = self.histogram(
+            'runcelery_restart_duration_seconds',
+            'Time from the file change to the ready process.',
+            (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+        )
+        self.changed_files = self.histogram(
+            'runcelery_reload_changed_files', 'Changed files per reload.', (1, 2, 5, 10, 25, 50, 100)
+        )
+        self.log_lines = self.counter('runcelery_log_lines_total', 'Lines of the process output.')
+        self.uptime = self.gauge('runcelery_process_uptime_seconds', 'Uptime of the process.')
+        self.rss = self.gauge(
+            'runcelery_process_rss_bytes', 'RSS of the process and its children, last sample.'
+        )
+        self.cpu = self.gauge(
+            'runcelery_process_cpu_percent', 'CPU of the process and its children, last sample.'
+        )
+
+
+class MetricsServer:
+    """
+    Serves the metrics of the registry on /metrics from a daemon thread.
+    """
+
+    def __init__(self, registry: Registry, port: int, address: str = '127.0.0.1') -> None:
+        self.registry = registry
+        self.port = port
+        self.address = address
+        self._server: ThreadingHTTPServer | None = None
+
+    def start(self) -> None:
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # noqa: N802
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # noqa: A002
+                pass
+
+        self._server = ThreadingHTTPServer((self.address, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        threading.Thread(
+            target=self._server.serve_forever, name='runcelery-metrics', daemon=True
+        ).start()
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
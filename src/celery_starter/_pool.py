@@ -0,0 +1,126 @@
+"""
+Automatic selection of the worker pool and concurrency (``-P auto``).
+
+The choice is based on the installed pools, the number of CPUs and the memory
+available to the process (cgroup limits are taken into account) and optionally
+on the workload measured by running a few real tasks in the isolated worker of the
+pool benchmark (``_bench.sample_workload``).
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import math
+import os
+import sys
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+
+CGROUP_ROOT = '/sys/fs/cgroup'
+# Approximate memory used by one prefork child of a django project.
+MEMORY_PER_CHILD = 150 * 1024 * 1024
+GREEN_CONCURRENCY = 100
+THREADS_PER_CPU = 4
+MAX_THREADS = 32
+# Share of the wall time spent on CPU above which the workload is CPU-bound.
+CPU_BOUND_RATIO = 0.5
+
+
+def _read(path: str) -> str | None:
+    try:
+        with open(os.path.join(CGROUP_ROOT, path)) as file:
+            return file.read().strip()
+    except OSError:
+        return None
+
+
+def installed_pools() -> list[str]:
+    pools = ['solo', 'threads']
+    if sys.platform != 'win32':
+        pools.append('prefork')
+    pools.extend(pool for pool in ('gevent', 'eventlet') if importlib.util.find_spec(pool))
+    return pools
+
+
+def cpu_limit() -> int:
+    """
+    Returns the number of CPUs available to the process,
+    limited by the CPU affinity and the cgroup CPU quota.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:  # not available on Windows and macOS
+        cpus = os.cpu_count() or 1
+
+    quota = period = None
+    cpu_max = _read('cpu.max')  # cgroup v2
+    if cpu_max:
+        quota, period = cpu_max.split()[:2]
+    else:  # cgroup v1
+        quota, period = _read('cpu/cpu.cfs_quota_us'), _read('cpu/cpu.cfs_period_us')
+
+    if quota and period and quota not in ('max', '-1'):
+        cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    return cpus
+
+
+def memory_limit() -> int | None:
+    """
+    Returns the memory available to the process in bytes,
+    the cgroup memory limit or the physical memory.
+    """
+    for path in ('memory.max', 'memory/memory.limit_in_bytes'):
+        limit = _read(path)
+        # cgroup v1 reports a huge number when there is no limit.
+        if limit and limit.isdigit() and int(limit) < 2**60:
+            return int(limit)
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def classify_workload(cpu_time: float, wall_time: float) -> tuple[str, float]:
+    """
+    Compares the CPU time the tasks used with the wall time.
+    Returns the workload kind ('cpu' or 'io') and the CPU share of the wall time.
+    """
+    ratio = cpu_time / wall_time if wall_time else 0.0
+    return ('cpu' if ratio >= CPU_BOUND_RATIO else 'io'), ratio
+
+
+def choose_pool(
+    workload: str | None = None,
+    pools: Iterable[str] | None = None,
+    cpus: int | None = None,
+    memory: int | None = None,
+) -> tuple[str, int, str]:
+    """
+    Returns the pool, the concurrency and the reason of the choice.
+    """
+    pools = list(installed_pools() if pools is None else pools)
+    cpus = cpu_limit() if cpus is None else cpus
+    memory = memory_limit() if memory is None else memory
+
+    prefork_concurrency = cpus
+    if memory:
+        prefork_concurrency = max(1, min(cpus, memory // MEMORY_PER_CHILD))
+    resources = f'{cpus} CPU, {memory // 2**20 if memory else "?"} MiB'
+
+    if workload == 'io':
+        for pool in ('gevent', 'eventlet'):
+            if pool in pools:
+                return pool, GREEN_CONCURRENCY, f'I/O-bound tasks and {pool} is installed'
+        threads = min(cpus * THREADS_PER_CPU, MAX_THREADS)
+        return 'threads', threads, f'I/O-bound tasks, {resources}, gevent/eventlet are not installed'
+
+    if 'prefork' in pools:
+        kind = 'CPU-bound tasks' if workload == 'cpu' else 'unknown workload'
+        return 'prefork', prefork_concurrency, f'{kind}, {resources}, one process per CPU'
+
+    if workload == 'cpu':
+        return 'solo', 1, 'CPU-bound tasks and prefork is not supported on this platform'
+    return 'threads', cpus, f'unknown workload, {resources}, prefork is not supported on this platform'
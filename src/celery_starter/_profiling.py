@@ -0,0 +1,113 @@
+"""
+Profiling of the tasks in the worker (``runcelery --profile_tasks``).
+
+Loaded by the bootstrap wrapper only when the option is set, so the tasks run
+without any overhead otherwise. The selected tasks, or a sampled fraction of
+them, run under cProfile and optionally tracemalloc: every run is written to
+``<task name>-<task id>.pstats`` and the hottest functions are logged, so they
+are printed on the console of runcelery with the output of the worker.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import os
+import pstats
+import random
+import time
+import tracemalloc
+from fnmatch import fnmatchcase
+from typing import TYPE_CHECKING, Any
+
+from celery.utils.log import get_logger
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+
+logger = get_logger(__name__)
+
+TOP = 10
+
+
+def hot_functions(stats: pstats.Stats, top: int = TOP) -> list[str]:
+    """
+    Returns the functions with the largest own time: own ms, cumulative ms, calls, location.
+    """
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][2], reverse=True)  # type: ignore[attr-defined]
+    lines = []
+    for (file, line, func), (_, calls, own_time, cum_time, _) in rows[:top]:
+        location = f'{os.path.basename(file)}:{line}({func})' if line else func
+        lines.append(f'{own_time * 1000:9.1f} {cum_time * 1000:9.1f} {calls:8d}  {location}')
+    return lines
+
+
+class TaskProfiler:
+    """
+    Profiles the tasks matching the globs of their names, ``sample`` is the profiled fraction of them.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        patterns: Iterable[str] = ('*',),
+        sample: float = 1.0,
+        memory: bool = False,
+        top: int = TOP,
+    ) -> None:
+        self.directory = directory
+        self.patterns = tuple(patterns)
+        self.sample = sample
+        self.memory = memory
+        self.top = top
+        # Profile, start time and traced memory at the start of every profiled task.
+        self._active: dict[str, tuple[cProfile.Profile, float, int]] = {}
+
+    def is_selected(self, name: str) -> bool:
+        if not any(fnmatchcase(name, pattern) for pattern in self.patterns):
+            return False
+        return self.sample >= 1 or random.random() < self.sample
+
+    def start(self, task_id: str | None = None, task: Any = None, **kwargs: Any) -> None:
+        if task_id is None or task is None or not self.is_selected(task.name):
+            return
+        memory = 0
+        if self.memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            elif hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            else:
+                # Python 3.8 resets the peak only with the traces.
+                tracemalloc.stop()
+                tracemalloc.start()
+            memory = tracemalloc.get_traced_memory()[0]
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another task of the threads pool is being profiled.
+            return
+        self._active[task_id] = (profile, time.perf_counter(), memory)
+
+    def stop(self, task_id: str | None = None, task: Any = None, **kwargs: Any) -> None:
+        active = self._active.pop(task_id or '', None)
+        if active is None:
+            return
+        profile, started, memory = active
+        profile.disable()
+        duration = time.perf_counter() - started
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{task.name}-{task_id}.pstats')
+        profile.dump_stats(path)
+
+        header = f'{task.name}[{task_id}] {duration * 1000:.1f} ms'
+        if self.memory:
+            _, peak = tracemalloc.get_traced_memory()
+            header += f', peak memory {(peak - memory) / 2**20:.1f} MiB'
+        lines = [
+            f'{header}, profile: {path}',
+            f'{"own ms":>9} {"cum ms":>9} {"calls":>8}  function',
+            *hot_functions(pstats.Stats(profile), self.top),
+        ]
+        logger.warning('\n'.join(lines))
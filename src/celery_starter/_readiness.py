@@ -0,0 +1,123 @@
+"""
+Readiness probes of the celery processes.
+
+A process is ready when its probe passes: the worker has printed that it is
+ready (or answers the ping when its log level hides that line), beat has written
+its pidfile and printed that it is starting (or has made the first tick of its
+scheduler when its log level hides that line), flower accepts connections on its
+port. The output of the processes is read through the log multiplexer, the last
+lines of every process are kept for the report of a process that has exited or
+has not become ready in time.
+"""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+from . import _localization as L  # noqa: N812
+from ._timings import READY_PATTERNS, process_kind
+
+if TYPE_CHECKING:
+    from collections.abc import Callable, Iterable
+
+LAST_LINES = 20
+POLL_INTERVAL = 0.2
+DEFAULT_FLOWER_PORT = 5555
+# Log levels which hide the ready lines of the worker and beat.
+QUIET_LEVELS = ('WARNING', 'ERROR', 'CRITICAL', 'FATAL')
+
+
+def flag_value(cmd: Iterable[str], flags: Iterable[str], default: str | None = None) -> str | None:
+    """
+    Returns the value of the flag passed in any form in the command line.
+    """
+    flags = tuple(flags)
+    args = iter(cmd)
+    for arg in args:
+        if arg in flags:
+            return next(args, default)
+        for flag in flags:
+            if flag.startswith('--') and arg.startswith(flag + '='):
+                return arg.split('=', 1)[1]
+    return default
+
+
+def is_quiet(cmd: Iterable[str]) -> bool:
+    """
+    Checks that the log level of the process hides its ready line.
+    """
+    level = flag_value(cmd, ('-l', '--loglevel'), '')
+    return bool(level) and level.upper() in QUIET_LEVELS
+
+
+def port_open(host: str, port: int, timeout: float = 0.5) -> bool:
+    try:
+        with socket.create_connection((host, port), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class Readiness:
+    """
+    Watches the output of the processes for their ready lines.
+    """
+
+    def __init__(self, last_lines: int = LAST_LINES) -> None:
+        self.last_lines = last_lines
+        self._lines: dict[str, deque[str]] = {}
+        self._ready: dict[str, threading.Event] = {}
+
+    def reset(self, name: str) -> None:
+        """
+        Forgets the output of the previous process with the given name.
+        """
+        self._lines[name] = deque(maxlen=self.last_lines)
+        self._ready[name] = threading.Event()
+
+    def on_line(self, name: str, line: str) -> None:
+        """
+        Log listener which keeps the last lines and notices the ready line.
+        """
+        lines = self._lines.get(name)
+        if lines is None:
+            return
+        lines.append(line)
+        pattern = READY_PATTERNS.get(process_kind(name))
+        if pattern is not None and pattern.search(line):
+            self._ready[name].set()
+
+    def saw_ready_line(self, name: str) -> bool:
+        ready = self._ready.get(name)
+        return ready is not None and ready.is_set()
+
+    def tail(self, name: str) -> list[str]:
+        return list(self._lines.get(name, ()))
+
+
+def wait_ready(
+    process: Any,
+    probe: Callable[[], bool],
+    deadline: float,
+    cancelled: Callable[[], bool] = lambda: False,
+) -> str | None:
+    """
+    Waits until the probe passes. Returns None if the process is ready,
+    otherwise the reason why it is not: it has exited, the deadline has passed
+    or the wait was cancelled.
+    """
+    while True:
+        code = process.poll()
+        if code is not None:
+            return L.exited_reason % code
+        if probe():
+            return None
+        if cancelled():
+            return L.cancelled_reason
+        if time.monotonic() >= deadline:
+            return L.timeout_reason
+        time.sleep(POLL_INTERVAL)
@@ -0,0 +1,234 @@
+"""
+Recording of the real task traffic (``runcelery --record``) and its replay (``--replay``).
+
+The workers started with ``--record`` append every received task to the file as
+a JSON line: the moment, the name, the arguments and the queue. The replay starts
+a fresh worker of the worker command on a private queue, like ``--bench``, sends
+the recorded tasks at the recorded rate multiplied by ``speed`` (0 - all at once)
+and reports the throughput, the latency percentiles and the failures of every task.
+The report is compared with the saved baseline, so a change which slows the hot
+tasks fails the command before it reaches production.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from typing import TYPE_CHECKING, Any, NamedTuple
+
+from celery.utils.log import get_logger
+from kombu.utils.json import dumps, loads
+
+from ._timings import percentile
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+logger = get_logger(__name__)
+
+ALL = '<all>'
+TOLERANCE = 0.2
+# The smaller changes of the latency are noise.
+MIN_DELTA = 0.005  # seconds
+
+
+class Record(NamedTuple):
+    moment: float
+    task: str
+    args: list[Any]
+    kwargs: dict[str, Any]
+
+
+class TaskReport(NamedTuple):
+    task: str
+    sent: int
+    failed: int  # failed or not finished
+    throughput: float  # tasks per second
+    p50: float  # seconds
+    p99: float
+
+
+class Regression(NamedTuple):
+    task: str
+    metric: str
+    baseline: float
+    value: float
+
+
+class TrafficRecorder:
+    """
+    Appends the tasks received by the worker to the file, every record with one write,
+    so the workers can share the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def received(self, request: Any = None, **kwargs: Any) -> None:
+        if request is None:
+            return
+        try:
+            line = dumps(
+                {
+                    'moment': time.time(),
+                    'task': request.name,
+                    'args': list(request.args),
+                    'kwargs': dict(request.kwargs),
+                    'queue': (request.delivery_info or {}).get('routing_key'),
+                }
+            )
+        except Exception as exc:
+            logger.warning('The task %s is not recorded: %r', request.name, exc)
+            return
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            os.write(fd, (line + '\n').encode())
+        finally:
+            os.close(fd)
+
+
+def read_records(path: str) -> list[Record]:
+    """
+    Returns the recorded tasks in the order they were received, the broken lines are skipped.
+    """
+    records = []
+    with open(path) as file:
+        for line in file:
+            try:
+                item = loads(line)
+                records.append(Record(float(item['moment']), item['task'], item['args'], item['kwargs']))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return sorted(records, key=lambda record: record.moment)
+
+
+def summarize(
+    names: dict[str, str],
+    enqueued: dict[str, float],
+    finished: dict[str, float],
+    failed: set[str],
+) -> list[TaskReport]:
+    """
+    Returns the report of all tasks and of every task name,
+    ``names`` are the names of the sent tasks by id.
+    """
+    groups: dict[str, list[str]] = {}
+    for task_id, name in names.items():
+        groups.setdefault(name, []).append(task_id)
+    reports = []
+    for task, ids in [(ALL, list(names)), *sorted(groups.items())]:
+        done = [task_id for task_id in ids if task_id in finished]
+        latencies = [finished[task_id] - enqueued[task_id] for task_id in done]
+        elapsed = max(finished[i] for i in done) - min(enqueued[i] for i in ids) if done else 0.0
+        reports.append(
+            TaskReport(
+                task,
+                len(ids),
+                len(ids) - len(done) + sum(task_id in failed for task_id in done),
+                len(done) / elapsed if elapsed > 0 else 0.0,
+                percentile(latencies, 50) if latencies else 0.0,
+                percentile(latencies, 99) if latencies else 0.0,
+            )
+        )
+    return reports
+
+
+def replay(
+    worker_cmd: list[str],
+    records: list[Record],
+    speed: float = 1.0,
+    cwd: str | None = None,
+    broker: str | None = None,
+    sleep: Callable[[float], None] = time.sleep,
+) -> tuple[list[TaskReport], str]:
+    """
+    Sends the recorded tasks to a fresh worker and returns the reports and the error.
+    """
+    # Not imported by the recording workers, it registers the synthetic tasks of the benchmark.
+    from . import _bench
+
+    names: dict[str, str] = {}
+    enqueued: dict[str, float] = {}
+    broker = broker or _bench.LOCAL
+    with _bench.started_worker(worker_cmd, cwd=cwd, broker=broker) as (producer, directory, worker):
+        error = _bench.wait_worker_ready(worker, directory)
+        if not error:
+            started = time.monotonic()
+            with producer.connection_for_write() as connection:
+                for record in records:
+                    if speed > 0:
+                        due = (record.moment - records[0].moment) / speed
+                        delay = due - (time.monotonic() - started)
+                        if delay > 0:
+                            sleep(delay)
+                    moment = time.time()
+                    result = producer.send_task(
+                        record.task,
+                        record.args,
+                        record.kwargs,
+                        queue=_bench.BENCH_QUEUE,
+                        connection=connection,
+                    )
+                    names[result.id] = record.task
+                    enqueued[result.id] = moment
+            error = _bench.wait_finished(worker, directory, len(records))
+        reports = summarize(
+            names, enqueued, _bench.read_finished(directory), _bench.read_failed(directory)
+        )
+    return reports, error
+
+
+def format_reports(reports: list[TaskReport]) -> list[str]:
+    header = ('task', 'sent', 'failed', 'tasks/s', 'p50 ms', 'p99 ms')
+    rows = [
+        (
+            report.task,
+            str(report.sent),
+            str(report.failed),
+            f'{report.throughput:.1f}',
+            f'{report.p50 * 1000:.1f}',
+            f'{report.p99 * 1000:.1f}',
+        )
+        for report in reports
+    ]
+    widths = [max(len(row[i]) for row in (header, *rows)) for i in range(len(header))]
+    return [
+        '  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()  # noqa: B905
+        for row in (header, *rows)
+    ]
+
+
+def save_baseline(path: str, reports: list[TaskReport]) -> None:
+    with open(path, 'w') as file:
+        json.dump({report.task: report._asdict() for report in reports}, file, indent=2)
+
+
+def load_baseline(path: str) -> dict[str, dict[str, Any]]:
+    with open(path) as file:
+        return dict(json.load(file))
+
+
+def compare(
+    reports: list[TaskReport], baseline: dict[str, dict[str, Any]], tolerance: float = TOLERANCE
+) -> list[Regression]:
+    """
+    Returns the latencies and the throughput worse than in the baseline by more than the tolerance
+    and the failures which were not in the baseline. The tasks missing in the baseline are skipped.
+    """
+    regressions = []
+    for report in reports:
+        old = baseline.get(report.task)
+        if old is None:
+            continue
+        for metric in ('p50', 'p99'):
+            value, base = getattr(report, metric), old[metric]
+            if value - base > max(base * tolerance, MIN_DELTA):
+                regressions.append(Regression(report.task, metric, base, value))
+        if report.task == ALL and report.throughput < old['throughput'] * (1 - tolerance):
+            regressions.append(
+                Regression(report.task, 'throughput', old['throughput'], report.throughput)
+            )
+        if report.failed > old['failed']:
+            regressions.append(Regression(report.task, 'failed', old['failed'], report.failed))
+    return regressions
@@ -0,0 +1,180 @@
+"""
+Resource usage of the celery processes and their children.
+
+RSS, CPU and open file descriptors are read from ``/proc`` on Linux or with
+psutil, if it is installed. The usage of a process includes its descendants,
+for example the children of the prefork pool.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import time
+from typing import NamedTuple
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover
+    psutil = None
+
+PROC = '/proc'
+
+
+class Usage(NamedTuple):
+    rss: int  # bytes
+    cpu: float  # percent of one CPU since the previous sample
+    fds: int
+    processes: int
+
+    def __str__(self) -> str:
+        return f'{self.rss / 2**20:.0f} MiB, {self.cpu:.0f}% CPU, {self.fds} fd'
+
+
+def is_supported() -> bool:
+    return psutil is not None or (sys.platform.startswith('linux') and os.path.isdir(PROC))
+
+
+def _read_stat(pid: int) -> tuple[int, float, int] | None:
+    """
+    Returns the parent pid, the CPU time in seconds and the RSS in bytes of the process.
+    """
+    try:
+        with open(f'{PROC}/{pid}/stat', 'rb') as file:
+            data = file.read()
+    except OSError:
+        return None
+    # The command name may contain spaces and parentheses.
+    fields = data[data.rfind(b')') + 2 :].split()
+    ticks = os.sysconf('SC_CLK_TCK')
+    cpu_time = (int(fields[11]) + int(fields[12])) / ticks
+    return int(fields[1]), cpu_time, int(fields[21]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def has_start_time() -> bool:
+    """
+    Checks that the start time of the processes is available: /proc or psutil.
+    """
+    return os.path.isdir(PROC) or psutil is not None
+
+
+def is_running(pid: int) -> bool:
+    """
+    Checks by the pid alone that the process exists, where its start time is not available.
+    On Windows the terminated process is already gone and the signal 0 is not a check.
+    """
+    if sys.platform == 'win32':
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+def start_time(pid: int) -> float | None:
+    """
+    Returns the start time of the process which tells it from another one with the reused pid
+    (the units depend on the platform), None if there is no such process or it is unknown.
+    """
+    try:
+        with open(f'{PROC}/{pid}/stat', 'rb') as file:
+            data = file.read()
+    except FileNotFoundError:
+        if os.path.isdir(PROC):
+            return None
+    except OSError:
+        return None
+    else:
+        return float(data[data.rfind(b')') + 2 :].split()[19])
+    if psutil is None:
+        return None
+    try:
+        return float(psutil.Process(pid).create_time())
+    except psutil.Error:
+        return None
+
+
+def _count_fds(pid: int) -> int:
+    try:
+        return len(os.listdir(f'{PROC}/{pid}/fd'))
+    except OSError:
+        return 0
+
+
+def _proc_tree_usage(pids: dict[str, int]) -> dict[str, tuple[int, float, int, int]]:
+    stats = {}
+    for entry in os.listdir(PROC):
+        if entry.isdigit():
+            stat = _read_stat(int(entry))
+            if stat is not None:
+                stats[int(entry)] = stat
+    children: dict[int, list[int]] = {}
+    for pid, (ppid, _, _) in stats.items():
+        children.setdefault(ppid, []).append(pid)
+
+    result = {}
+    for name, root in pids.items():
+        if root not in stats:
+            continue
+        rss = fds = count = 0
+        cpu_time = 0.0
+        stack = [root]
+        while stack:
+            pid = stack.pop()
+            _, pid_cpu_time, pid_rss = stats[pid]
+            rss += pid_rss
+            cpu_time += pid_cpu_time
+            fds += _count_fds(pid)
+            count += 1
+            stack.extend(children.get(pid, ()))
+        result[name] = (rss, cpu_time, fds, count)
+    return result
+
+
+def _psutil_tree_usage(pids: dict[str, int]) -> dict[str, tuple[int, float, int, int]]:
+    result = {}
+    for name, root in pids.items():
+        try:
+            parent = psutil.Process(root)
+            processes = [parent, *parent.children(recursive=True)]
+        except psutil.Error:
+            continue
+        rss = fds = 0
+        cpu_time = 0.0
+        for process in processes:
+            try:
+                with process.oneshot():
+                    rss += process.memory_info().rss
+                    times = process.cpu_times()
+                    cpu_time += times.user + times.system
+                    fds += process.num_fds() if hasattr(process, 'num_fds') else process.num_handles()
+            except psutil.Error:
+                pass
+        result[name] = (rss, cpu_time, fds, len(processes))
+    return result
+
+
+class ResourceMonitor:
+    """
+    Samples the usage of the processes by name, the CPU usage is computed between the samples.
+    """
+
+    def __init__(self) -> None:
+        self._previous: dict[str, tuple[int, float, float]] = {}  # pid, cpu time, wall time
+
+    def sample(self, pids: dict[str, int]) -> dict[str, Usage]:
+        usages = _psutil_tree_usage(pids) if psutil is not None else _proc_tree_usage(pids)
+
+        now = time.monotonic()
+        result = {}
+        for name, (rss, cpu_time, fds, count) in usages.items():
+            cpu = 0.0
+            previous = self._previous.get(name)
+            if previous is not None and previous[0] == pids[name] and now > previous[2]:
+                cpu = max(cpu_time - previous[1], 0.0) / (now - previous[2]) * 100
+            self._previous[name] = (pids[name], cpu_time, now)
+            result[name] = Usage(rss, cpu, fds, count)
+        return result
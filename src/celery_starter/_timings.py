@@ -0,0 +1,173 @@
+"""
+Timings of the process restarts: from the file change to the ready process.
+
+Every restart of a process records the moments of its phases: the file change
+is detected, the old process is stopped, the new one is spawned, has imported
+the celery app and is ready. The import and ready moments are taken from the
+log lines of the process. A summary line is reported after every restart and
+rolling p50/p95 of the whole restart time are kept for the session.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+PHASES = ('detected', 'stopped', 'spawned', 'imported', 'ready')
+
+# Log lines which mark the phases, by process kind.
+IMPORTED_PATTERNS = {
+    'worker': re.compile(r'\.> app:\s'),
+    'beat': re.compile(r'celery beat v\S+ .*is starting'),
+}
+READY_PATTERNS = {
+    'worker': re.compile(r'\S+@\S+ ready\.'),
+    'beat': re.compile(r'beat: Starting\.\.\.'),
+    'flower': re.compile(r'Visit me at http'),
+}
+
+
+def percentile(values: list[float], percent: float) -> float:
+    """
+    Nearest-rank percentile.
+    """
+    ordered = sorted(values)
+    index = max(0, math.ceil(percent / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+def process_kind(name: str) -> str:
+    return name.split('-', 1)[0]
+
+
+class RestartTimings:
+    """
+    Collects the timings of the restarts of every process.
+    """
+
+    def __init__(
+        self,
+        report: Callable[[str], None],
+        window: int = 100,
+        json_path: str | None = None,
+    ) -> None:
+        self.report = report
+        self.json_path = json_path
+        self.durations: dict[str, deque[float]] = {}
+        self.history: deque[dict[str, Any]] = deque(maxlen=window)
+        self.window = window
+        self.listeners: list[Callable[[dict[str, Any]], None]] = []
+        self._current: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener: Callable[[dict[str, Any]], None]) -> None:
+        """
+        Adds a callback called with the record of every finished restart.
+        """
+        self.listeners.append(listener)
+
+    def begin(self, name: str, detected: float | None = None, changed_files: int = 0) -> None:
+        """
+        Starts timing the restart of the process, ``detected`` is the time.monotonic()
+        of the file change which caused it.
+        """
+        with self._lock:
+            self._current[name] = {
+                'process': name,
+                'changed_files': changed_files,
+                'started_at': time.time(),
+                'marks': {'detected': time.monotonic() if detected is None else detected},
+            }
+
+    def mark(self, name: str, phase: str) -> None:
+        """
+        Records the moment of the phase, the first one wins.
+        """
+        finished = None
+        with self._lock:
+            current = self._current.get(name)
+            if current is None or phase in current['marks']:
+                return
+            current['marks'][phase] = time.monotonic()
+            if phase == 'ready':
+                finished = self._current.pop(name)
+                self._finish(finished)
+        if finished is not None:
+            self.report(self.summary(finished))
+            for listener in self.listeners:
+                listener(finished)
+            if self.json_path:
+                self.dump(self.json_path)
+
+    def on_line(self, name: str, line: str) -> None:
+        """
+        Log listener which marks the import and ready phases.
+        """
+        if name not in self._current:
+            return
+        kind = process_kind(name)
+        imported = IMPORTED_PATTERNS.get(kind)
+        if imported is not None and imported.search(line):
+            self.mark(name, 'imported')
+        ready = READY_PATTERNS.get(kind)
+        if ready is not None and ready.search(line):
+            self.mark(name, 'ready')
+
+    def _finish(self, record: dict[str, Any]) -> None:
+        marks = record.pop('marks')
+        detected = marks['detected']
+        record['phases'] = {
+            phase: round(marks[phase] - detected, 4) for phase in PHASES if phase in marks
+        }
+        record['duration'] = record['phases']['ready']
+        self.durations.setdefault(record['process'], deque(maxlen=self.window)).append(
+            record['duration']
+        )
+        self.history.append(record)
+
+    def stats(self, name: str) -> dict[str, float]:
+        durations = list(self.durations.get(name, ()))
+        if not durations:
+            return {}
+        return {
+            'count': len(durations),
+            'p50': percentile(durations, 50),
+            'p95': percentile(durations, 95),
+        }
+
+    def summary(self, record: dict[str, Any]) -> str:
+        phases = ', '.join(
+            f'{phase} +{offset:.2f}s'
+            for phase, offset in record['phases'].items()
+            if phase not in ('detected', 'ready')
+        )
+        stats = self.stats(record['process'])
+        return (
+            f'{record["process"]} ready in {record["duration"]:.2f}s ({phases}) | '
+            f'p50 {stats["p50"]:.2f}s p95 {stats["p95"]:.2f}s n={stats["count"]}'
+        )
+
+    def dump(self, path: str) -> None:
+        """
+        Writes the timings as JSON, the file is replaced atomically.
+        """
+        with self._lock:
+            data = {
+                'restarts': list(self.history),
+                'stats': {name: self.stats(name) for name in self.durations},
+            }
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(data, file, indent=2)
+        os.replace(tmp_path, path)
@@ -0,0 +1,164 @@
+"""
+Timeline of the tasks in the Chrome trace format (``runcelery --trace``).
+
+Built from the task events of the workers, consumed as for ``runcelery --events``:
+every run of a task is a slice from ``task-started`` to its end on a track of its
+worker. The events do not tell the pool process or thread which ran the task, so
+the runs of a worker are laid out on the lowest free slots: the number of the
+busy slots is the number of the tasks running at once. A counter track of every
+worker shows the received tasks waiting in the worker and the running ones.
+The file is opened in https://ui.perfetto.dev or chrome://tracing. The memory is
+bounded, only the latest ``max_runs`` runs are kept.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any
+
+from ._events import MAX_PENDING, OTHER
+
+MAX_RUNS = 100000
+END_EVENTS = ('task-succeeded', 'task-failed', 'task-rejected', 'task-revoked')
+
+
+class TraceRecorder:
+    """
+    Collects the runs of the tasks, ``on_event`` is a listener of the event monitor.
+    """
+
+    def __init__(self, max_runs: int = MAX_RUNS) -> None:
+        self.runs: deque[dict[str, Any]] = deque(maxlen=max_runs)
+        self.counters: deque[dict[str, Any]] = deque(maxlen=max_runs)
+        self.changed = False
+        # uuid -> task name, moment the task was received by the worker.
+        self._received: OrderedDict[str, tuple[str, float]] = OrderedDict()
+        # uuid -> task name, worker, moment it started, slot, moment it was received.
+        self._running: OrderedDict[str, tuple[str, str, float, int, float | None]] = OrderedDict()
+        self._workers: dict[str, int] = {}
+        self._busy_slots: dict[str, set[int]] = {}
+        self._slots: dict[str, int] = {}
+        self._queued: dict[str, int] = {}
+        self._active: dict[str, int] = {}
+        # The events are consumed in a thread and the trace is written in another.
+        self._lock = threading.Lock()
+
+    def _worker_id(self, worker: str) -> int:
+        if worker not in self._workers:
+            self._workers[worker] = len(self._workers) + 1
+            self._busy_slots[worker] = set()
+            self._slots[worker] = 0
+            self._queued[worker] = self._active[worker] = 0
+        return self._workers[worker]
+
+    def _count(self, worker: str, moment: float, queued: int = 0, active: int = 0) -> None:
+        self._queued[worker] = max(self._queued[worker] + queued, 0)
+        self._active[worker] = max(self._active[worker] + active, 0)
+        self.counters.append(
+            {
+                'name': 'tasks',
+                'ph': 'C',
+                'ts': moment * 1e6,
+                'pid': self._workers[worker],
+                'args': {'queued': self._queued[worker], 'running': self._active[worker]},
+            }
+        )
+
+    def _take_slot(self, worker: str) -> int:
+        busy = self._busy_slots[worker]
+        slot = next(slot for slot in range(len(busy) + 1) if slot not in busy)
+        busy.add(slot)
+        self._slots[worker] = max(self._slots[worker], slot + 1)
+        return slot
+
+    def on_event(self, event: dict[str, Any]) -> None:
+        kind = event.get('type', '')
+        uuid = event.get('uuid')
+        if not kind.startswith('task-') or not uuid:
+            return
+        moment = event.get('timestamp') or time.time()
+        worker = event.get('hostname') or OTHER
+
+        with self._lock:
+            self._worker_id(worker)
+            if kind == 'task-received':
+                self._received[uuid] = (event.get('name') or OTHER, moment)
+                if len(self._received) > MAX_PENDING:
+                    self._received.popitem(last=False)
+                self._count(worker, moment, queued=1)
+
+            elif kind == 'task-started':
+                received = self._received.pop(uuid, None)
+                name, received_at = received if received else (OTHER, None)
+                self._running[uuid] = (name, worker, moment, self._take_slot(worker), received_at)
+                if len(self._running) > MAX_PENDING:
+                    _, (_, lost_worker, _, slot, _) = self._running.popitem(last=False)
+                    self._busy_slots[lost_worker].discard(slot)
+                self._count(worker, moment, queued=-1 if received else 0, active=1)
+
+            elif kind in END_EVENTS:
+                running = self._running.pop(uuid, None)
+                if running is None:
+                    # Revoked or rejected before it has started.
+                    if self._received.pop(uuid, None):
+                        self._count(worker, moment, queued=-1)
+                    return
+                name, worker, started_at, slot, received_at = running
+                self._busy_slots[worker].discard(slot)
+                self._count(worker, moment, active=-1)
+                args: dict[str, Any] = {'uuid': uuid}
+                if received_at is not None:
+                    args['queued_ms'] = round((started_at - received_at) * 1000, 3)
+                self.runs.append(
+                    {
+                        'name': name,
+                        'cat': kind[len('task-') :],
+                        'ph': 'X',
+                        'ts': started_at * 1e6,
+                        'dur': max(moment - started_at, 0) * 1e6,
+                        'pid': self._workers[worker],
+                        'tid': slot + 1,
+                        'args': args,
+                    }
+                )
+                self.changed = True
+
+    def trace(self) -> dict[str, Any]:
+        with self._lock:
+            metadata = []
+            for worker, pid in self._workers.items():
+                metadata.append(
+                    {'name': 'process_name', 'ph': 'M', 'pid': pid, 'args': {'name': worker}}
+                )
+                metadata.extend(
+                    {
+                        'name': 'thread_name',
+                        'ph': 'M',
+                        'pid': pid,
+                        'tid': slot + 1,
+                        'args': {'name': f'slot {slot}'},
+                    }
+                    for slot in range(self._slots[worker])
+                )
+            return {
+                'traceEvents': [*metadata, *self.counters, *self.runs],
+                'displayTimeUnit': 'ms',
+            }
+
+    def write(self, path: str) -> None:
+        """
+        Writes the trace to the file atomically, so a viewer never opens a partial one.
+        """
+        self.changed = False
+        trace = self.trace()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(trace, file)
+        os.replace(tmp_path, path)
@@ -0,0 +1,342 @@
+"""
+Pre-forked parent process ("zygote") for celery processes.
+
+The zygote imports Django and the Celery app once and then forks a fresh
+``celery`` process from itself on every request, so a restart only has to import
+the modules that are not loaded in the zygote yet (usually the task modules).
+POSIX only, since it relies on ``os.fork``.
+
+Runs as ``python -m celery_starter._zygote <fd> <celery_app> <base_dir>``,
+where ``fd`` is one end of a unix socket pair shared with the supervisor.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import select
+import signal
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from multiprocessing.reduction import recvfds, sendfds
+from typing import TYPE_CHECKING, Any
+
+from . import _bootstrap
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable, Sequence
+
+_HEADER = struct.Struct('!I')
+
+
+def _send_msg(sock: socket.socket, msg: dict[str, Any]) -> None:
+    data = json.dumps(msg).encode()
+    sock.sendall(_HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock: socket.socket, size: int) -> bytes:
+    chunks = []
+    while size:
+        chunk = sock.recv(size)
+        if not chunk:
+            raise EOFError
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _recv_msg(sock: socket.socket) -> dict[str, Any]:
+    (size,) = _HEADER.unpack(_recv_exactly(sock, _HEADER.size))
+    return json.loads(_recv_exactly(sock, size))
+
+
+def _exit_code(status: int) -> int:
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def is_supported() -> bool:
+    return hasattr(os, 'fork')
+
+
+def _open_pidfd(pid: int) -> int | None:
+    # Linux 5.3+ and Python 3.9+.
+    pidfd_open = getattr(os, 'pidfd_open', None)
+    if pidfd_open is None:
+        return None
+    try:
+        return pidfd_open(pid)
+    except OSError:
+        return None
+
+
+class ZygoteProcess:
+    """
+    Popen-like handle of the process forked by the zygote.
+    The process is a child of the zygote, so its status is requested from it.
+    The processes outlive the zygote which has forked them, the zygote started
+    after it does not know them, so then only their exit is detected.
+    """
+
+    def __init__(self, zygote: Zygote, pid: int, args: Sequence[str]) -> None:
+        self.zygote = zygote
+        self.pid = pid
+        self.args = args
+        self.returncode: int | None = None
+        # Refers to this process even if its pid is reused after the exit.
+        self._pidfd = _open_pidfd(pid)
+
+    def poll(self) -> int | None:
+        if self.returncode is None:
+            try:
+                self.returncode = self.zygote.poll(self.pid)
+            except LookupError:
+                self.returncode = self._poll_orphan()
+            if self.returncode is not None and self._pidfd is not None:
+                os.close(self._pidfd)
+                self._pidfd = None
+        return self.returncode
+
+    def _poll_orphan(self) -> int | None:
+        """
+        Polls the process left by the previous zygote. Its exit code is known only
+        to the process which has reaped it: this one if it is the init of the container.
+        """
+        try:
+            pid, status = os.waitpid(self.pid, os.WNOHANG)
+        except ChildProcessError:
+            pass
+        else:
+            return _exit_code(status) if pid else None
+        if self._pidfd is not None:
+            # The pidfd becomes readable when the process exits.
+            return -signal.SIGKILL if select.select([self._pidfd], [], [], 0)[0] else None
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return -signal.SIGKILL
+        except PermissionError:
+            pass
+        return None
+
+    def wait(self, timeout: float | None = None) -> int:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.poll() is None:
+            if deadline is not None and time.monotonic() > deadline:
+                raise subprocess.TimeoutExpired(self.args, timeout)  # type: ignore[arg-type]
+            time.sleep(0.05)
+        return self.returncode  # type: ignore[return-value]
+
+    def send_signal(self, sig: int) -> None:
+        if self.poll() is None:
+            try:
+                os.kill(self.pid, sig)
+            except ProcessLookupError:
+                pass
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+
+class Zygote:
+    """
+    Supervisor side of the zygote process.
+    """
+
+    def __init__(self, celery_app: str, base_dir: str, cwd: str | None = None) -> None:
+        self.celery_app = celery_app
+        self.base_dir = base_dir
+        self.cwd = cwd
+        self.preloaded_files: frozenset[str] = frozenset()
+        self._lock = threading.Lock()
+        self._sock: socket.socket | None = None
+        self._proc: subprocess.Popen[bytes] | None = None
+
+    def start(self) -> None:
+        """
+        Starts the zygote and waits until it has imported Django and the Celery app.
+        """
+        parent_sock, child_sock = socket.socketpair()
+        fd = child_sock.fileno()
+        self._proc = subprocess.Popen(
+            [sys.executable, '-m', 'celery_starter._zygote', str(fd), self.celery_app, self.base_dir],
+            pass_fds=(fd,),
+            cwd=self.cwd,
+        )
+        child_sock.close()
+        self._sock = parent_sock
+
+        reply = self._request({'op': 'hello'})
+        if 'error' in reply:
+            self.stop()
+            raise RuntimeError(reply['error'])
+        self.preloaded_files = frozenset(reply['files'])
+
+    def stop(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+        if self._proc is not None:
+            try:
+                self._proc.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._proc.kill()
+                self._proc.wait()
+            self._proc = None
+
+    @property
+    def pid(self) -> int | None:
+        return self._proc.pid if self._proc is not None else None
+
+    def restart(self) -> None:
+        self.stop()
+        self.start()
+
+    def is_preloaded(self, path: str) -> bool:
+        return str(path) in self.preloaded_files
+
+    def fork(
+        self,
+        argv: Sequence[str],
+        env: dict[str, str] | None = None,
+        fds: Iterable[int] = (),
+    ) -> ZygoteProcess:
+        """
+        Forks a new celery process with the given command line.
+        ``fds`` are duplicated onto stdin, stdout and stderr of the new process.
+        """
+        fds = list(fds)
+        reply = self._request({'op': 'fork', 'argv': list(argv), 'env': env or {}}, fds)
+        return ZygoteProcess(self, reply['pid'], argv)
+
+    def poll(self, pid: int) -> int | None:
+        """
+        Returns the exit code of the forked process, None while it is running.
+        Raises LookupError if the process was not forked by the running zygote.
+        """
+        try:
+            reply = self._request({'op': 'poll', 'pid': pid})
+        except (EOFError, OSError):
+            raise LookupError(pid) from None
+        if not reply['known']:
+            raise LookupError(pid)
+        return reply['returncode']
+
+    def _request(self, msg: dict[str, Any], fds: list[int] | None = None) -> dict[str, Any]:
+        with self._lock:
+            sock = self._sock
+            if sock is None:
+                raise EOFError
+            msg['nfds'] = len(fds or ())
+            _send_msg(sock, msg)
+            if fds:
+                sendfds(sock, fds)
+            return _recv_msg(sock)
+
+
+def _preload(celery_app: str, base_dir: str) -> list[str]:
+    """
+    Imports everything the celery processes need before they get to the task modules.
+    Returns the project files imported along the way.
+    """
+    if os.environ.get('DJANGO_SETTINGS_MODULE'):
+        import django
+
+        django.setup()
+
+    import celery.__main__
+    import celery.apps.beat
+    import celery.apps.worker
+    import celery.bin.celery  # noqa: F401
+    from celery.app.utils import find_app
+
+    find_app(celery_app)
+
+    return _bootstrap.imported_files(base_dir)
+
+
+def _run_child(argv: list[str], env: dict[str, str], fds: list[int]) -> None:
+    """
+    Body of the forked process, never returns.
+    """
+    code = 1
+    try:
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+        for fd in fds:
+            if fd > 2:
+                os.close(fd)
+        os.environ.update(env)
+
+        _bootstrap.main(argv[1:])
+        code = 0
+    except SystemExit as exc:
+        code = exc.code if isinstance(exc.code, int) else int(exc.code is not None)
+    except BaseException:
+        import traceback
+
+        traceback.print_exc()
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def serve(fd: int, celery_app: str, base_dir: str) -> None:
+    # Ctrl+C reaches the whole process group, the zygote is stopped by the supervisor.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    sock = socket.socket(fileno=fd)
+    children: set[int] = set()
+    statuses: dict[int, int] = {}
+
+    def reap() -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if not pid:
+                return
+            statuses[pid] = _exit_code(status)
+
+    while True:
+        try:
+            msg = _recv_msg(sock)
+        except (EOFError, ConnectionError):
+            return
+        fds = list(recvfds(sock, msg['nfds'])) if msg['nfds'] else []
+        reap()
+
+        if msg['op'] == 'hello':
+            try:
+                _send_msg(sock, {'files': _preload(celery_app, base_dir)})
+            except Exception as exc:
+                _send_msg(sock, {'error': f'{type(exc).__name__}: {exc}'})
+                return
+
+        elif msg['op'] == 'fork':
+            pid = os.fork()
+            if pid == 0:
+                sock.close()
+                _run_child(msg['argv'], msg['env'], fds)
+            children.add(pid)
+            for fd_ in fds:
+                os.close(fd_)
+            _send_msg(sock, {'pid': pid})
+
+        elif msg['op'] == 'poll':
+            _send_msg(sock, {'returncode': statuses.get(msg['pid']), 'known': msg['pid'] in children})
+
+
+if __name__ == '__main__':
+    serve(int(sys.argv[1]), sys.argv[2], sys.argv[3])
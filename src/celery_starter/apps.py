@@ -1,6 +1,26 @@
+import os
+
 from django.apps import AppConfig
+from django.conf import settings
+
+from ._bootstrap import LOCAL_BROKER_ENV
+from ._broker import configure, local_broker_dir
 
 
 class CeleryStarterConfig(AppConfig):
     name = 'celery_starter'
     verbose_name = 'Django command to launch celery worker, beat, flower'
+
+    def ready(self) -> None:
+        """
+        Points the celery app of the project to the local broker of runcelery,
+        so the tasks enqueued by runserver, shell or tests reach its worker.
+        """
+        directory = os.environ.get(LOCAL_BROKER_ENV) or local_broker_dir(
+            str(getattr(settings, 'BASE_DIR', os.getcwd())),
+            getattr(settings, 'CELERY_STARTER_LOCAL_BROKER', None),
+        )
+        if directory:
+            from celery import current_app
+
+            configure(current_app, directory)
@@ -1,27 +1,63 @@
 from __future__ import annotations
 
+import argparse
+import atexit
+import importlib.util
 import os
 import shlex
+import shutil
 import signal
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+import traceback
 from typing import TYPE_CHECKING, Any
 
 from celery.app import default_app
+from celery.app.utils import find_app
+from celery.utils.nodenames import default_nodename, host_format
 from django.conf import settings
-from django.core.management.base import BaseCommand, CommandParser
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.core.management.color import supports_color
 from django.utils import autoreload
 from dotenv import find_dotenv, load_dotenv
 
-from ... import _localization as L  # noqa: TID252, N812
+from ... import (  # noqa: TID252, N812
+    _affinity,
+    _archive,
+    _backlog,
+    _beat,
+    _bootstrap,
+    _broker,
+    _events,
+    _inotify,
+    _localization as L,
+    _logmux,
+    _metrics,
+    _pool,
+    _readiness,
+    _replay,
+    _resources,
+    _timings,
+    _trace,
+    _zygote,
+)
 
 if TYPE_CHECKING:
-    from collections.abc import Iterable
+    from collections.abc import Callable, Iterable
+    from pathlib import Path
+
+    from celery import Celery
 
 load_dotenv(find_dotenv())
 
 
 CELERY_BEAT_PID_FILENAME = 'celerybeat.pid'
+RUNCELERY_PID_FILENAME = 'runcelery.pid'
+RUNCELERY_BACKLOG_FILENAME = 'runcelery-backlog.json'
+CELERY_BEAT_SCHEDULE_FILENAME = 'celerybeat-schedule.sqlite3'
 
 
 class ConstantNotFoundError(Exception):
@@ -34,12 +70,56 @@ class ConstantNotFoundError(Exception):
         return self.msg
 
 
+class InvalidWorkerSpecError(Exception):
+    msg = L.invalid_worker_spec
+
+    def __init__(self, spec: Any) -> None:
+        self.msg = self.msg % (spec,)
+
+    def __str__(self) -> str:
+        return self.msg
+
+
+class InvalidCpuShardsError(Exception):
+    msg = L.invalid_cpu_shards
+
+    def __init__(self, spec: str) -> None:
+        self.msg = self.msg % spec
+
+    def __str__(self) -> str:
+        return self.msg
+
+
+def is_worker(name: str) -> bool:
+    return name == 'worker' or name.startswith('worker-')
+
+
+def starts_processes() -> bool:
+    """
+    Checks that this is the process run by the autoreloader, which starts the celery processes,
+    the command is run before in the process of the autoreloader itself.
+    """
+    return os.environ.get(autoreload.DJANGO_AUTORELOAD_ENV) == 'true'
+
+
+def positive_float(value: str) -> float:
+    try:
+        number = float(value)
+    except ValueError:
+        number = 0.0
+    if not number > 0:
+        raise argparse.ArgumentTypeError(L.positive_number_error % value)
+    return number
+
+
 class ConstructorCommand:
     """"""
 
     default_worker_cmd = 'celery -A %s worker -E -l INFO -P solo'
     default_beat_cmd = 'celery -A %s beat --pidfile=%s -l INFO'
     default_flower_cmd = 'celery --broker=redis://localhost:6379// flower -A %s --url_prefix=%s'
+    # The workload kind, the CPU share and the error of the sampled tasks for -P auto.
+    sampled: tuple[str | None, float, str] | None = None
 
     @property
     def __celery_app(self) -> str:
@@ -75,6 +155,13 @@ class ConstructorCommand:
             raise ConstantNotFoundError('CELERY_FLOWER_BROKER')
         return flower_broker
 
+    @property
+    def __workers(self) -> list[dict[str, Any]]:
+        workers = getattr(settings, 'CELERY_STARTER_WORKERS', None)
+        if not workers and default_app:
+            workers = default_app.conf.get('CELERY_STARTER_WORKERS', None)
+        return workers or []
+
     def get_celery_app(self, options: Any) -> str:
         celery_app = self.get_flag_value_from_cmd(options['worker'], ['-A', '--app'])
         if not celery_app:
@@ -135,8 +222,10 @@ class ConstructorCommand:
         -P --pool
         prefork  # default (windows not work, linux multiple processes)
         solo  # (windows/linux single process)
-        threads  # (windows/linux multiple threading) too slow
+        threads  # (windows/linux multiple threading)
         gevent | eventlet  # (windows/linux multiple processes)
+        auto  # chosen by resolve_auto_pool for this machine and workload
+        runcelery --bench measures which of them is the fastest for the task.
         """
         if not cmd:
             self.worker_cmd = shlex.split(self.default_worker_cmd % self.celery_app)
@@ -159,6 +248,20 @@ class ConstructorCommand:
             )
             self.beat_cmd = shlex.split(merged_cmd)
 
+    def manage_beat_schedule(self, catchup: str | None) -> None:
+        """
+        Runs beat with the scheduler of runcelery, which keeps the schedule in SQLite
+        next to the pidfile and catches up the missed runs by the policy of --beat_catchup.
+        The scheduler and the schedule file passed in the beat command are kept.
+        """
+        if not catchup or _readiness.flag_value(self.beat_cmd, ('-S', '--scheduler')) is not None:
+            return
+        self.beat_cmd = self.set_flag(self.beat_cmd, ('-S', '--scheduler'), _beat.SCHEDULER)
+        if _readiness.flag_value(self.beat_cmd, ('-s', '--schedule')) is None:
+            self.beat_cmd = self.set_flag(
+                self.beat_cmd, ('-s', '--schedule'), CELERY_BEAT_SCHEDULE_FILENAME
+            )
+
     def construct_flower_cmd(self, cmd: str) -> None:
         if not cmd:
             self.flower_cmd = shlex.split(
@@ -180,11 +283,164 @@ class ConstructorCommand:
             )
             self.flower_cmd = shlex.split(merged_cmd)
 
+    def set_flag(self, cmd: list[str], flags: tuple[str, str], value: str) -> list[str]:
+        """
+        Returns the command line with the flag (passed in any form) replaced by the passed value.
+        """
+        new_cmd = []
+        skip = False
+        for arg in cmd:
+            if skip:
+                skip = False
+            elif arg in flags:
+                skip = True
+            elif not arg.startswith(flags[1] + '='):
+                new_cmd.append(arg)
+        return [*new_cmd, flags[0], value]
+
+    def set_node_name(self, cmd: list[str], node: str) -> list[str]:
+        return self.set_flag(cmd, ('-n', '--hostname'), node)
+
+    def construct_worker_cmds(self, options: Any) -> None:
+        """
+        Builds the command line of every worker of the CELERY_STARTER_WORKERS topology
+        on top of the worker command, by process name. Every worker spec is a dict:
+        {'name': 'default', 'queues': ['celery'], 'pool': 'threads', 'concurrency': 4, 'options': ''}
+        Only the name is required, the worker gets the node name <name>@%h,
+        options extend the command line of the worker.
+        Without the topology there is one worker with the worker command.
+        """
+        specs = self.__workers
+        if not specs:
+            self.worker_cmd = self.resolve_auto_pool(self.worker_cmd, options, 'worker')
+            self.worker_cmds = {'worker': self.worker_cmd}
+        else:
+            self.worker_cmds = {}
+        for spec in specs:
+            name = spec.get('name') if isinstance(spec, dict) else None
+            if not name or f'worker-{name}' in self.worker_cmds:
+                raise InvalidWorkerSpecError(spec)
+
+            cmd = self.set_node_name(self.worker_cmd, f'{name}@%h')
+            queues = spec.get('queues')
+            if queues:
+                queues = queues if isinstance(queues, str) else ','.join(queues)
+                cmd = self.set_flag(cmd, ('-Q', '--queues'), queues)
+            if spec.get('pool'):
+                cmd = self.set_flag(cmd, ('-P', '--pool'), spec['pool'])
+            if spec.get('concurrency'):
+                cmd = self.set_flag(cmd, ('-c', '--concurrency'), str(spec['concurrency']))
+            if spec.get('options'):
+                cmd += shlex.split(spec['options'])
+
+            self.worker_cmds[f'worker-{name}'] = self.resolve_auto_pool(cmd, options, f'worker-{name}')
+        self.shard_worker_cmds(options.get('cpu_shards'))
+
+    def shard_worker_cmds(self, spec: str | None) -> None:
+        """
+        Replaces every worker by one worker per CPU set of --cpu_shards pinned to it:
+        worker-cpu<N> (worker-<name>-cpu<N> in the topology) with the node name <node>-cpu<N>@%h.
+        The concurrency defaults to the number of CPUs of the shard, except for the solo pool
+        which runs one task at a time whatever the concurrency is.
+        """
+        self.worker_cpus: dict[str, str] = {}
+        if not spec:
+            return
+        try:
+            shards = _affinity.parse_cpu_shards(spec)
+        except ValueError:
+            raise InvalidCpuShardsError(spec) from None
+        if not shards:
+            raise InvalidCpuShardsError(spec)
+
+        worker_cmds = {}
+        for name, cmd in self.worker_cmds.items():
+            node = _readiness.flag_value(cmd, ('-n', '--hostname')) or 'celery'
+            has_concurrency = _readiness.flag_value(cmd, ('-c', '--concurrency')) is not None
+            is_solo = _readiness.flag_value(cmd, ('-P', '--pool'), 'prefork') == 'solo'
+            for cpus in shards:
+                cpus_label = _affinity.format_cpus(cpus)
+                shard_cmd = self.set_node_name(cmd, f'{node.split("@")[0]}-cpu{cpus_label}@%h')
+                if not has_concurrency and not is_solo:
+                    shard_cmd = self.set_flag(shard_cmd, ('-c', '--concurrency'), str(len(cpus)))
+                worker_cmds[f'{name}-cpu{cpus_label}'] = shard_cmd
+                self.worker_cpus[f'{name}-cpu{cpus_label}'] = cpus_label
+        self.worker_cmds = worker_cmds
+        if not _affinity.is_supported():
+            self.pool_msgs.append(L.affinity_not_supported)
+
+    def resolve_auto_pool(self, cmd: list[str], options: Any, name: str) -> list[str]:
+        """
+        Replaces -P auto with the pool and the concurrency chosen
+        for the CPU and memory limits of this machine and for the sampled tasks.
+        The concurrency passed in the command line is kept.
+        The tasks are sampled once for all workers, in the worker of the pool benchmark
+        and only by the process which starts the workers.
+        """
+        new_cmd: list[str] = []
+        is_auto = has_concurrency = False
+        args = iter(cmd)
+        for arg in args:
+            if arg in ('-P', '--pool', '-c', '--concurrency'):
+                value = next(args, '')
+            elif arg.startswith(('--pool=', '--concurrency=')):
+                arg, value = arg.split('=', 1)
+            else:
+                new_cmd.append(arg)
+                continue
+            if arg in ('-P', '--pool') and value == 'auto':
+                is_auto = True
+                continue
+            has_concurrency = has_concurrency or arg in ('-c', '--concurrency')
+            new_cmd.extend((arg, value))
+
+        if not is_auto:
+            return cmd
+
+        workload = None
+        if options.get('pool_sample'):
+            app = find_app(self.celery_app)
+            unknown = [task_name for task_name in options['pool_sample'] if task_name not in app.tasks]
+            if unknown:
+                choices = sorted(
+                    task_name for task_name in app.tasks if not task_name.startswith('celery.')
+                )
+                raise CommandError(L.pool_sample_error % (', '.join(unknown), ', '.join(choices)))
+        if options.get('pool_sample') and starts_processes():
+            if self.sampled is None:
+                # Imported only here, since it registers the synthetic tasks on the app.
+                from ... import _bench  # noqa: TID252
+
+                self.sampled = _bench.sample_workload(new_cmd, options['pool_sample'])
+            workload, ratio, error = self.sampled
+            workload_msg = (
+                L.workload_msg % (workload, ratio * 100) if workload else L.workload_error_msg % error
+            )
+        pools = _pool.installed_pools()
+        if options.get('zygote'):
+            # Monkey patching of gevent/eventlet is not reliable after django is imported.
+            pools = [pool for pool in pools if pool not in ('gevent', 'eventlet')]
+
+        pool, concurrency, reason = _pool.choose_pool(workload, pools)
+        pool_msg = f'{name}: ' + L.auto_pool_msg % (pool, concurrency, reason)
+        if self.sampled is not None:
+            pool_msg += workload_msg
+        self.pool_msgs.append(pool_msg)
+
+        new_cmd.extend(('-P', pool))
+        if not has_concurrency:
+            new_cmd.extend(('-c', str(concurrency)))
+        return new_cmd
+
     def parse_options(self, options: Any) -> None:
         self.celery_app = self.get_celery_app(options)
+        self.pool_msgs: list[str] = []
+        self.sampled = None
 
         self.construct_worker_cmd(options['worker'])
+        self.construct_worker_cmds(options)
         self.construct_beat_cmd(options['beat'])
+        self.manage_beat_schedule(options.get('beat_catchup'))
         self.construct_flower_cmd(options['flower'])
 
 
@@ -200,6 +456,31 @@ class Command(BaseCommand):
     def __init__(self, *args: Any, **kwargs: Any) -> None:
         super().__init__(*args, **kwargs)
         self.constr = ConstructorCommand()
+        self.zygote: _zygote.Zygote | None = None
+        self.processes: dict[str, Any] = {}
+        # Records the started processes, so the next run stops those left running.
+        self.pid_file: str | None = None
+        self.app: Celery | None = None
+        self.generation = 0
+        self.logs: _logmux.LogMux | None = None
+        self.timings = _timings.RestartTimings(self.report_timing)
+        self.readiness = _readiness.Readiness()
+        self.held_back: set[str] = set()
+        self.imports_dir: str | None = None
+        self.nodes: dict[str, str] = {}
+        self.started_at: dict[str, float] = {}
+        self.monitor = _resources.ResourceMonitor()
+        self.usages: dict[str, _resources.Usage] = {}
+        self.events = _events.EventMonitor()
+        self.trace = _trace.TraceRecorder()
+        self.local_broker: str | None = None
+        self.metrics = _metrics.SupervisorMetrics()
+        self.metrics.add_collector(self.collect_metrics)
+        self.restart_lock = threading.RLock()
+        self.changes = threading.Condition()
+        self.changed_files: set[str] = set()
+        self.changes_detected_at = 0.0
+        self.change_events = 0
 
     def read_pid_file(self, file_name: str) -> None:
         """
@@ -207,10 +488,19 @@ class Command(BaseCommand):
         The file is created automatically by celery beat.
         """
         if file_name in os.listdir(self.BASE_DIR):
-            with open(file_name) as file:
+            with open(self.BASE_DIR + file_name) as file:
                 for line in file.readlines():
                     try:
-                        os.kill(int(line), signal.SIGTERM)
+                        pid = int(line)
+                    except ValueError:
+                        continue
+                    # The pid of a crashed beat may have been reused by another process.
+                    if not _beat.is_beat_process(pid) or (
+                        self.zygote is not None and pid == self.zygote.pid
+                    ):
+                        continue
+                    try:
+                        os.kill(pid, signal.SIGTERM)
                     except OSError:
                         pass
                     # try:
@@ -220,43 +510,961 @@ class Command(BaseCommand):
 
             os.remove(self.BASE_DIR + file_name)
 
-    def run_celery(self) -> None:
+    def save_pids(self) -> None:
         """
-        Launches celery[worker/beat/flower]
-        with logs output to one console. For local development.
+        Writes the name, the pid and the start time of every running process to the pid file,
+        '-' where the start time is not available.
         """
-        subprocess.Popen(self.constr.worker_cmd, stdin=subprocess.PIPE, stderr=subprocess.STDOUT)
-        # subprocess.run(self.constr.worker_cmd)
+        if self.pid_file is None:
+            return
+        lines = []
+        for name, process in list(self.processes.items()):
+            started = _resources.start_time(process.pid)
+            lines.append(f'{name} {process.pid} {"-" if started is None else started}\n')
+        tmp_path = self.pid_file + '.tmp'
+        with open(tmp_path, 'w') as file:
+            file.writelines(lines)
+        os.replace(tmp_path, self.pid_file)
 
-        if not self.options['exclude_beat']:
-            self.read_pid_file(CELERY_BEAT_PID_FILENAME)
-            subprocess.Popen(self.constr.beat_cmd, stdin=subprocess.PIPE, stderr=subprocess.STDOUT)
+    def stop_previous_processes(self, timeout: float = 10, debug: bool = False) -> None:
+        """
+        Stops the processes left running by the previous run of this command in the project.
+        Only the processes from its pid file are stopped, and only if their start time
+        has not changed, so the other celery processes on the host and the reused pids are not touched.
+        Without /proc and psutil the start time is not available, the processes are matched
+        by the pid alone with a warning. With ``debug`` the outcome for every process is printed.
+        """
+        if self.pid_file is None:
+            return
+        try:
+            with open(self.pid_file) as file:
+                lines = file.readlines()
+        except OSError:
+            return
+        exact = _resources.has_start_time()
+
+        def is_left(pid: int, started: float | None) -> bool:
+            if exact:
+                return started is not None and _resources.start_time(pid) == started
+            return _resources.is_running(pid)
+
+        previous: dict[str, tuple[int, float | None]] = {}
+        for line in lines:
+            try:
+                name, pid_value, started_value = line.split()
+                pid = int(pid_value)
+                started = None if started_value == '-' else float(started_value)
+            except ValueError:
+                continue
+            previous[name] = (pid, started)
+        if previous and not exact:
+            self.stderr.write(L.stop_previous_pid_only_msg)
+
+        left = {}
+        for name, (pid, started) in previous.items():
+            if not is_left(pid, started):
+                if debug:
+                    self.stdout.write(L.stop_previous_debug_msg % (name, pid, L.not_running_outcome))
+                continue
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                continue
+            left[name] = (pid, started)
+        if left:
+            self.stdout.write(self.style.WARNING(L.stop_previous_msg % ', '.join(left)))
+        stopping = dict(left)
+        deadline = time.monotonic() + timeout
+        while left and time.monotonic() < deadline:
+            time.sleep(0.1)
+            left = {
+                name: (pid, started) for name, (pid, started) in left.items() if is_left(pid, started)
+            }
+        for name, (pid, _) in stopping.items():
+            if name in left:
+                try:
+                    os.kill(pid, getattr(signal, 'SIGKILL', signal.SIGTERM))
+                except OSError:
+                    pass
+            if debug:
+                outcome = L.killed_outcome if name in left else L.stopped_outcome
+                self.stdout.write(L.stop_previous_debug_msg % (name, pid, outcome))
+        os.remove(self.pid_file)
 
+    def get_process_cmds(self) -> dict[str, list[str]]:
+        """
+        Returns the command lines of the processes to be launched, by process name.
+        """
+        cmds = dict(self.constr.worker_cmds)
+        if not self.options['exclude_beat']:
+            cmds['beat'] = self.constr.beat_cmd
         if not self.options['exclude_flower']:
-            subprocess.Popen(
-                self.constr.flower_cmd,
-                stdin=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
+            cmds['flower'] = self.constr.flower_cmd
+        return cmds
+
+    def imports_file(self, name: str) -> str | None:
+        if self.imports_dir is None:
+            return None
+        return os.path.join(self.imports_dir, f'{name}.json')
+
+    def beat_ready_file(self) -> str | None:
+        """
+        Returns the file created by beat after its first tick, if its log level hides its ready line.
+        """
+        if self.imports_dir is None or not _readiness.is_quiet(self.cmds['beat']):
+            return None
+        return os.path.join(self.imports_dir, 'beat.ready')
+
+    def bootstrap_env(self, name: str) -> dict[str, str]:
+        """
+        Returns the environment variables which configure the hooks of the bootstrap wrapper.
+        """
+        env: dict[str, str] = {}
+        if self.local_broker is not None and name != 'flower':
+            env[_bootstrap.LOCAL_BROKER_ENV] = self.local_broker
+        if name == 'beat' and self.options['beat_catchup']:
+            env[_bootstrap.BEAT_CATCHUP_ENV] = self.options['beat_catchup']
+            env[_bootstrap.BEAT_CATCHUP_WINDOW_ENV] = str(self.options['beat_catchup_window'])
+        if name == 'beat':
+            ready_file = self.beat_ready_file()
+            if ready_file is not None:
+                # The file of the previous beat does not tell that the new one is ready.
+                if os.path.exists(ready_file):
+                    os.remove(ready_file)
+                env[_bootstrap.BEAT_READY_FILE_ENV] = ready_file
+        if not is_worker(name):
+            return env
+        imports_file = self.imports_file(name)
+        if imports_file is not None:
+            # The files imported by the previous process are not known to be imported by the new one.
+            if os.path.exists(imports_file):
+                os.remove(imports_file)
+            env[_bootstrap.IMPORTS_FILE_ENV] = imports_file
+            env[_bootstrap.BASE_DIR_ENV] = self.BASE_DIR
+            if self.options['hot_reload']:
+                env[_bootstrap.HOT_RELOAD_ENV] = '1'
+        if name in self.constr.worker_cpus:
+            env[_bootstrap.CPUS_ENV] = self.constr.worker_cpus[name]
+        if self.options['profile_tasks']:
+            env[_bootstrap.PROFILE_DIR_ENV] = self.profile_dir()
+            env[_bootstrap.PROFILE_TASKS_ENV] = self.options['profile_tasks']
+            env[_bootstrap.PROFILE_SAMPLE_ENV] = str(self.options['profile_sample'])
+            if self.options['profile_memory']:
+                env[_bootstrap.PROFILE_MEMORY_ENV] = '1'
+        if self.options['record']:
+            env[_bootstrap.RECORD_FILE_ENV] = os.path.abspath(self.options['record'])
+        return env
+
+    def profile_dir(self) -> str:
+        return self.options['profile_dir'] or os.path.join(tempfile.gettempdir(), 'runcelery-profiles')
+
+    def spawn(self, name: str, cmd: list[str]) -> Any:
+        """
+        Starts the celery process, forks it from the zygote if there is one.
+        Flower does not run the project code, so it is never forked.
+        The worker is run by the bootstrap wrapper which installs the hooks of this command.
+        The output of the process is drained by the log multiplexer.
+        """
+        process: Any
+        env = self.bootstrap_env(name)
+        if self.zygote is not None and name != 'flower':
+            out_r, out_w = os.pipe()
+            err_r, err_w = os.pipe()
+            null_fd = os.open(os.devnull, os.O_RDONLY)
+            try:
+                process = self.zygote.fork(cmd, env=env, fds=(null_fd, out_w, err_w))
+            finally:
+                for fd in (null_fd, out_w, err_w):
+                    os.close(fd)
+            pipes = [os.fdopen(out_r, 'rb', buffering=0), os.fdopen(err_r, 'rb', buffering=0)]
+        else:
+            if env and cmd[0] == 'celery':
+                cmd = [sys.executable, '-m', 'celery_starter._bootstrap', *cmd[1:]]
+            process = subprocess.Popen(
+                cmd,
+                stdin=subprocess.DEVNULL,
                 stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                env=dict(os.environ, **env) if env else None,
+            )
+            pipes = [process.stdout, process.stderr]
+
+        self.readiness.reset(name)
+        for pipe in pipes:
+            self.logs.register(name, pipe)
+        return process
+
+    def start_process(self, name: str) -> None:
+        if name == 'beat':
+            self.read_pid_file(CELERY_BEAT_PID_FILENAME)
+        self.nodes.pop(name, None)
+        self.processes[name] = self.spawn(name, self.cmds[name])
+        self.save_pids()
+        self.started_at[name] = time.monotonic()
+        self.timings.mark(name, 'spawned')
+
+    def report_timing(self, msg: str) -> None:
+        self.stdout.write(self.style.HTTP_INFO(msg))
+
+    def ping_worker(self, node: str) -> bool:
+        try:
+            return bool(self.get_app().control.ping(destination=[node], timeout=1.0))
+        except Exception:
+            # The broker connection may not be available yet.
+            return False
+
+    def readiness_probe(self, name: str) -> Callable[[], bool]:
+        """
+        Returns the check of the readiness of the process:
+        the worker has printed that it is ready or, if its log level hides that line, answers the ping,
+        beat has written its pidfile and printed that it is starting or, if its log level hides
+        that line, has made the first tick of its scheduler, flower accepts connections on its port.
+        """
+        cmd = self.cmds[name]
+        if is_worker(name):
+            if _readiness.is_quiet(cmd):
+                node = host_format(default_nodename(_readiness.flag_value(cmd, ('-n', '--hostname'))))
+                return lambda: self.ping_worker(node)
+            return lambda: self.readiness.saw_ready_line(name)
+        if name == 'beat':
+            pidfile = _readiness.flag_value(cmd, ('--pidfile',))
+            # Beat resolves the relative pidfile against its working directory, the one of this process.
+            pidfile = os.path.abspath(pidfile) if pidfile else None
+            ready_file = self.beat_ready_file()
+
+            def beat_ready() -> bool:
+                started = (
+                    os.path.exists(ready_file) if ready_file else self.readiness.saw_ready_line(name)
+                )
+                return started and (not pidfile or os.path.exists(pidfile))
+
+            return beat_ready
+        host = _readiness.flag_value(cmd, ('--address',)) or 'localhost'
+        port = int(_readiness.flag_value(cmd, ('--port',)) or _readiness.DEFAULT_FLOWER_PORT)
+        return lambda: self.readiness.saw_ready_line(name) or _readiness.port_open(host, port)
+
+    def wait_ready(self, names: Iterable[str], deadline: float) -> list[str]:
+        """
+        Waits until the processes are ready, reports the processes which have exited
+        or have not become ready in time with the last lines of their output.
+        Returns the names of the processes which are not ready.
+        """
+        not_ready = []
+        for name in names:
+            reason = _readiness.wait_ready(
+                self.processes[name], self.readiness_probe(name), deadline, self.has_pending_changes
             )
+            if reason is None:
+                self.timings.mark(name, 'ready')
+                continue
+            not_ready.append(name)
+            if reason == L.cancelled_reason:
+                self.stdout.write(self.style.WARNING(L.boot_cancelled_msg % name))
+                continue
+            self.stderr.write(L.not_ready_msg % (name, reason))
+            for line in self.readiness.tail(name):
+                self.stderr.write('    ' + line)
+        return not_ready
+
+    def start_processes(self, names: list[str]) -> None:
+        """
+        Spawns the processes at once and waits until they are ready.
+        Beat is spawned only when the workers are ready, so that it does not send tasks
+        nobody consumes, otherwise it is held back until the next restart of the workers.
+        """
+        deadline = time.monotonic() + self.options['startup_timeout']
+        started = [name for name in names if name != 'beat']
+        for name in started:
+            self.start_process(name)
+
+        waited: list[str] = []
+        if 'beat' in names:
+            waited = [name for name in started if is_worker(name)]
+            not_ready = self.wait_ready(waited, deadline)
+            if not_ready:
+                self.held_back.add('beat')
+                self.stderr.write(L.beat_held_back_msg % ', '.join(not_ready))
+            else:
+                self.held_back.discard('beat')
+                self.start_process('beat')
+                started.append('beat')
+
+        self.wait_ready([name for name in started if name not in waited], deadline)
+
+    def stop(self, process: Any, timeout: float = 10) -> None:
+        """
+        Sends the warm shutdown signal to the process, kills it if it does not stop in time.
+        """
+        process.terminate()
+        try:
+            process.wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+    def stop_in_background(self, process: Any, timeout: float) -> None:
+        threading.Thread(target=self.stop, args=(process, timeout), daemon=True).start()
+
+    def stop_process(self, name: str, timeout: float = 10) -> None:
+        """
+        Stops the process started by this command.
+        """
+        process = self.processes.pop(name, None)
+        if process is not None:
+            self.save_pids()
+            self.stop(process, timeout)
+
+    def get_app(self) -> Celery:
+        if self.app is None:
+            self.app = find_app(self.constr.celery_app)
+            if self.local_broker is not None:
+                _broker.configure(self.app, self.local_broker)
+        return self.app
+
+    def wait_worker_ready(self, process: Any, node: str, timeout: float) -> bool:
+        """
+        Waits until the worker node answers the ping.
+        Returns False if the worker has exited or has not answered in time,
+        or if another file change has arrived while it was booting.
+        """
+        node = host_format(default_nodename(node))
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                return False
+            if self.has_pending_changes():
+                self.stdout.write(self.style.WARNING(L.boot_cancelled_msg % node))
+                return False
+            try:
+                if self.get_app().control.ping(destination=[node], timeout=1.0):
+                    return True
+            except Exception:
+                # The broker connection may not be available yet.
+                time.sleep(1.0)
+        return False
+
+    def worker_node(self, name: str) -> str:
+        node = self.nodes.get(name) or _readiness.flag_value(self.cmds[name], ('-n', '--hostname'))
+        return host_format(default_nodename(node))
+
+    def can_hot_reload(self, name: str, files: list[str]) -> bool:
+        """
+        The task modules can be reloaded in the running worker only if its pool runs the tasks
+        in the worker process, it has reported its imports and the changed files are its
+        python modules other than the settings, the celery app module and the models.
+        The worker itself refuses to reload the modules which do not define tasks.
+        """
+        pool = _readiness.flag_value(self.cmds[name], ('-P', '--pool'), 'prefork')
+        imports_file = self.imports_file(name)
+        if (
+            not self.options['hot_reload']
+            or pool not in _bootstrap.HOT_RELOAD_POOLS
+            or not imports_file
+            or _bootstrap.read_imports(imports_file) is None
+        ):
+            return False
+        return all(
+            file_path.endswith('.py')
+            and file_path not in self.beat_files
+            and os.path.basename(file_path) != 'models.py'
+            and os.sep + 'models' + os.sep not in file_path
+            and os.sep + 'migrations' + os.sep not in file_path
+            for file_path in files
+        )
 
-    def kill_celery_processes(self) -> None:
+    def hot_reload(self, name: str, files: list[str]) -> bool:
         """
-        Kills the celery process(s).
+        Asks the worker to reload the changed task modules instead of restarting it.
+        Returns False if the worker has not reloaded them.
         """
-        if sys.platform == 'win32':
-            subprocess.call(shlex.split('TASKKILL /F /T /IM celery.exe'), **self._std)
-            # subprocess.run(["celery", "-A", self.project_name, "control", "shutdown"], **self._std)
+        node = self.worker_node(name)
+        try:
+            replies = self.get_app().control.broadcast(
+                _bootstrap.HOT_RELOAD_COMMAND,
+                arguments={'files': files},
+                destination=[node],
+                reply=True,
+                timeout=5.0,
+            )
+        except Exception as exc:
+            replies, error = [], f'{type(exc).__name__}: {exc}'
         else:
-            subprocess.call(shlex.split('pkill celery'), **self._std)
+            error = L.no_reply_reason
+        for reply in replies or ():
+            result = reply.get(node, {})
+            if 'ok' in result:
+                self.stdout.write(self.style.SUCCESS(L.hot_reload_msg % (name, result['ok'])))
+                return True
+            error = result.get('error', error)
+        self.stdout.write(self.style.WARNING(L.hot_reload_failed_msg % (name, error)))
+        return False
+
+    def overlap_restart(self, name: str) -> None:
+        """
+        Starts a new worker next to the old one and waits until it is ready,
+        only then the old worker gets a warm shutdown and finishes its tasks in the background.
+        If the new worker does not become ready, the old one keeps running.
+        """
+        self.generation += 1
+        node = f'{name}-{self.generation}@%h'
+        process = self.spawn(name, self.constr.set_node_name(self.cmds[name], node))
+        self.timings.mark(name, 'spawned')
+
+        if not self.wait_worker_ready(process, node, self.options['startup_timeout']):
+            if not self.has_pending_changes():
+                self.stderr.write(L.overlap_failed_msg % node)
+            self.stop_in_background(process, 0)
+            return
+
+        self.timings.mark(name, 'ready')
+        old_process = self.processes.get(name)
+        self.processes[name] = process
+        self.save_pids()
+        self.nodes[name] = node
+        self.started_at[name] = time.monotonic()
+        if old_process is not None:
+            self.stdout.write(self.style.SUCCESS(L.overlap_ready_msg % node))
+            self.stop_in_background(old_process, self.options['drain_timeout'])
+
+    def run_celery(self) -> None:
+        """
+        Launches celery[worker/beat/flower]
+        with logs output to one console. For local development.
+        """
+        for name in self.cmds:
+            self.timings.begin(name)
+        self.start_processes(list(self.cmds))
+
+    def start_zygote(self) -> None:
+        """
+        Starts the process which keeps django and celery imported
+        and forks the worker and beat on every reload.
+        """
+        if not _zygote.is_supported():
+            self.stderr.write(L.zygote_not_supported)
+            return
+        self.zygote = _zygote.Zygote(self.constr.celery_app, self.BASE_DIR)
+        self.zygote.start()
+
+    def get_beat_files(self) -> set[str]:
+        """
+        Returns the files which define the beat schedule and settings:
+        the django settings module and the module of the celery app.
+        """
+        modules = [settings.SETTINGS_MODULE, self.constr.celery_app, self.constr.celery_app + '.celery']
+        files = set()
+        for module in modules:
+            try:
+                spec = importlib.util.find_spec(module) if module else None
+            except (ImportError, ValueError):
+                spec = None
+            if spec is not None and spec.origin:
+                files.add(spec.origin)
+        return files
+
+    def affects_beat(self, file_path: str) -> bool:
+        if file_path in self.beat_files:
+            return True
+        if not file_path.endswith('.py'):
+            return False
+        try:
+            with open(file_path, encoding='utf-8', errors='ignore') as file:
+                return 'beat_schedule' in file.read().lower()
+        except OSError:
+            return False
+
+    def worker_files(self, name: str, file_paths: Iterable[str]) -> list[str]:
+        """
+        Returns the changed files which affect the worker: the files it has imported,
+        any file until it has reported them.
+        """
+        file_paths = sorted(file_paths)
+        if self.options['restart_on_any_change']:
+            return file_paths
+        imports_file = self.imports_file(name)
+        imported = _bootstrap.read_imports(imports_file) if imports_file else None
+        if imported is None:
+            return file_paths
+        return [file_path for file_path in file_paths if os.path.realpath(file_path) in imported]
+
+    def changed_files_by_process(self, file_paths: Iterable[str]) -> dict[str, list[str]]:
+        """
+        Returns the changed files by the running process they affect, only the affected processes.
+        Flower does not run the project code, the worker is affected only by the files it has imported,
+        beat only by the files which can change the schedule.
+        The imports of every worker are read once for all the files.
+        """
+        file_paths = sorted(file_paths)
+        result = {}
+        for name in self.cmds:
+            if name not in self.processes:
+                continue
+            if is_worker(name):
+                files = self.worker_files(name, file_paths)
+            elif name == 'beat':
+                files = [file_path for file_path in file_paths if self.affects_beat(file_path)]
+            else:
+                files = []
+            if files:
+                result[name] = files
+        return result
+
+    def affected_processes(self, file_path: str) -> list[str]:
+        """
+        Returns the names of the running processes which have to be restarted after the file change.
+        """
+        return list(self.changed_files_by_process([file_path]))
+
+    def on_file_changed(self, sender: Any, file_path: Any, **kwargs: Any) -> bool:
+        """
+        Collects the changed file for the reload thread instead of restarting the whole command.
+        """
+        with self.changes:
+            if not self.changed_files:
+                self.changes_detected_at = time.monotonic()
+            self.changed_files.add(str(file_path))
+            self.change_events += 1
+            self.changes.notify()
+        return True
+
+    def has_pending_changes(self) -> bool:
+        return bool(self.changed_files)
+
+    def collect_changes(self) -> tuple[set[str], float]:
+        """
+        Waits for the file changes and returns them once no new change
+        has arrived during the debounce period, with the time the first of them was detected.
+        """
+        with self.changes:
+            while not self.changed_files:
+                self.changes.wait()
+            while True:
+                events = self.change_events
+                self.changes.wait(self.options['debounce'])
+                if events == self.change_events:
+                    break
+            changed_files, self.changed_files = self.changed_files, set()
+        return changed_files, self.changes_detected_at
+
+    def reload_processes(self, changed_files: set[str], detected_at: float | None = None) -> None:
+        """
+        Restarts every process affected by the changed files once,
+        the workers which have reloaded the changed task modules are not restarted.
+        The zygote is restarted only if one of the changed files was imported by it,
+        the processes forked from it are stopped before, since their status is known
+        only to the zygote which has forked them.
+        """
+        self.metrics.changed_files.observe(len(changed_files))
+        restart_zygote = self.zygote is not None and any(map(self.zygote.is_preloaded, changed_files))
+        forked = {name for name in self.processes if name != 'flower'} if restart_zygote else set()
+
+        files_by_process = self.changed_files_by_process(changed_files)
+        affected = [
+            name
+            for name in self.cmds
+            if name in self.held_back or name in forked or name in files_by_process
+        ]
+        restarted = []
+        for name in affected:
+            worker_files = files_by_process.get(name, [])
+            if not (
+                name not in forked
+                and is_worker(name)
+                and self.can_hot_reload(name, worker_files)
+                and self.hot_reload(name, worker_files)
+            ):
+                restarted.append(name)
+        if not restarted:
+            if restart_zygote:
+                self.zygote.restart()
+            return
+
+        shown_files = ', '.join(sorted(changed_files)[:3]) + (', ...' if len(changed_files) > 3 else '')
+        self.stdout.write(
+            self.style.WARNING(L.restart_msg % (', '.join(restarted), len(changed_files), shown_files))
+        )
+        stopped = []
+        for name in restarted:
+            self.metrics.restarts.inc(process=name, reason='file_change')
+            self.timings.begin(name, detected_at, len(changed_files))
+            if name not in forked and is_worker(name) and self.options['restart_strategy'] == 'overlap':
+                self.overlap_restart(name)
+            else:
+                self.stop_process(name)
+                self.timings.mark(name, 'stopped')
+                stopped.append(name)
+        if restart_zygote:
+            self.zygote.restart()
+        self.start_processes(stopped)
+
+    def reload_loop(self) -> None:
+        while True:
+            changed_files, detected_at = self.collect_changes()
+            try:
+                with self.restart_lock:
+                    self.reload_processes(changed_files, detected_at)
+            except Exception:
+                self.stderr.write(traceback.format_exc())
+
+    def recycle_reason(self, name: str, usage: _resources.Usage) -> str | None:
+        max_memory = self.options['max_memory']
+        if max_memory and usage.rss > max_memory * 2**20:
+            return L.memory_reason % max_memory
+        max_uptime = self.options['max_uptime']
+        if max_uptime and time.monotonic() - self.started_at.get(name, time.monotonic()) > max_uptime:
+            return L.uptime_reason % max_uptime
+        return None
+
+    def recycle(self, name: str, reason: str, before: _resources.Usage) -> None:
+        """
+        Restarts the process which has passed the memory or uptime limit,
+        the worker gets time to finish its tasks.
+        """
+        with self.restart_lock:
+            if name not in self.processes:
+                return
+            self.stdout.write(self.style.WARNING(L.recycle_msg % (name, reason, before)))
+            self.metrics.restarts.inc(process=name, reason='recycle')
+            self.timings.begin(name)
+            if is_worker(name) and self.options['restart_strategy'] == 'overlap':
+                self.overlap_restart(name)
+            else:
+                self.stop_process(name, self.options['drain_timeout'])
+                self.timings.mark(name, 'stopped')
+                self.start_processes([name])
+
+            process = self.processes.get(name)
+            after = self.monitor.sample({name: process.pid}).get(name) if process else None
+            if after is not None:
+                self.stdout.write(self.style.SUCCESS(L.recycled_msg % (name, before, after)))
+
+    def monitor_loop(self) -> None:
+        """
+        Prints the resource usage of the processes and recycles those which have passed the limits.
+        """
+        while True:
+            time.sleep(self.options['status_interval'])
+            try:
+                pids = {name: process.pid for name, process in list(self.processes.items())}
+                usages = self.usages = self.monitor.sample(pids)
+                if not usages:
+                    continue
+                self.stdout.write(
+                    self.style.HTTP_NOT_MODIFIED(
+                        ' | '.join(f'{name}: {usage}' for name, usage in usages.items())
+                    )
+                )
+                for name, usage in usages.items():
+                    reason = self.recycle_reason(name, usage)
+                    if reason is not None:
+                        self.recycle(name, reason, usage)
+            except Exception:
+                self.stderr.write(traceback.format_exc())
+
+    def collect_metrics(self) -> None:
+        """
+        Updates the gauges of the running processes before the scrape.
+        """
+        now = time.monotonic()
+        for gauge in (self.metrics.uptime, self.metrics.rss, self.metrics.cpu):
+            gauge.clear()
+        for name in list(self.processes):
+            if name in self.started_at:
+                self.metrics.uptime.set(now - self.started_at[name], process=name)
+            usage = self.usages.get(name)
+            if usage is not None:
+                self.metrics.rss.set(usage.rss, process=name)
+                self.metrics.cpu.set(usage.cpu, process=name)
+
+    def count_log_line(self, name: str, line: str) -> None:
+        self.metrics.log_lines.inc(process=name)
+
+    def observe_restart(self, record: dict[str, Any]) -> None:
+        self.metrics.restart_duration.observe(record['duration'], process=record['process'])
+
+    def start_metrics_server(self) -> None:
+        self.timings.add_listener(self.observe_restart)
+        self.logs.add_listener(self.count_log_line)
+        server = _metrics.MetricsServer(
+            self.metrics, self.options['metrics_port'], self.options['metrics_address']
+        )
+        server.start()
+        self.stdout.write(
+            self.style.SUCCESS(L.metrics_msg % (self.options['metrics_address'], server.port))
+        )
 
     def reload_celery(self) -> None:
         """
-        Kills the celery process(s) if there is one and restarts celery.
+        Stops the celery processes left from the previous run and starts celery.
+        Subsequent file changes are handled by on_file_changed without restarting this command.
         """
-        self.kill_celery_processes()
+        self.pid_file = self.BASE_DIR + RUNCELERY_PID_FILENAME
+        self.stop_previous_processes(debug=self.options['debug'])
 
+        self.logs = _logmux.LogMux(
+            self.stdout.write,
+            color=not self.options['no_color'] and (self.options['force_color'] or supports_color()),
+            log_dir=self.options['log_dir'],
+            log_max_bytes=self.options['log_max_bytes'],
+        )
+        self.logs.add_listener(self.timings.on_line)
+        self.logs.add_listener(self.readiness.on_line)
+        archive_dir = _archive.archive_dir(self.BASE_DIR, self.options['archive'])
+        if archive_dir is not None:
+            archive = _archive.LogArchive(
+                archive_dir, self.options['archive_segment_bytes'], self.options['archive_max_segments']
+            )
+            self.logs.add_listener(archive.append)
+            archive.start()
+            atexit.register(archive.stop)
+            self.stdout.write(self.style.MIGRATE_HEADING(L.archive_msg % archive_dir))
+        self.timings.json_path = self.options['timings_json']
+        if self.options['metrics_port'] is not None:
+            self.start_metrics_server()
+        self.logs.start()
+
+        self.imports_dir = tempfile.mkdtemp(prefix='runcelery-')
+        atexit.register(shutil.rmtree, self.imports_dir, ignore_errors=True)
+
+        if self.options['zygote']:
+            self.start_zygote()
+
+        self.beat_files = self.get_beat_files()
+        # The changes made during the startup cancel the waiting for the readiness
+        # and are handled by the reload thread.
+        autoreload.file_changed.connect(self.on_file_changed, dispatch_uid='runcelery')
+        self.control_backlog()
         self.run_celery()
+        threading.Thread(target=self.reload_loop, name='runcelery-reload', daemon=True).start()
+
+        if self.options['status_interval'] > 0:
+            if _resources.is_supported():
+                threading.Thread(
+                    target=self.monitor_loop, name='runcelery-resources', daemon=True
+                ).start()
+            else:
+                self.stderr.write(L.resources_not_supported)
+
+        if self.options['trace']:
+            self.events.add_listener(self.trace.on_event)
+            threading.Thread(target=self.trace_loop, name='runcelery-trace', daemon=True).start()
+            atexit.register(self.write_trace)
+            self.stdout.write(self.style.MIGRATE_HEADING(L.trace_msg % self.options['trace']))
+        if self.options['events'] or self.options['trace']:
+            threading.Thread(target=self.events_loop, name='runcelery-events', daemon=True).start()
+
+    def worker_queues(self) -> list[str]:
+        queues: list[str] = []
+        for name, cmd in self.cmds.items():
+            if is_worker(name):
+                value = _readiness.flag_value(cmd, ('-Q', '--queues'))
+                queues.extend(value.split(',') if value else [self.get_app().conf.task_default_queue])
+        return queues
+
+    def control_backlog(self) -> None:
+        """
+        Purges, reduces or defers the messages queued while the workers were not running.
+        The messages deferred by the previous run which has not replayed them are replayed in any mode,
+        the broker is asked for them only if the marker file of that run is left.
+        """
+        mode = self.options['backlog']
+        rate = self.options['backlog_rate']
+        marker = self.BASE_DIR + RUNCELERY_BACKLOG_FILENAME
+        marked = _backlog.read_marker(marker)
+        if mode == 'keep' and not marked:
+            return
+        backlog = _backlog.Backlog(self.get_app(), self.worker_queues(), marker)
+        try:
+            parked = _backlog.Backlog(self.get_app(), marked).parked() if marked else {}
+            for queue, count in parked.items():
+                self.stdout.write(self.style.WARNING(L.backlog_leftover_msg % (queue, count, rate)))
+            if marked and not parked:
+                os.remove(marker)
+            if mode == 'purge':
+                for queue, dropped in backlog.purge().items():
+                    self.stdout.write(self.style.WARNING(L.backlog_purged_msg % (queue, dropped)))
+            elif mode == 'newest':
+                for queue, (dropped, kept) in backlog.keep_newest(self.options['backlog_keep']).items():
+                    self.stdout.write(self.style.WARNING(L.backlog_newest_msg % (queue, dropped, kept)))
+            elif mode == 'drain':
+                for queue, deferred in backlog.park().items():
+                    self.stdout.write(self.style.WARNING(L.backlog_parked_msg % (queue, deferred, rate)))
+            if mode == 'drain' or parked:
+                queues = [*backlog.queues, *parked] if mode == 'drain' else list(parked)
+                backlog = _backlog.Backlog(self.get_app(), queues, marker)
+                threading.Thread(
+                    target=self.drain_backlog, args=(backlog,), name='runcelery-backlog', daemon=True
+                ).start()
+        except Exception as exc:
+            self.stderr.write(L.backlog_error_msg % f'{type(exc).__name__}: {exc}')
+
+    def drain_backlog(self, backlog: _backlog.Backlog) -> None:
+        try:
+            for queue, replayed in backlog.drain(self.options['backlog_rate']).items():
+                if replayed:
+                    self.stdout.write(self.style.WARNING(L.backlog_drained_msg % (queue, replayed)))
+        except Exception as exc:
+            self.stderr.write(L.backlog_error_msg % f'{type(exc).__name__}: {exc}')
+
+    def events_loop(self) -> None:
+        """
+        Consumes the events of the workers and prints the summary of the tasks instead of flower.
+        """
+        _events.consume(
+            self.get_app(),
+            self.events,
+            self.options['events_interval'],
+            self.write_events_summary,
+            lambda error: self.stderr.write(L.events_error_msg % error),
+        )
+
+    def write_events_summary(self, lines: list[str]) -> None:
+        if not self.options['events']:
+            return
+        for line in lines:
+            self.stdout.write(self.style.HTTP_NOT_MODIFIED(line))
+
+    def trace_loop(self) -> None:
+        """
+        Rewrites the trace of the tasks every --events_interval seconds when new runs have finished.
+        """
+        while True:
+            time.sleep(self.options['events_interval'])
+            if self.trace.changed:
+                self.write_trace()
+
+    def write_trace(self) -> None:
+        try:
+            self.trace.write(self.options['trace'])
+        except OSError as exc:
+            self.stderr.write(L.trace_error_msg % exc)
+
+    def run_bench(self) -> None:
+        """
+        Compares the worker pools on the task instead of running celery.
+        """
+        # Imported only here, since it registers the synthetic tasks on the app.
+        from ... import _bench  # noqa: TID252
+
+        task_name = _bench.SYNTHETIC_TASKS.get(self.options['bench_task'], self.options['bench_task'])
+        if self.options['bench_pools']:
+            candidates = _bench.parse_candidates(self.options['bench_pools'])
+        else:
+            candidates = _bench.default_candidates()
+        count = self.options['bench_tasks']
+        self.stdout.write(
+            self.style.SUCCESS(L.bench_msg % (task_name, count, ', '.join(map(str, candidates))))
+        )
+
+        results = [
+            _bench.run_candidate(self.constr.worker_cmd, candidate, task_name, count, broker=broker)
+            for broker in self.options['bench_broker'] or [_bench.LOCAL]
+            for candidate in candidates
+        ]
+        for line in _bench.format_table(results):
+            self.stdout.write(line)
+
+        finished = [result for result in results if result.finished]
+        best = max(finished, key=lambda result: result.throughput, default=None)
+        if best is None:
+            self.stderr.write(L.bench_failed_msg)
+            return
+        pool, concurrency = best.candidate
+        self.stdout.write(self.style.SUCCESS(L.bench_best_msg % (best.candidate, pool, concurrency)))
+
+    def run_replay(self) -> None:
+        """
+        Replays the recorded tasks against a fresh worker instead of running celery,
+        compares the results with the baseline and fails on the regressions.
+        """
+        try:
+            records = _replay.read_records(self.options['replay'])
+        except OSError:
+            records = []
+        if not records:
+            self.stderr.write(L.replay_empty_msg % self.options['replay'])
+            return
+        duration = records[-1].moment - records[0].moment
+        self.stdout.write(
+            self.style.SUCCESS(L.replay_msg % (len(records), duration, self.options['replay_speed']))
+        )
+        reports, error = _replay.replay(self.constr.worker_cmd, records, self.options['replay_speed'])
+        for line in _replay.format_reports(reports):
+            self.stdout.write(line)
+        if error:
+            self.stderr.write(L.replay_error_msg % error)
+
+        baseline = self.options['replay_baseline']
+        if not baseline:
+            return
+        if not os.path.exists(baseline):
+            _replay.save_baseline(baseline, reports)
+            self.stdout.write(self.style.SUCCESS(L.replay_baseline_saved_msg % baseline))
+            return
+        regressions = _replay.compare(
+            reports, _replay.load_baseline(baseline), self.options['replay_tolerance']
+        )
+        for regression in regressions:
+            self.stderr.write(L.replay_regression_msg % regression)
+        if regressions:
+            raise CommandError(L.replay_failed_msg % (len(regressions), baseline))
+        self.stdout.write(self.style.SUCCESS(L.replay_passed_msg % baseline))
+
+    def run_grep(self) -> None:
+        """
+        Prints the archived lines of the task and of the time range instead of running celery.
+        """
+        directory = _archive.archive_dir(self.BASE_DIR, self.options['archive'] or True)
+        now = time.time()
+        try:
+            since, until = (
+                None if value is None else _archive.parse_time(value, now)
+                for value in (self.options['grep_since'], self.options['grep_until'])
+            )
+            matches = _archive.search(
+                directory,  # type: ignore[arg-type]
+                task_id=self.options['grep'] or None,
+                since=since,
+                until=until,
+                level=_archive.LEVELS.get(self.options['grep_level'], 0),
+            )
+            found = 0
+            for match in matches:
+                self.stdout.write(_archive.format_match(match))
+                found += 1
+        except ValueError as exc:
+            self.stderr.write(L.grep_error_msg % exc)
+            return
+        self.stdout.write(self.style.SUCCESS(L.grep_msg % (found, (time.time() - now) * 1000)))
+
+    def report_watch_latency(self, path: Path, latency: float) -> None:
+        self.stdout.write(self.style.HTTP_INFO(L.watch_latency_msg % (path, latency * 1000)))
+
+    def get_reloader(self) -> autoreload.BaseReloader | None:
+        """
+        Returns the inotify reloader, None if the reloader is chosen by Django
+        (watchman if it is installed, otherwise the StatReloader).
+        """
+        watcher = self.options['watcher']
+        if watcher == 'django':
+            return None
+        if not _inotify.is_supported():
+            if watcher == 'inotify':
+                self.stderr.write(L.inotify_not_supported)
+            return None
+        return _inotify.InotifyReloader(
+            self.BASE_DIR,
+            include=self.options['watch_include'] or (),
+            exclude=self.options['watch_exclude'] or (),
+            report=self.report_watch_latency,
+        )
+
+    def run_with_reloader(self, main_func: Callable[[], None]) -> None:
+        reloader = self.get_reloader()
+        if reloader is None:
+            autoreload.run_with_reloader(main_func)
+        else:
+            _inotify.run_with_reloader(reloader, main_func)
 
     def add_arguments(self, parser: CommandParser) -> None:
         """
@@ -272,6 +1480,115 @@ class Command(BaseCommand):
             '-ef', '--exclude_flower', action='store_true', default=False, help=L.exclude_flower_help
         )
         parser.add_argument('-d', '--debug', action='store_true', default=False, help=L.debug_help)
+        parser.add_argument(
+            '--pool_sample', action='append', default=None, type=str, help=L.pool_sample_help
+        )
+        parser.add_argument('-z', '--zygote', action='store_true', default=False, help=L.zygote_help)
+        parser.add_argument(
+            '--restart_strategy',
+            default='stop',
+            choices=('stop', 'overlap'),
+            help=L.restart_strategy_help,
+        )
+        parser.add_argument('--log_dir', default=None, type=str, help=L.log_dir_help)
+        parser.add_argument(
+            '--log_max_bytes', default=10 * 1024 * 1024, type=int, help=L.log_max_bytes_help
+        )
+        parser.add_argument('--timings_json', default=None, type=str, help=L.timings_json_help)
+        parser.add_argument(
+            '--restart_on_any_change',
+            action='store_true',
+            default=False,
+            help=L.restart_on_any_change_help,
+        )
+        parser.add_argument('--hot_reload', action='store_true', default=False, help=L.hot_reload_help)
+        parser.add_argument(
+            '--watcher', default='auto', choices=('auto', 'inotify', 'django'), help=L.watcher_help
+        )
+        parser.add_argument(
+            '--watch_include', action='append', default=None, type=str, help=L.watch_include_help
+        )
+        parser.add_argument(
+            '--watch_exclude', action='append', default=None, type=str, help=L.watch_exclude_help
+        )
+        parser.add_argument('--status_interval', default=30.0, type=float, help=L.status_interval_help)
+        parser.add_argument('--max_memory', default=None, type=int, help=L.max_memory_help)
+        parser.add_argument('--max_uptime', default=None, type=float, help=L.max_uptime_help)
+        parser.add_argument('--metrics_port', default=None, type=int, help=L.metrics_port_help)
+        parser.add_argument(
+            '--metrics_address', default='127.0.0.1', type=str, help=L.metrics_address_help
+        )
+        parser.add_argument('--bench', action='store_true', default=False, help=L.bench_help)
+        parser.add_argument('--bench_task', default='cpu', type=str, help=L.bench_task_help)
+        parser.add_argument('--bench_tasks', default=200, type=int, help=L.bench_tasks_help)
+        parser.add_argument('--bench_pools', default='', type=str, help=L.bench_pools_help)
+        parser.add_argument('--profile_tasks', default=None, type=str, help=L.profile_tasks_help)
+        parser.add_argument('--profile_sample', default=1.0, type=float, help=L.profile_sample_help)
+        parser.add_argument(
+            '--profile_memory', action='store_true', default=False, help=L.profile_memory_help
+        )
+        parser.add_argument('--profile_dir', default=None, type=str, help=L.profile_dir_help)
+        parser.add_argument('--events', action='store_true', default=False, help=L.events_help)
+        parser.add_argument('--trace', default=None, type=str, help=L.trace_help)
+        parser.add_argument('--events_interval', default=10.0, type=float, help=L.events_interval_help)
+        parser.add_argument(
+            '--local_broker', nargs='?', const=True, default=None, type=str, help=L.local_broker_help
+        )
+        parser.add_argument(
+            '--bench_broker', action='append', default=None, type=str, help=L.bench_broker_help
+        )
+        parser.add_argument('--cpu_shards', default=None, type=str, help=L.cpu_shards_help)
+        parser.add_argument(
+            '--backlog', default='keep', choices=_backlog.MODES, type=str, help=L.backlog_help
+        )
+        parser.add_argument('--backlog_keep', default=100, type=int, help=L.backlog_keep_help)
+        parser.add_argument(
+            '--backlog_rate', default=10.0, type=positive_float, help=L.backlog_rate_help
+        )
+        parser.add_argument(
+            '--beat_catchup', default=None, choices=_beat.POLICIES, type=str, help=L.beat_catchup_help
+        )
+        parser.add_argument(
+            '--beat_catchup_window',
+            default=_beat.DEFAULT_WINDOW,
+            type=float,
+            help=L.beat_catchup_window_help,
+        )
+        parser.add_argument(
+            '--archive', nargs='?', const=True, default=None, type=str, help=L.archive_help
+        )
+        parser.add_argument(
+            '--archive_segment_bytes',
+            default=_archive.SEGMENT_BYTES,
+            type=int,
+            help=L.archive_segment_bytes_help,
+        )
+        parser.add_argument(
+            '--archive_max_segments',
+            default=_archive.MAX_SEGMENTS,
+            type=int,
+            help=L.archive_max_segments_help,
+        )
+        parser.add_argument('--grep', nargs='?', const='', default=None, type=str, help=L.grep_help)
+        parser.add_argument('--grep_since', default=None, type=str, help=L.grep_since_help)
+        parser.add_argument('--grep_until', default=None, type=str, help=L.grep_until_help)
+        parser.add_argument(
+            '--grep_level',
+            default=None,
+            choices=tuple(_archive.LEVELS),
+            type=str,
+            help=L.grep_level_help,
+        )
+        parser.add_argument('--record', default=None, type=str, help=L.record_help)
+        parser.add_argument('--replay', default=None, type=str, help=L.replay_help)
+        parser.add_argument('--replay_speed', default=1.0, type=float, help=L.replay_speed_help)
+        parser.add_argument('--replay_baseline', default=None, type=str, help=L.replay_baseline_help)
+        parser.add_argument(
+            '--replay_tolerance', default=_replay.TOLERANCE, type=float, help=L.replay_tolerance_help
+        )
+        parser.add_argument('--debounce', default=0.5, type=float, help=L.debounce_help)
+        parser.add_argument('--drain_timeout', default=60.0, type=float, help=L.drain_timeout_help)
+        parser.add_argument('--startup_timeout', default=60.0, type=float, help=L.startup_timeout_help)
 
     def handle(self, *args: Any, **options: Any) -> None:
         """
@@ -281,6 +1598,24 @@ class Command(BaseCommand):
             self.constr.parse_options(options)
 
         self.options = options
+        if self.options['bench']:
+            self.run_bench()
+            return
+        if self.options['grep'] is not None:
+            self.run_grep()
+            return
+        if self.options['replay']:
+            self.run_replay()
+            return
+        self.local_broker = _broker.local_broker_dir(
+            self.BASE_DIR,
+            self.options['local_broker'] or getattr(settings, 'CELERY_STARTER_LOCAL_BROKER', None),
+        )
+        if self.local_broker is not None:
+            # Flower takes its own broker, the events of the workers are shown by --events.
+            self.options['exclude_flower'] = True
+            os.environ.update(_broker.local_env(self.local_broker))
+        self.cmds = self.get_process_cmds()
 
         beat = 'beat ' if not self.options['exclude_beat'] else ''
         flower = 'flower ' if not self.options['exclude_flower'] else ''
@@ -302,11 +1637,18 @@ class Command(BaseCommand):
                 + self.style.WARNING('DEBUG')
                 + self.style.SUCCESS(msg.split('[')[1].split(']')[1].split('DEBUG')[1])
             )
-            self._std: dict[str, Any] = {}
         else:
             colored_msg += self.style.SUCCESS(']' + msg.split('[')[1].split(']')[1])
-            self._std = dict(stdin=subprocess.PIPE, stderr=subprocess.PIPE, stdout=subprocess.PIPE)
 
         self.stdout.write(colored_msg)
+        for pool_msg in self.constr.pool_msgs:
+            self.stdout.write(self.style.MIGRATE_HEADING(pool_msg))
+        if self.local_broker is not None:
+            self.stdout.write(self.style.MIGRATE_HEADING(L.local_broker_msg % self.local_broker))
+        if self.options['record']:
+            self.stdout.write(self.style.MIGRATE_HEADING(L.record_msg % self.options['record']))
+        if self.options['profile_tasks']:
+            profile_msg = L.profile_msg % (self.options['profile_tasks'], self.profile_dir())
+            self.stdout.write(self.style.MIGRATE_HEADING(profile_msg))
 
-        autoreload.run_with_reloader(self.reload_celery)
+        self.run_with_reloader(self.reload_celery)
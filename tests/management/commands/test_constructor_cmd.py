@@ -1,17 +1,34 @@
 from __future__ import annotations
 
+import json
+import os
 import shlex
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
 from io import StringIO
 from unittest import mock
 
 from django.core import management
+from django.core.management.base import CommandError
 from django.test import SimpleTestCase
 from django.test.utils import override_settings
+from src.celery_starter import (
+    _archive,
+    _bootstrap,
+    _localization as L,  # noqa: N812
+    _replay,
+    _resources,
+)
 from src.celery_starter.management.commands.runcelery import (
     CELERY_BEAT_PID_FILENAME,
     Command,
     ConstantNotFoundError,
     ConstructorCommand,
+    InvalidCpuShardsError,
+    InvalidWorkerSpecError,
 )
 
 override_proj_constants = override_settings(
@@ -21,9 +38,7 @@ override_proj_constants = override_settings(
 )
 
 
-mocked_run_with_reloader = mock.patch(
-    target='celery_starter.management.commands.runcelery.autoreload.run_with_reloader'
-)
+mocked_run_with_reloader = mock.patch.object(Command, 'run_with_reloader')
 
 
 # pytest -s tests/management/commands/test_constructor_cmd.py::CommandTests::test_cmd_1
@@ -235,3 +250,794 @@ class CommandTests(SimpleTestCase):
         self.assertEqual(self.cmd.constr.worker_cmd, shlex.split(input_cmd))
         self.assertEqual(self.cmd.constr.beat_cmd, self.default_beat_cmd)
         self.assertEqual(self.cmd.constr.flower_cmd, self.default_flower_cmd)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_14(self, mocker: mock.MagicMock):
+        """
+        In zygote mode a file change forks the worker again
+        and restarts the zygote only if the changed file was imported by it,
+        after all processes forked from it are stopped.
+        """
+        self.call_command('--zygote --exclude_flower')
+        self.cmd.zygote = zygote = mock.MagicMock()
+        self.cmd.logs = mock.MagicMock()
+        self.cmd.logs.register.side_effect = lambda name, pipe: pipe.close()
+        zygote.is_preloaded.side_effect = lambda path: path == 'settings.py'
+        self.cmd.beat_files = {'settings.py'}
+
+        read_pid_file = mock.patch.object(self.cmd, 'read_pid_file')
+        with read_pid_file, mock.patch.object(self.cmd, 'readiness_probe', return_value=lambda: True):
+            zygote.fork.return_value.poll.return_value = None
+            self.cmd.run_celery()
+            self.cmd.reload_processes({'tasks.py'})
+            zygote.restart.assert_not_called()
+            calls = mock.Mock()
+            calls.attach_mock(zygote.fork.return_value.terminate, 'terminate')
+            calls.attach_mock(zygote.restart, 'restart')
+            self.cmd.reload_processes({'settings.py'})
+            zygote.restart.assert_called_once()
+            # The forked processes are stopped before the zygote which knows their status.
+            self.assertEqual(
+                calls.mock_calls, [mock.call.terminate(), mock.call.terminate(), mock.call.restart()]
+            )
+
+        self.assertEqual(
+            [c.args[0] for c in zygote.fork.call_args_list],
+            [
+                self.default_worker_cmd,
+                self.default_beat_cmd,
+                self.default_worker_cmd,
+                self.default_worker_cmd,
+                self.default_beat_cmd,
+            ],
+        )
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_15(self, mocker: mock.MagicMock):
+        """
+        Flower is never restarted, beat is restarted only by the files that can change its schedule.
+        """
+        self.call_command()
+        self.cmd.processes = dict.fromkeys(('worker', 'beat', 'flower'), mock.MagicMock())
+        self.cmd.beat_files = {'/proj/settings.py'}
+
+        self.assertEqual(self.cmd.affected_processes('/proj/templates/index.html'), ['worker'])
+        self.assertEqual(self.cmd.affected_processes('/proj/settings.py'), ['worker', 'beat'])
+        with mock.patch('builtins.open', mock.mock_open(read_data='app.conf.beat_schedule = {}')):
+            self.assertEqual(self.cmd.affected_processes('/proj/schedule.py'), ['worker', 'beat'])
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_16(self, mocker: mock.MagicMock):
+        """
+        With the overlap strategy the old worker is stopped only after the new one answers the ping,
+        if the new worker does not become ready the old one keeps running.
+        """
+        self.call_command('--restart_strategy overlap --startup_timeout 5')
+        old_worker, new_worker = mock.MagicMock(), mock.MagicMock()
+        new_worker.poll.return_value = None
+        self.cmd.processes = {'worker': old_worker}
+        self.cmd.app = app = mock.MagicMock()
+
+        with mock.patch.object(self.cmd, 'spawn', return_value=new_worker) as spawn:  # noqa: SIM117
+            with mock.patch.object(self.cmd, 'stop_in_background') as stop_in_background:
+                app.control.ping.return_value = [{'worker-1@host': {'ok': 'pong'}}]
+                self.cmd.reload_processes({'tasks.py'})
+
+                self.assertEqual(spawn.call_args.args[1][-2:], ['-n', 'worker-1@%h'])
+                self.assertIs(self.cmd.processes['worker'], new_worker)
+                stop_in_background.assert_called_once_with(old_worker, 60.0)
+
+                stop_in_background.reset_mock()
+                new_worker.poll.return_value = 1
+                self.cmd.reload_processes({'tasks.py'})
+
+                self.assertIs(self.cmd.processes['worker'], new_worker)
+                stop_in_background.assert_called_once_with(new_worker, 0)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_17(self, mocker: mock.MagicMock):
+        """
+        A burst of file changes is collected into one restart after the debounce period,
+        a change arriving while the new worker boots cancels that boot.
+        """
+        self.call_command('--debounce 0.1')
+        for file_path in ('a.py', 'b.py', 'a.py'):
+            self.assertTrue(self.cmd.on_file_changed(None, file_path))
+        self.assertEqual(self.cmd.collect_changes()[0], {'a.py', 'b.py'})
+        self.assertFalse(self.cmd.has_pending_changes())
+
+        process = mock.MagicMock()
+        process.poll.return_value = None
+        self.cmd.app = mock.MagicMock()
+        self.cmd.app.control.ping.return_value = []
+        self.cmd.on_file_changed(None, 'c.py')
+        self.assertFalse(self.cmd.wait_worker_ready(process, 'worker-1@%h', 5))
+        self.cmd.app.control.ping.assert_not_called()
+
+    def test_set_node_name(self):
+        """The node name replaces the one passed in any form."""
+        constr = ConstructorCommand()
+        for cmd in ('celery worker -n old@%h -l INFO', 'celery worker --hostname=old@%h -l INFO'):
+            self.assertEqual(
+                constr.set_node_name(shlex.split(cmd), 'new@%h'),
+                ['celery', 'worker', '-l', 'INFO', '-n', 'new@%h'],
+            )
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_18(self, mocker: mock.MagicMock):
+        """
+        -P auto is replaced with the chosen pool and concurrency,
+        the concurrency passed in the command line is kept.
+        """
+        with mock.patch('src.celery_starter._pool.choose_pool', return_value=('prefork', 4, 'reason')):
+            self.call_command("--worker '-P auto'")
+            self.assertEqual(
+                self.cmd.constr.worker_cmd,
+                [*self.default_worker_cmd[:-2], '-P', 'prefork', '-c', '4'],
+            )
+            self.assertIn('Pool: prefork, concurrency: 4 (reason)', self.out.getvalue())
+
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            self.call_command("--worker 'celery -A some_celery_app worker --pool=auto -c 2'")
+            self.assertEqual(
+                self.cmd.constr.worker_cmd,
+                ['celery', '-A', 'some_celery_app', 'worker', '-c', '2', '-P', 'prefork'],
+            )
+
+        # The unknown task of the sample is reported with the registered ones.
+        app = mock.MagicMock(tasks={'proj.add': None, 'celery.chord': None})
+        find_app = mock.patch(
+            'src.celery_starter.management.commands.runcelery.find_app', return_value=app
+        )
+        with find_app, self.assertRaisesMessage(CommandError, 'proj.ad. The registered tasks: proj.add'):
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            self.call_command("--worker '-P auto' --pool_sample proj.ad")
+
+        # The tasks are sampled once for all workers, only by the process which starts them.
+        workers = [{'name': 'default'}, {'name': 'heavy'}]
+        sample = mock.patch('src.celery_starter._bench.sample_workload', return_value=('io', 0.1, ''))
+        with find_app, sample as sample_workload, override_settings(CELERY_STARTER_WORKERS=workers):
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            self.call_command("--worker '-P auto' --pool_sample proj.add")
+            sample_workload.assert_not_called()
+
+            with mock.patch.dict(os.environ, {'RUN_MAIN': 'true'}):
+                self.cmd = Command(stdout=self.out, stderr=self.err)
+                self.call_command("--worker '-P auto' --pool_sample proj.add")
+            sample_workload.assert_called_once_with(mock.ANY, ['proj.add'])
+            self.assertIn('sampled tasks are io-bound, 10% of the time on CPU', self.out.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_19(self, mocker: mock.MagicMock):
+        """
+        Every worker of the CELERY_STARTER_WORKERS topology gets its own node name,
+        queues, pool and concurrency on top of the worker command.
+        """
+        workers = [
+            {'name': 'default', 'queues': ['celery', 'mail']},
+            {'name': 'heavy', 'queues': 'reports', 'pool': 'threads', 'concurrency': 8},
+        ]
+        with override_settings(CELERY_STARTER_WORKERS=workers):
+            self.call_command("--worker '-l DEBUG' --exclude_flower")
+
+        base_cmd = [*self.default_worker_cmd[:6], 'DEBUG', *self.default_worker_cmd[7:]]
+        self.assertEqual(
+            self.cmd.constr.worker_cmds,
+            {
+                'worker-default': [*base_cmd, '-n', 'default@%h', '-Q', 'celery,mail'],
+                'worker-heavy': [
+                    *base_cmd[:-2],
+                    '-n',
+                    'heavy@%h',
+                    '-Q',
+                    'reports',
+                    '-P',
+                    'threads',
+                    '-c',
+                    '8',
+                ],
+            },
+        )
+        self.assertEqual(list(self.cmd.cmds), ['worker-default', 'worker-heavy', 'beat'])
+
+        self.cmd.processes = dict.fromkeys(self.cmd.cmds, mock.MagicMock())
+        self.cmd.beat_files = set()
+        self.assertEqual(
+            self.cmd.affected_processes('/proj/tasks.py'), ['worker-default', 'worker-heavy']
+        )
+
+        with override_settings(CELERY_STARTER_WORKERS=[{'queues': 'celery'}]):
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            with self.assertRaises(InvalidWorkerSpecError):
+                self.call_command()
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_20(self, mocker: mock.MagicMock):
+        """
+        Beat is started only when the worker is ready, a worker which has exited at startup
+        is reported and beat waits for the next restart of the worker.
+        """
+        self.call_command('--exclude_flower --startup_timeout 5')
+        processes = {'worker': mock.MagicMock(), 'beat': mock.MagicMock()}
+
+        def spawn(name, cmd):
+            self.cmd.readiness.reset(name)
+            return processes[name]
+
+        spawn_patch = mock.patch.object(self.cmd, 'spawn', side_effect=spawn)
+        read_pid_file = mock.patch.object(self.cmd, 'read_pid_file')
+        exists = mock.patch('os.path.exists', return_value=True)
+        with spawn_patch as spawn_mock, read_pid_file, exists:
+            processes['worker'].poll.return_value = 1
+            self.cmd.run_celery()
+            self.assertEqual([c.args[0] for c in spawn_mock.call_args_list], ['worker'])
+            self.assertIn('worker is not ready: exited with code 1', self.err.getvalue())
+            self.assertEqual(self.cmd.held_back, {'beat'})
+
+            processes['worker'].poll.return_value = None
+            processes['beat'].poll.return_value = None
+            processes['worker'].poll.side_effect = lambda: self.cmd.readiness.on_line(
+                'worker', '[INFO/MainProcess] celery@host ready.'
+            )
+            processes['beat'].poll.side_effect = lambda: self.cmd.readiness.on_line(
+                'beat', '[INFO/MainProcess] beat: Starting...'
+            )
+            self.cmd.reload_processes({'tasks.py'})
+
+        self.assertEqual([c.args[0] for c in spawn_mock.call_args_list], ['worker', 'worker', 'beat'])
+        self.assertEqual(self.cmd.held_back, set())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_21(self, mocker: mock.MagicMock):
+        """
+        The worker is restarted only by the files it has imported,
+        by any file until it has reported them or with --restart_on_any_change.
+        """
+        self.call_command('--exclude_flower')
+        self.cmd.processes = dict.fromkeys(('worker', 'beat'), mock.MagicMock())
+        self.cmd.beat_files = set()
+        self.cmd.imports_dir = '/tmp/runcelery'
+
+        with mock.patch(
+            'src.celery_starter._bootstrap.read_imports', return_value=frozenset({'/proj/tasks.py'})
+        ):
+            self.assertEqual(self.cmd.affected_processes('/proj/tasks.py'), ['worker'])
+            self.assertEqual(self.cmd.affected_processes('/proj/views.py'), [])
+            self.cmd.options['restart_on_any_change'] = True
+            self.assertEqual(self.cmd.affected_processes('/proj/views.py'), ['worker'])
+
+        self.cmd.options['restart_on_any_change'] = False
+        with mock.patch('src.celery_starter._bootstrap.read_imports', return_value=None):
+            self.assertEqual(self.cmd.affected_processes('/proj/views.py'), ['worker'])
+
+        # The imports of the worker are read once for the whole batch of the changed files.
+        files = [f'/proj/module_{i}.py' for i in range(100)]
+        with mock.patch(
+            'src.celery_starter._bootstrap.read_imports', return_value=frozenset(files[:2])
+        ) as read_imports:
+            self.assertEqual(
+                self.cmd.changed_files_by_process(files),
+                {'worker': ['/proj/module_0.py', '/proj/module_1.py']},
+            )
+        read_imports.assert_called_once()
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_22(self, mocker: mock.MagicMock):
+        """
+        With --hot_reload the changed task module is reloaded in the running worker,
+        the worker is restarted when the reload fails or the models change.
+        """
+        self.call_command("--hot_reload --exclude_beat --exclude_flower --worker '-P threads'")
+        self.cmd.processes = {'worker': mock.MagicMock()}
+        self.cmd.beat_files = set()
+        self.cmd.imports_dir = '/tmp/runcelery'
+        self.cmd.app = app = mock.MagicMock()
+        node = self.cmd.worker_node('worker')
+        imported = frozenset({'/proj/tasks.py', '/proj/models.py'})
+
+        read_imports = mock.patch('src.celery_starter._bootstrap.read_imports', return_value=imported)
+        stop_patch = mock.patch.object(self.cmd, 'stop_process')
+        start_patch = mock.patch.object(self.cmd, 'start_processes')
+        with read_imports, stop_patch as stop_process, start_patch as start_processes:
+            app.control.broadcast.return_value = [{node: {'ok': 'tasks'}}]
+            self.cmd.reload_processes({'/proj/tasks.py'})
+            app.control.broadcast.assert_called_once_with(
+                'starter_reload',
+                arguments={'files': ['/proj/tasks.py']},
+                destination=[node],
+                reply=True,
+                timeout=5.0,
+            )
+            stop_process.assert_not_called()
+            start_processes.assert_not_called()
+            self.assertIn('Modules of worker are reloaded without a restart: tasks', self.out.getvalue())
+            self.assertNotIn('Restart worker', self.out.getvalue())
+            self.assertNotIn('ready in', self.out.getvalue())
+
+            app.control.broadcast.return_value = [{node: {'error': 'SyntaxError'}}]
+            self.cmd.reload_processes({'/proj/tasks.py'})
+            stop_process.assert_called_once_with('worker')
+            self.assertIn('(SyntaxError)', self.out.getvalue())
+            self.assertIn('Restart worker', self.out.getvalue())
+
+            app.control.broadcast.reset_mock()
+            self.cmd.reload_processes({'/proj/models.py'})
+            app.control.broadcast.assert_not_called()
+            self.assertEqual(stop_process.call_count, 2)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_23(self, mocker: mock.MagicMock):
+        """
+        The inotify watcher gets the include and exclude globs,
+        the reloader of Django is used with --watcher django or where inotify is not available.
+        """
+        self.call_command("--watch_include '**/tasks.py' --watch_exclude 'static/**'")
+        with mock.patch('src.celery_starter._inotify.is_supported', return_value=True):
+            reloader = self.cmd.get_reloader()
+        self.assertEqual(reloader.include, ('**/tasks.py',))
+        self.assertEqual(reloader.exclude, ('static/**',))
+
+        with mock.patch('src.celery_starter._inotify.is_supported', return_value=False):
+            self.assertIsNone(self.cmd.get_reloader())
+            self.cmd.options['watcher'] = 'inotify'
+            self.assertIsNone(self.cmd.get_reloader())
+            self.assertIn('only available on Linux', self.err.getvalue())
+
+        self.cmd.options['watcher'] = 'django'
+        self.assertIsNone(self.cmd.get_reloader())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_24(self, mocker: mock.MagicMock):
+        """
+        The process which uses more memory than --max_memory is gracefully restarted,
+        the usage before and after the restart is reported.
+        """
+        self.call_command('--exclude_beat --exclude_flower --max_memory 100 --drain_timeout 30')
+        self.cmd.processes = {'worker': mock.MagicMock(pid=100)}
+        self.cmd.started_at = {'worker': 0.0}
+        before = _resources.Usage(rss=200 * 2**20, cpu=5.0, fds=20, processes=1)
+        after = _resources.Usage(rss=80 * 2**20, cpu=1.0, fds=18, processes=1)
+
+        self.assertIsNone(self.cmd.recycle_reason('worker', after))
+        reason = self.cmd.recycle_reason('worker', before)
+        self.assertEqual(reason, 'uses more than 100 MiB')
+
+        def start_processes(names):
+            self.cmd.processes['worker'] = mock.MagicMock(pid=101)
+
+        stop_patch = mock.patch.object(self.cmd, 'stop_process')
+        start_patch = mock.patch.object(self.cmd, 'start_processes', side_effect=start_processes)
+        sample = mock.patch.object(self.cmd.monitor, 'sample', return_value={'worker': after})
+        with stop_patch as stop_process, start_patch, sample:
+            self.cmd.recycle('worker', reason, before)
+
+        stop_process.assert_called_once_with('worker', 30.0)
+        self.assertIn(
+            'worker is restarted, before: 200 MiB, 5% CPU, 20 fd, after: 80 MiB, 1% CPU, 18 fd',
+            self.out.getvalue(),
+        )
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_25(self, mocker: mock.MagicMock):
+        """The restarts, the changed files and the state of the processes are exposed as metrics."""
+        self.call_command('--exclude_flower')
+        self.cmd.processes = dict.fromkeys(('worker', 'beat'), mock.MagicMock())
+        self.cmd.beat_files = set()
+        self.cmd.started_at = dict.fromkeys(('worker', 'beat'), 0.0)
+        self.cmd.usages = {'worker': _resources.Usage(rss=1024, cpu=50.0, fds=10, processes=1)}
+
+        with mock.patch.object(self.cmd, 'stop_process'), mock.patch.object(self.cmd, 'start_processes'):
+            self.cmd.reload_processes({'tasks.py', 'views.py'})
+        self.cmd.observe_restart({'process': 'worker', 'duration': 0.3})
+        metrics = self.cmd.metrics.render()
+
+        self.assertIn('runcelery_restarts_total{process="worker",reason="file_change"} 1', metrics)
+        self.assertIn('runcelery_reload_changed_files_bucket{le="2"} 1', metrics)
+        self.assertIn('runcelery_restart_duration_seconds_bucket{process="worker",le="0.5"} 1', metrics)
+        self.assertIn('runcelery_process_rss_bytes{process="worker"} 1024', metrics)
+        self.assertIn('runcelery_process_uptime_seconds{process="beat"}', metrics)
+        self.assertNotIn('runcelery_process_rss_bytes{process="beat"}', metrics)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_26(self, mocker: mock.MagicMock):
+        """--bench runs every pool on the synthetic task and exits without starting celery."""
+        from src.celery_starter import _bench
+
+        results = [
+            _bench.Result(_bench.Candidate('solo', 1), 10, 5.0, 0.2, 0.4),
+            _bench.Result(_bench.Candidate('threads', 8), 10, 40.0, 0.05, 0.1),
+        ]
+        with mock.patch.object(_bench, 'run_candidate', side_effect=results) as run_candidate:
+            self.call_command('--bench', '--bench_task', 'io', '--bench_pools', 'solo,threads:8')
+
+        mocker.assert_not_called()
+        self.assertEqual(
+            [call.args[1:] for call in run_candidate.call_args_list],
+            [
+                (_bench.Candidate('solo', 1), 'celery_starter.bench_io', 200),
+                (_bench.Candidate('threads', 8), 'celery_starter.bench_io', 200),
+            ],
+        )
+        self.assertEqual(run_candidate.call_args.args[0], self.default_worker_cmd)
+        self.assertIn('-P threads -c 8', self.out.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_27(self, mocker: mock.MagicMock):
+        """--profile_tasks makes only the workers load the profiling plugin."""
+        self.call_command("--profile_tasks 'proj.*' --profile_sample 0.5 --profile_dir /tmp/profiles")
+
+        self.assertEqual(
+            self.cmd.bootstrap_env('worker'),
+            {
+                'CELERY_STARTER_PROFILE_DIR': '/tmp/profiles',
+                'CELERY_STARTER_PROFILE_TASKS': 'proj.*',
+                'CELERY_STARTER_PROFILE_SAMPLE': '0.5',
+            },
+        )
+        self.assertEqual(self.cmd.bootstrap_env('beat'), {})
+        self.assertIn('proj.* are profiled', self.out.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_28(self, mocker: mock.MagicMock):
+        """With --events the events of the workers are consumed and their summary is printed."""
+        self.call_command('--events --events_interval 5 --exclude_flower')
+        self.cmd.app = mock.MagicMock()
+
+        with mock.patch('src.celery_starter._events.consume') as consume:
+            self.cmd.events_loop()
+        app, monitor, interval, write, on_error = consume.call_args.args
+        self.assertEqual((app, monitor, interval), (self.cmd.app, self.cmd.events, 5.0))
+
+        write(['task  rate/s', 'proj.add  0.50'])
+        on_error('ConnectionError')
+        self.assertIn('proj.add  0.50', self.out.getvalue())
+        self.assertIn('ConnectionError', self.err.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_29(self, mocker: mock.MagicMock):
+        """--local_broker points the worker and beat to the filesystem broker and skips flower."""
+        self.addCleanup(shutil.rmtree, '/tmp/runcelery-broker', ignore_errors=True)
+        with mock.patch.dict('os.environ'):
+            self.call_command('--local_broker /tmp/runcelery-broker')
+
+            self.assertEqual(os.environ['CELERY_BROKER_URL'], 'filesystem://')
+        self.assertEqual(list(self.cmd.cmds), ['worker', 'beat'])
+        self.assertEqual(
+            self.cmd.bootstrap_env('beat'), {'CELERY_STARTER_LOCAL_BROKER': '/tmp/runcelery-broker'}
+        )
+        self.assertIn('Local broker: /tmp/runcelery-broker', self.out.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_30(self, mocker: mock.MagicMock):
+        """--cpu_shards starts one worker per CPU set with its own node name, pinned by the bootstrap."""
+        self.call_command("--cpu_shards 0,2-3 --worker '-P prefork'")
+
+        self.assertEqual(
+            self.cmd.cmds['worker-cpu0'],
+            [*self.default_worker_cmd[:-2], '-P', 'prefork', '-n', 'celery-cpu0@%h', '-c', '1'],
+        )
+        self.assertEqual(list(self.cmd.cmds)[:2], ['worker-cpu0', 'worker-cpu2-3'])
+        self.assertEqual(self.cmd.cmds['worker-cpu2-3'][-4:], ['-n', 'celery-cpu2-3@%h', '-c', '2'])
+        self.assertEqual(self.cmd.bootstrap_env('worker-cpu2-3')['CELERY_STARTER_CPUS'], '2-3')
+
+        # The solo pool runs one task at a time, the concurrency is not set.
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        self.call_command('--cpu_shards 2-3')
+        self.assertEqual(
+            self.cmd.cmds['worker-cpu2-3'], [*self.default_worker_cmd, '-n', 'celery-cpu2-3@%h']
+        )
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        with self.assertRaises(InvalidCpuShardsError):
+            self.call_command('--cpu_shards 3-1')
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_31(self, mocker: mock.MagicMock):
+        """--backlog processes the queues of the workers before they start and reports the counts."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.call_command("--backlog newest --backlog_keep 5 --worker '-Q mail,reports'")
+        self.cmd.app = mock.MagicMock()
+        self.cmd.BASE_DIR = directory + os.sep
+        marker = os.path.join(directory, 'runcelery-backlog.json')
+
+        with mock.patch('src.celery_starter._backlog.Backlog') as backlog:
+            backlog.return_value.keep_newest.return_value = {'mail': (95, 5), 'reports': (0, 1)}
+            self.cmd.control_backlog()
+
+        backlog.assert_called_once_with(self.cmd.app, ['mail', 'reports'], marker)
+        backlog.return_value.keep_newest.assert_called_once_with(5)
+        backlog.return_value.parked.assert_not_called()
+        self.assertIn('mail: 95 messages are dropped, 5 newest are kept', self.out.getvalue())
+
+        # Without the marker of the previous run the broker is not asked for the parked messages.
+        self.cmd.options['backlog'] = 'keep'
+        with mock.patch('src.celery_starter._backlog.Backlog') as backlog:
+            self.cmd.control_backlog()
+        backlog.assert_not_called()
+
+        # The messages left parked by the previous run are drained in any mode.
+        with open(marker, 'w') as file:
+            json.dump(['mail'], file)
+        thread_patch = mock.patch('threading.Thread')
+        with mock.patch('src.celery_starter._backlog.Backlog') as backlog, thread_patch as thread:
+            backlog.return_value.parked.return_value = {'mail': 7}
+            self.cmd.control_backlog()
+        self.assertIn(mock.call(self.cmd.app, ['mail']), backlog.call_args_list)
+        self.assertEqual(backlog.call_args_list[-1], mock.call(self.cmd.app, ['mail'], marker))
+        thread.return_value.start.assert_called_once_with()
+        self.assertIn(
+            'mail: 7 messages deferred by the previous run are replayed at 10.0 per second',
+            self.out.getvalue(),
+        )
+
+        # The marker without parked messages is removed.
+        with mock.patch('src.celery_starter._backlog.Backlog') as backlog, thread_patch as thread:
+            backlog.return_value.parked.return_value = {}
+            self.cmd.control_backlog()
+        thread.assert_not_called()
+        self.assertFalse(os.path.exists(marker))
+
+        self.cmd.options['backlog'] = 'drain'
+        with mock.patch('src.celery_starter._backlog.Backlog') as backlog:
+            backlog.return_value.park.side_effect = ConnectionError('refused')
+            self.cmd.control_backlog()
+        self.assertIn('The backlog is not processed: ConnectionError: refused', self.err.getvalue())
+
+        for rate in ('0', '-1', 'fast'):
+            with self.assertRaises(CommandError):
+                self.call_command(f'--backlog drain --backlog_rate {rate}')
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_32(self, mocker: mock.MagicMock):
+        """
+        --beat_catchup runs beat with the scheduler of runcelery and passes the policy to it,
+        the scheduler passed in the beat command is kept.
+        """
+        self.call_command('--beat_catchup spread --beat_catchup_window 120')
+
+        self.assertEqual(
+            self.cmd.constr.beat_cmd,
+            [
+                *self.default_beat_cmd,
+                '-S',
+                'celery_starter._beat:Scheduler',
+                '-s',
+                'celerybeat-schedule.sqlite3',
+            ],
+        )
+        self.assertEqual(
+            self.cmd.bootstrap_env('beat'),
+            {'CELERY_STARTER_BEAT_CATCHUP': 'spread', 'CELERY_STARTER_BEAT_CATCHUP_WINDOW': '120.0'},
+        )
+        self.assertEqual(self.cmd.bootstrap_env('worker'), {})
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        scheduler = 'django_celery_beat.schedulers:DatabaseScheduler'
+        self.call_command(f"--beat_catchup skip --beat '-S {scheduler}'")
+        self.assertIn(scheduler, self.cmd.constr.beat_cmd)
+        self.assertNotIn('celery_starter._beat:Scheduler', self.cmd.constr.beat_cmd)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_33(self, mocker: mock.MagicMock):
+        """The pid from the pidfile of beat is killed only when it is still a beat process."""
+        self.call_command()
+        listdir = mock.patch('os.listdir', return_value=[CELERY_BEAT_PID_FILENAME])
+        pid_file = mock.patch('builtins.open', mock.mock_open(read_data='4242\n'))
+        is_beat = mock.patch('src.celery_starter._beat.is_beat_process', side_effect=[False, True, True])
+        remove_patch, kill_patch = mock.patch('os.remove'), mock.patch('os.kill')
+        with listdir, pid_file, is_beat, remove_patch as remove, kill_patch as kill:
+            self.cmd.read_pid_file(CELERY_BEAT_PID_FILENAME)
+            kill.assert_not_called()
+            self.cmd.read_pid_file(CELERY_BEAT_PID_FILENAME)
+            kill.assert_called_once_with(4242, mock.ANY)
+            # The running zygote has the same command line as beat forked by it.
+            self.cmd.zygote = mock.MagicMock(pid=4242)
+            self.cmd.read_pid_file(CELERY_BEAT_PID_FILENAME)
+            kill.assert_called_once_with(4242, mock.ANY)
+        self.assertEqual(remove.call_count, 3)
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_34(self, mocker: mock.MagicMock):
+        """--grep prints the archived lines of the task instead of running celery."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        task_id = '6f1d3c2e-8a4b-4c5d-9e6f-7a8b9c0d1e2f'
+        archive = _archive.LogArchive(directory)
+        archive.append(
+            'worker', f'[2026-10-18 13:34:00,962: INFO/MainProcess] Task proj.a[{task_id}] received'
+        )
+        archive.append(
+            'beat', '[2026-10-18 13:34:00,963: INFO/MainProcess] Scheduler: Sending due task a'
+        )
+        archive.close()
+
+        self.call_command(f'--grep {task_id} --archive {directory}')
+
+        mocker.assert_not_called()
+        output = self.out.getvalue()
+        self.assertIn(
+            f'[worker] [2026-10-18 13:34:00,962: INFO/MainProcess] Task proj.a[{task_id}]', output
+        )
+        self.assertNotIn('[beat]', output)
+        self.assertIn('1 lines found', output)
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        self.call_command(f'--grep --grep_since yesterday --archive {directory}')
+        self.assertIn('The log archive is not searched', self.err.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_35(self, mocker: mock.MagicMock):
+        """--trace writes the timeline of the tasks without printing the summary of --events."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'trace.json')
+        self.call_command(f'--trace {path} --exclude_flower')
+        self.cmd.events.add_listener(self.cmd.trace.on_event)
+
+        for kind, moment in (('task-started', 100.0), ('task-succeeded', 100.5)):
+            self.cmd.events.on_event({'type': kind, 'uuid': 'a', 'timestamp': moment, 'hostname': 'w@h'})
+        self.cmd.write_events_summary(['task  rate/s'])
+        self.cmd.write_trace()
+
+        self.assertNotIn('rate/s', self.out.getvalue())
+        with open(path) as file:
+            self.assertEqual(
+                len([item for item in json.load(file)['traceEvents'] if item['ph'] == 'X']), 1
+            )
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_36(self, mocker: mock.MagicMock):
+        """--record is passed to the workers, --replay saves the baseline, then fails on regressions."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        traffic = os.path.join(directory, 'traffic.jsonl')
+        baseline = os.path.join(directory, 'baseline.json')
+        self.call_command(f'--record {traffic} --exclude_beat --exclude_flower')
+        self.assertEqual(self.cmd.bootstrap_env('worker')['CELERY_STARTER_RECORD_FILE'], traffic)
+        mocker.reset_mock()
+
+        with open(traffic, 'w') as file:
+            file.write('{"moment": 1.0, "task": "proj.add", "args": [1, 2], "kwargs": {}}\n')
+        reports = [_replay.TaskReport(_replay.ALL, 1, 0, 10.0, 0.1, 0.1)]
+        command = f'--replay {traffic} --replay_speed 0 --replay_baseline {baseline}'
+        with mock.patch.object(_replay, 'replay', return_value=(reports, '')) as replay:
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            self.call_command(command)
+            self.assertEqual(
+                replay.call_args.args,
+                (self.default_worker_cmd, [_replay.Record(1.0, 'proj.add', [1, 2], {})], 0.0),
+            )
+            self.assertTrue(os.path.exists(baseline))
+
+            replay.return_value = ([reports[0]._replace(p50=0.2)], '')
+            self.cmd = Command(stdout=self.out, stderr=self.err)
+            with self.assertRaises(CommandError):
+                self.call_command(command)
+
+        mocker.assert_not_called()
+        self.assertIn('<all>: p50 0.1 -> 0.2', self.err.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_37(self, mocker: mock.MagicMock):
+        """Only the processes from the pid file of the previous run are stopped at startup."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+        self.call_command('--exclude_flower')
+        self.cmd.pid_file = os.path.join(directory, 'runcelery.pid')
+        self.cmd.processes = {'worker': child}
+        self.cmd.save_pids()
+        with open(self.cmd.pid_file, 'a') as file:
+            # Another process has got the pid of beat.
+            file.write(f'beat {os.getpid()} 1.0\nbroken line\n')
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        self.cmd.pid_file = os.path.join(directory, 'runcelery.pid')
+        self.cmd.stop_previous_processes(timeout=10)
+
+        self.assertEqual(child.wait(timeout=5), -signal.SIGTERM)
+        self.assertFalse(os.path.exists(self.cmd.pid_file))
+        self.assertIn('previous run: worker\n', self.out.getvalue())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_38(self, mocker: mock.MagicMock):
+        """
+        Beat with a log level hiding its startup lines is ready after the first tick of its scheduler,
+        its relative pidfile is looked for in the working directory.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.call_command("--beat '-l WARNING'")
+        self.cmd.imports_dir = directory
+        ready_file = os.path.join(directory, 'beat.ready')
+        self.assertEqual(self.cmd.bootstrap_env('beat')[_bootstrap.BEAT_READY_FILE_ENV], ready_file)
+
+        with mock.patch('os.getcwd', return_value=directory):
+            probe = self.cmd.readiness_probe('beat')
+        self.assertFalse(probe())
+        open(ready_file, 'w').close()
+        self.assertFalse(probe())
+        open(os.path.join(directory, CELERY_BEAT_PID_FILENAME), 'w').close()
+        self.assertTrue(probe())
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        self.call_command()
+        self.cmd.imports_dir = directory
+        self.assertNotIn(_bootstrap.BEAT_READY_FILE_ENV, self.cmd.bootstrap_env('beat'))
+        with mock.patch('os.getcwd', return_value=directory):
+            probe = self.cmd.readiness_probe('beat')
+        self.assertFalse(probe())
+        self.cmd.readiness.reset('beat')
+        self.cmd.readiness.on_line('beat', 'beat: Starting...')
+        self.assertTrue(probe())
+
+    @override_proj_constants
+    @mocked_run_with_reloader
+    def test_cmd_39(self, mocker: mock.MagicMock):
+        """
+        Without the start time the processes of the previous run are matched by the pid with a warning,
+        with --debug the outcome for every process is printed.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+        exited = subprocess.Popen([sys.executable, '-c', ''])
+        exited.wait()
+        self.call_command('--exclude_flower')
+        self.cmd.pid_file = os.path.join(directory, 'runcelery.pid')
+        self.cmd.processes = {'worker': child}
+        with mock.patch.object(_resources, 'start_time', return_value=None):
+            self.cmd.save_pids()
+        with open(self.cmd.pid_file) as file:
+            self.assertEqual(file.read(), f'worker {child.pid} -\n')
+        with open(self.cmd.pid_file, 'a') as file:
+            file.write(f'beat {exited.pid} -\n')
+
+        self.cmd = Command(stdout=self.out, stderr=self.err)
+        self.cmd.pid_file = os.path.join(directory, 'runcelery.pid')
+        # The processes of the previous run are not children of this one, they are reaped by init.
+        is_running = mock.patch.object(
+            _resources, 'is_running', side_effect=lambda pid: pid == child.pid and child.poll() is None
+        )
+        with mock.patch.object(_resources, 'has_start_time', return_value=False), is_running:
+            self.cmd.stop_previous_processes(timeout=10, debug=True)
+
+        self.assertEqual(child.wait(timeout=5), -signal.SIGTERM)
+        self.assertFalse(os.path.exists(self.cmd.pid_file))
+        self.assertIn(L.stop_previous_pid_only_msg, self.err.getvalue())
+        self.assertIn(
+            L.stop_previous_debug_msg % ('worker', child.pid, L.stopped_outcome), self.out.getvalue()
+        )
+        self.assertIn(
+            L.stop_previous_debug_msg % ('beat', exited.pid, L.not_running_outcome), self.out.getvalue()
+        )
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import os
+import unittest
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _affinity
+
+
+class AffinityTests(SimpleTestCase):
+    def test_parse_cpu_shards(self):
+        """Every item is the CPU set of a shard, auto is one shard per available CPU."""
+        self.assertEqual(_affinity.parse_cpu_shards('0, 2,4-7'), [(0,), (2,), (4, 5, 6, 7)])
+        self.assertEqual(_affinity.format_cpus((4, 5, 6, 7)), '4-7')
+        with mock.patch.object(_affinity, 'available_cpus', return_value=[1, 3]):
+            self.assertEqual(_affinity.parse_cpu_shards('auto'), [(1,), (3,)])
+        for spec in ('x', '3-1'):
+            with self.assertRaises(ValueError):
+                _affinity.parse_cpu_shards(spec)
+
+    @unittest.skipUnless(_affinity.is_supported(), 'sched_setaffinity is not available')
+    def test_pin(self):
+        """The process is pinned to the CPUs of the shard."""
+        cpus = os.sched_getaffinity(0)
+        self.addCleanup(os.sched_setaffinity, 0, cpus)
+        cpu = min(cpus)
+
+        _affinity.pin(str(cpu))
+
+        self.assertEqual(os.sched_getaffinity(0), {cpu})
@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _archive
+
+
+class LogArchiveTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def archive(self, **kwargs):
+        archive = _archive.LogArchive(self.directory, **kwargs)
+        self.addCleanup(archive.close)
+        return archive
+
+    def append(self, archive, lines, start=1000.0):
+        for i, (name, line) in enumerate(lines):
+            with mock.patch('time.time', return_value=start + i):
+                archive.append(name, line)
+        archive.flush()
+
+    def test_search_by_task_id(self):
+        """The lines of the task and its traceback are found, the other lines are not read."""
+        task_id, other_id = str(uuid.uuid4()), str(uuid.uuid4())
+        archive = self.archive()
+        self.append(
+            archive,
+            [
+                (
+                    'worker',
+                    f'[2026-10-18 13:34:00,962: INFO/MainProcess] Task proj.a[{task_id}] received',
+                ),
+                ('beat', '[2026-10-18 13:34:00,963: INFO/MainProcess] Scheduler: Sending due task a'),
+                (
+                    'worker',
+                    f'[2026-10-18 13:34:01,000: INFO/MainProcess] Task proj.b[{other_id}] received',
+                ),
+                (
+                    'worker',
+                    f'[2026-10-18 13:34:02,000: ERROR/MainProcess] Task proj.a[{task_id}] raised',
+                ),
+                ('worker', 'Traceback (most recent call last):'),
+                (
+                    'worker',
+                    f'[2026-10-18 13:34:03,000: INFO/MainProcess] Task proj.b[{other_id}] succeeded',
+                ),
+            ],
+        )
+
+        matches = list(_archive.search(self.directory, task_id=task_id))
+
+        self.assertEqual(
+            [(match.timestamp, match.process, match.level) for match in matches],
+            [(1000.0, 'worker', 20), (1003.0, 'worker', 40), (1004.0, 'worker', 40)],
+        )
+        self.assertEqual(matches[2].line, 'Traceback (most recent call last):')
+        with self.assertRaises(ValueError):
+            list(_archive.search(self.directory, task_id='not-a-uuid'))
+
+    def test_search_by_time_and_level(self):
+        archive = self.archive()
+        self.append(
+            archive,
+            [
+                ('worker', f'[2026-10-18 13:34:00,000: {level}/MainProcess] line {i}')
+                for i, level in enumerate(['INFO', 'WARNING', 'INFO', 'ERROR', 'INFO'])
+            ],
+        )
+
+        lines = [match.line[-6:] for match in _archive.search(self.directory, since=1001, until=1004)]
+        self.assertEqual(lines, ['line 1', 'line 2', 'line 3'])
+        lines = [match.line[-6:] for match in _archive.search(self.directory, level=30)]
+        self.assertEqual(lines, ['line 1', 'line 3'])
+
+    def test_segments(self):
+        """The segments roll over, the oldest are removed, every session starts a new one."""
+        archive = self.archive(segment_bytes=20, max_segments=3)
+        self.append(archive, [('worker', f'line {i:02d} of the worker') for i in range(5)])
+        archive.close()
+        self.assertEqual(_archive.segments(self.directory), [3, 4, 5])
+
+        archive = self.archive(max_segments=3)
+        self.append(archive, [('beat', 'line of beat')], start=2000.0)
+
+        self.assertEqual(_archive.segments(self.directory), [4, 5, 6])
+        self.assertEqual(
+            [(match.process, match.line) for match in _archive.search(self.directory, since=1003)],
+            [
+                ('worker', 'line 03 of the worker'),
+                ('worker', 'line 04 of the worker'),
+                ('beat', 'line of beat'),
+            ],
+        )
+
+    def test_partial_write(self):
+        """A record whose line is not flushed yet is skipped."""
+        archive = self.archive()
+        self.append(archive, [('worker', 'first'), ('worker', 'second')])
+        with open(_archive.segment_path(self.directory, 1, '.log'), 'r+b') as file:
+            file.truncate(8)
+        with open(_archive.segment_path(self.directory, 1, '.idx'), 'ab') as file:
+            file.write(b'\0' * 10)
+
+        self.assertEqual([match.line for match in _archive.search(self.directory)], ['first'])
+
+    def test_parse_time(self):
+        self.assertEqual(_archive.parse_time('15m', now=10000.0), 9100.0)
+        self.assertEqual(_archive.parse_time('2h', now=10000.0), 2800.0)
+        self.assertEqual(
+            _archive.parse_time('2026-10-18 13:30', now=0),
+            _archive.datetime(2026, 10, 18, 13, 30).timestamp(),
+        )
+        with self.assertRaises(ValueError):
+            _archive.parse_time('yesterday', now=0)
+
+    def test_archive_dir(self):
+        self.assertIsNone(_archive.archive_dir('/proj', None))
+        self.assertEqual(
+            _archive.archive_dir('/proj', True), os.path.join('/proj', '.runcelery', 'logs')
+        )
+        self.assertEqual(_archive.archive_dir('/proj', 'logs'), os.path.join('/proj', 'logs'))
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import uuid
+from unittest import mock
+
+from celery import Celery
+from django.test import SimpleTestCase
+from src.celery_starter import _backlog
+
+
+class BacklogTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        # The queues of the memory transport are shared by the connections of the process.
+        self.queue = f'backlog-{uuid.uuid4()}'
+        self.app = Celery('proj_app', broker='memory://', set_as_current=False)
+        self.backlog = _backlog.Backlog(self.app, [self.queue, self.queue])
+
+    def enqueue(self, *names):
+        return [self.app.send_task(name, queue=self.queue).id for name in names]
+
+    def queued(self, queue=None):
+        queue = queue or self.queue
+        with self.app.connection_for_write() as connection:
+            messages = list(self.backlog._messages(connection.default_channel, queue))
+            for message in messages:
+                message.ack()
+        return [(_backlog.task_name(message), message.headers['id']) for message in messages]
+
+    def test_purge(self):
+        """The queued messages are dropped."""
+        self.enqueue('proj.a', 'proj.b')
+
+        self.assertEqual(self.backlog.purge(), {self.queue: 2})
+        self.assertEqual(self.queued(), [])
+
+    def test_keep_newest(self):
+        """Only the newest messages of every task are kept, in their order."""
+        ids = self.enqueue('proj.a', 'proj.b', 'proj.a', 'proj.a', 'proj.b')
+
+        self.assertEqual(self.backlog.keep_newest(1), {self.queue: (3, 2)})
+        self.assertEqual(self.queued(), [('proj.a', ids[3]), ('proj.b', ids[4])])
+
+    def test_drain(self):
+        """The backlog is parked and replayed at the rate, the new messages are not delayed."""
+        ids = self.enqueue('proj.a', 'proj.b')
+
+        self.assertEqual(self.backlog.park(), {self.queue: 2})
+        new_ids = self.enqueue('proj.c')
+        self.assertEqual(self.queued(), [('proj.c', new_ids[0])])
+
+        sleep = mock.MagicMock()
+        self.assertEqual(self.backlog.drain(4.0, sleep=sleep), {self.queue: 2})
+        self.assertEqual(sleep.call_args_list, [mock.call(0.25)] * 2)
+        self.assertEqual(self.queued(), [('proj.a', ids[0]), ('proj.b', ids[1])])
+        self.assertEqual(self.queued(self.queue + _backlog.PARKING_SUFFIX), [])
+
+    def test_parked(self):
+        """
+        Only the parking queues with the messages are counted,
+        the marker lists the parked queues until they are drained.
+        """
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        marker = os.path.join(directory, 'backlog.json')
+        backlog = _backlog.Backlog(self.app, [self.queue], marker)
+        self.assertEqual(backlog.parked(), {})
+        self.assertEqual(_backlog.read_marker(marker), [])
+
+        self.enqueue('proj.a', 'proj.b')
+        backlog.park()
+        self.assertEqual(backlog.parked(), {self.queue: 2})
+        self.assertEqual(_backlog.read_marker(marker), [self.queue])
+
+        backlog.drain(1000.0, sleep=mock.MagicMock())
+        self.assertEqual(backlog.parked(), {})
+        self.assertFalse(os.path.exists(marker))
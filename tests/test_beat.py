@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import time
+from unittest import mock
+
+from celery import Celery
+from django.test import SimpleTestCase
+from src.celery_starter import _beat, _bootstrap
+
+
+class SchedulerTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.app = Celery('proj_app', broker='memory://', set_as_current=False)
+        self.app.conf.result_expires = None
+        self.app.conf.beat_schedule = {
+            'a': {'task': 'proj.a', 'schedule': 60.0},
+            'b': {'task': 'proj.b', 'schedule': 60.0},
+        }
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'celerybeat-schedule.sqlite3')
+
+    def scheduler(self, catchup='once', window=60.0):
+        env = {_bootstrap.BEAT_CATCHUP_ENV: catchup, _bootstrap.BEAT_CATCHUP_WINDOW_ENV: str(window)}
+        with mock.patch.dict(os.environ, env):
+            scheduler = _beat.Scheduler(app=self.app, schedule_filename=self.path)
+        self.addCleanup(scheduler.close)
+        return scheduler
+
+    def store(self, **last_runs):
+        with sqlite3.connect(self.path) as db:
+            db.execute(
+                'CREATE TABLE IF NOT EXISTS entries '
+                '(name TEXT PRIMARY KEY, last_run_at REAL NOT NULL, total_run_count INTEGER NOT NULL)'
+            )
+            db.executemany('INSERT OR REPLACE INTO entries VALUES (?, ?, 1)', list(last_runs.items()))
+
+    def test_runs_survive_restart(self):
+        """The sent run is stored at once, the restarted scheduler neither repeats nor loses it."""
+        scheduler = self.scheduler()
+        entry = scheduler.reserve(scheduler.schedule['a'])
+        # A crash: the scheduler is not closed.
+
+        restarted = self.scheduler()
+        stored = restarted.schedule['a']
+        self.assertEqual(stored.total_run_count, 1)
+        self.assertAlmostEqual(stored.last_run_at.timestamp(), entry.last_run_at.timestamp(), places=3)
+        self.assertFalse(restarted.is_due(stored).is_due)
+
+    def test_removed_entries_are_dropped(self):
+        self.store(a=time.time(), gone=time.time())
+        self.scheduler()
+
+        with sqlite3.connect(self.path) as db:
+            names = sorted(name for (name,) in db.execute('SELECT name FROM entries'))
+        self.assertEqual(names, ['a', 'b'])
+
+    def test_catchup_once(self):
+        """Every missed entry runs once at the start."""
+        self.store(a=time.time() - 600, b=time.time() - 600)
+        scheduler = self.scheduler('once')
+
+        self.assertTrue(all(scheduler.is_due(entry).is_due for entry in scheduler.schedule.values()))
+
+    def test_catchup_skip(self):
+        """The missed runs are skipped, the entries wait for their next run."""
+        self.store(a=time.time() - 600, b=time.time() - 600)
+        scheduler = self.scheduler('skip')
+
+        for entry in scheduler.schedule.values():
+            is_due, next_run = scheduler.is_due(entry)
+            self.assertFalse(is_due)
+            self.assertAlmostEqual(next_run, 60, delta=1)
+
+    def test_catchup_spread(self):
+        """The missed entries run once, spread over the window, the others are not held back by them."""
+        self.app.conf.beat_schedule['c'] = {'task': 'proj.c', 'schedule': 5.0}
+        self.store(a=time.time() - 600, b=time.time() - 600, c=time.time() - 4)
+        scheduler = self.scheduler('spread', window=60)
+
+        self.assertTrue(scheduler.is_due(scheduler.schedule['a']).is_due)
+        is_due, next_run = scheduler.is_due(scheduler.schedule['b'])
+        self.assertFalse(is_due)
+        self.assertAlmostEqual(next_run, 30, delta=1)
+
+        scheduler.populate_heap()
+        order = [event[2].name for event in sorted(scheduler._heap)]
+        self.assertEqual(order, ['a', 'c', 'b'])
+
+    def test_corrupted_store(self):
+        with open(self.path, 'w') as file:
+            file.write('not a database' * 100)
+
+        scheduler = self.scheduler()
+
+        self.assertEqual(sorted(scheduler.schedule), ['a', 'b'])
+
+
+class BeatProcessTests(SimpleTestCase):
+    def test_is_beat_process(self):
+        """A pid from the pidfile reused by another process is not beat."""
+        self.assertFalse(_beat.is_beat_process(os.getpid()))
+        self.assertFalse(_beat.is_beat_process(2**22 + 1))
+
+        with mock.patch(
+            'builtins.open', mock.mock_open(read_data=b'celery\0-A\0proj\0beat\0-l\0INFO\0')
+        ):
+            self.assertTrue(_beat.is_beat_process(123))
+
+        zygote_cmdline = b'/usr/bin/python3\0-m\0celery_starter._zygote\x004\0proj\0/srv/proj/\0'
+        with mock.patch('builtins.open', mock.mock_open(read_data=zygote_cmdline)):
+            self.assertTrue(_beat.is_beat_process(123))
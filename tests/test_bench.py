@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _bench
+from src.celery_starter._bench import Candidate
+
+CELERY_APP_SOURCE = """
+from celery import Celery
+
+app = Celery('proj_app')
+"""
+
+
+class BenchTests(SimpleTestCase):
+    def test_candidates(self):
+        """The pools without the concurrency get the default one."""
+        self.assertEqual(
+            _bench.default_candidates(['solo', 'threads', 'prefork'], cpus=2),
+            [Candidate('solo', 1), Candidate('threads', 8), Candidate('prefork', 2)],
+        )
+        with mock.patch.object(_bench, 'default_candidates', return_value=[Candidate('prefork', 4)]):
+            self.assertEqual(
+                _bench.parse_candidates('threads:16, prefork,'),
+                [Candidate('threads', 16), Candidate('prefork', 4)],
+            )
+
+    def test_summarize(self):
+        """The throughput and the latencies are computed from the enqueue to the end of the tasks."""
+        enqueued = {'a': 10.0, 'b': 10.0, 'c': 10.5}
+        finished = {'a': 10.5, 'b': 11.0, 'c': 12.0}
+
+        result = _bench.summarize(Candidate('solo', 1), enqueued, finished)
+
+        self.assertEqual(result.finished, 3)
+        self.assertEqual(result.throughput, 1.5)
+        self.assertEqual((result.p50, result.p99), (1.0, 1.5))
+        self.assertEqual(
+            _bench.summarize(Candidate('solo', 1), enqueued, {}).error, 'no task has finished'
+        )
+
+        table = _bench.format_table([result])
+        self.assertEqual(
+            table[0].split(), ['broker', 'pool', 'tasks', 'tasks/s', 'p50', 'ms', 'p99', 'ms']
+        )
+        self.assertEqual(table[1].split(), ['local', 'solo:1', '3', '1.5', '1000.0', '1500.0'])
+
+    def test_run_candidate(self):
+        """The worker runs the synthetic tasks on the filesystem transport without a broker."""
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        with open(os.path.join(base_dir, 'proj_app.py'), 'w') as file:
+            file.write(CELERY_APP_SOURCE)
+
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_SETTINGS_MODULE', None)
+            result = _bench.run_candidate(
+                ['celery', '-A', 'proj_app', 'worker', '-P', 'threads'],
+                Candidate('solo', 1),
+                _bench.SYNTHETIC_TASKS['io'],
+                5,
+                cwd=base_dir,
+            )
+
+        self.assertEqual(result.error, '')
+        self.assertEqual(result.finished, 5)
+        self.assertGreater(result.throughput, 0)
+        self.assertGreaterEqual(result.p50, 0.05)
+
+    def test_sample_workload(self):
+        """The sampled tasks run in the worker of the benchmark and are told apart by the CPU time."""
+        base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, base_dir)
+        with open(os.path.join(base_dir, 'proj_app.py'), 'w') as file:
+            file.write(CELERY_APP_SOURCE)
+
+        worker_cmd = ['celery', '-A', 'proj_app', 'worker']
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_SETTINGS_MODULE', None)
+            io = _bench.sample_workload(worker_cmd, [_bench.SYNTHETIC_TASKS['io']], runs=2, cwd=base_dir)
+            cpu = _bench.sample_workload(
+                worker_cmd, [_bench.SYNTHETIC_TASKS['cpu']], runs=2, cwd=base_dir
+            )
+
+        self.assertEqual((io[0], io[2]), ('io', ''))
+        self.assertEqual((cpu[0], cpu[2]), ('cpu', ''))
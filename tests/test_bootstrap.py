@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import importlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _bootstrap
+
+TASKS_SOURCE = """
+from celery import shared_task
+
+
+@shared_task
+def answer():
+    return %d
+"""
+
+CELERY_APP_SOURCE = """
+from celery import Celery
+
+import proj_tasks
+
+app = Celery('proj_app')
+"""
+
+
+class BootstrapTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base_dir = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        for name, source in (('proj_app.py', CELERY_APP_SOURCE), ('proj_tasks.py', '')):
+            with open(os.path.join(self.base_dir, name), 'w') as file:
+                file.write(source)
+        self.imports_file = os.path.join(self.base_dir, 'imports.json')
+
+    def test_report_merges_files(self):
+        """The report keeps the files reported by the other processes of the worker."""
+        with open(self.imports_file, 'w') as file:
+            json.dump(['/other/child.py'], file)
+        module = mock.MagicMock(__file__=os.path.join(self.base_dir, 'views.py'))
+
+        with mock.patch.dict(sys.modules, {'proj_views': module}):
+            _bootstrap.ImportsReport(self.imports_file, self.base_dir).write()
+
+        self.assertEqual(
+            _bootstrap.read_imports(self.imports_file),
+            {'/other/child.py', os.path.join(self.base_dir, 'views.py')},
+        )
+        self.assertIsNone(_bootstrap.read_imports(os.path.join(self.base_dir, 'missing.json')))
+
+    def test_worker_reports_imports(self):
+        """The worker run by the wrapper reports the project files it has imported once it is ready."""
+        env = dict(
+            os.environ,
+            **{
+                _bootstrap.IMPORTS_FILE_ENV: self.imports_file,
+                _bootstrap.BASE_DIR_ENV: self.base_dir,
+            },
+        )
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        process = subprocess.Popen(
+            [
+                *(
+                    sys.executable,
+                    '-m',
+                    'celery_starter._bootstrap',
+                    '-A',
+                    'proj_app',
+                    '-b',
+                    'memory://',
+                ),
+                *('worker', '-P', 'solo', '--without-mingle', '--without-gossip'),
+            ],
+            cwd=self.base_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(self.imports_file) and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+        self.assertEqual(
+            _bootstrap.read_imports(self.imports_file),
+            {os.path.join(self.base_dir, 'proj_app.py'), os.path.join(self.base_dir, 'proj_tasks.py')},
+        )
+
+    def test_beat_ready(self):
+        """Beat run by the wrapper with a quiet log level creates the ready file after its first tick."""
+        ready_file = os.path.join(self.base_dir, 'beat.ready')
+        env = dict(os.environ, **{_bootstrap.BEAT_READY_FILE_ENV: ready_file})
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        process = subprocess.Popen(
+            [
+                *(
+                    sys.executable,
+                    '-m',
+                    'celery_starter._bootstrap',
+                    '-A',
+                    'proj_app',
+                    '-b',
+                    'memory://',
+                ),
+                *('beat', '-l', 'WARNING', '-s', os.path.join(self.base_dir, 'celerybeat-schedule')),
+            ],
+            cwd=self.base_dir,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            deadline = time.monotonic() + 30
+            while not os.path.exists(ready_file) and time.monotonic() < deadline:
+                time.sleep(0.1)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+        self.assertTrue(os.path.exists(ready_file))
+
+    def test_hot_reload(self):
+        """The changed task module is reloaded and its tasks are registered again."""
+        from celery import Celery
+
+        tasks_file = os.path.join(self.base_dir, 'proj_reloaded_tasks.py')
+        with open(tasks_file, 'w') as file:
+            file.write(TASKS_SOURCE % 1)
+        sys.path.insert(0, self.base_dir)
+        self.addCleanup(sys.path.remove, self.base_dir)
+        self.addCleanup(sys.modules.pop, 'proj_reloaded_tasks', None)
+
+        app = Celery('proj_app', set_as_current=False)
+        app.loader.import_module('proj_reloaded_tasks')
+        app.finalize(auto=True)
+        self.assertEqual(app.tasks['proj_reloaded_tasks.answer'].apply().get(), 1)
+
+        with open(tasks_file, 'w') as file:
+            file.write(TASKS_SOURCE % 2)
+        state = mock.MagicMock(app=app)
+        reply = _bootstrap.hot_reload(state, [tasks_file])
+
+        self.assertEqual(reply, {'ok': 'proj_reloaded_tasks'})
+        self.assertEqual(app.tasks['proj_reloaded_tasks.answer'].apply().get(), 2)
+        state.consumer.update_strategies.assert_called_once()
+        self.assertIn('error', _bootstrap.hot_reload(state, [os.path.join(self.base_dir, 'new.py')]))
+
+        # The tasks are restored when the module fails to reload.
+        with open(tasks_file, 'w') as file:
+            file.write(TASKS_SOURCE % 3 + 'raise ValueError("broken")\n')
+        self.assertEqual(_bootstrap.hot_reload(state, [tasks_file]), {'error': 'ValueError: broken'})
+        self.assertEqual(app.tasks['proj_reloaded_tasks.answer'].apply().get(), 2)
+
+    def test_hot_reload_helpers(self):
+        """The module without tasks is not reloaded, the task modules would keep the old one."""
+        from celery import Celery
+
+        helpers_file = os.path.join(self.base_dir, 'proj_helpers.py')
+        with open(helpers_file, 'w') as file:
+            file.write('OFFSET = 0\n')
+        sys.path.insert(0, self.base_dir)
+        self.addCleanup(sys.path.remove, self.base_dir)
+        self.addCleanup(sys.modules.pop, 'proj_helpers', None)
+        importlib.import_module('proj_helpers')
+
+        state = mock.MagicMock(app=Celery('proj_app', set_as_current=False))
+        reply = _bootstrap.hot_reload(state, [helpers_file])
+
+        self.assertEqual(reply, {'error': 'no tasks are defined in proj_helpers'})
+        state.consumer.update_strategies.assert_not_called()
@@ -0,0 +1,50 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from celery import Celery
+from django.test import SimpleTestCase
+from src.celery_starter import _bootstrap, _broker
+
+
+class LocalBrokerTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_directory(self):
+        """The directory of the broker is relative to the base directory, True means the default one."""
+        self.assertIsNone(_broker.local_broker_dir('/proj', None))
+        self.assertEqual(_broker.local_broker_dir('/proj', True), '/proj/.runcelery/broker')
+        self.assertEqual(_broker.local_broker_dir('/proj', 'tmp/broker'), '/proj/tmp/broker')
+        self.assertEqual(_broker.local_broker_dir('/proj', '/var/broker'), '/var/broker')
+
+    def test_enqueue(self):
+        """The enqueued task is written to the directory of the broker, no broker has to run."""
+        app = Celery('proj_app', set_as_current=False)
+        _broker.configure(app, self.directory)
+
+        app.send_task('proj.tasks.add', (1, 2))
+
+        self.assertEqual(app.backend.__class__.__name__, 'FilesystemBackend')
+        messages = os.listdir(os.path.join(self.directory, 'queue'))
+        self.assertEqual(len(messages), 1)
+        self.assertTrue(messages[0].endswith('.celery.msg'))
+
+    def test_env(self):
+        """The processes of runcelery get the broker from the environment and the bootstrap hooks."""
+        env = _broker.local_env(self.directory)
+        self.assertEqual(env['CELERY_BROKER_URL'], 'filesystem://')
+        self.assertEqual(
+            env['CELERY_RESULT_BACKEND'], 'file://' + os.path.join(self.directory, 'results')
+        )
+
+        conf: dict = {}
+        _bootstrap.LocalBroker(self.directory).configure_worker(mock.MagicMock(update=conf.update))
+        self.assertEqual(
+            conf['broker_transport_options']['data_folder_in'], os.path.join(self.directory, 'queue')
+        )
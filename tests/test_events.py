@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _events
+
+
+def task_events(uuid, name, received, started, finished, kind='task-succeeded'):
+    return [
+        {'type': 'task-received', 'uuid': uuid, 'name': name, 'timestamp': received},
+        {'type': 'task-started', 'uuid': uuid, 'timestamp': started},
+        {'type': kind, 'uuid': uuid, 'timestamp': finished, 'runtime': finished - started},
+    ]
+
+
+class EventMonitorTests(SimpleTestCase):
+    def test_aggregation(self):
+        """The rates, runtimes, failures and queue latencies are aggregated per task."""
+        monitor = _events.EventMonitor()
+        events = [
+            *task_events('a', 'proj.add', 100.0, 100.5, 101.0),
+            *task_events('b', 'proj.add', 101.0, 101.1, 103.1),
+            *task_events('c', 'proj.mail', 101.0, 102.0, 102.5, kind='task-failed'),
+            {'type': 'worker-heartbeat', 'timestamp': 102.0},
+        ]
+        for event in events:
+            monitor.on_event(event)
+
+        add, mail = monitor.tasks['proj.add'], monitor.tasks['proj.mail']
+        self.assertEqual((add.succeeded, add.failed, mail.failed), (2, 0, 1))
+        self.assertEqual(list(add.runtimes), [0.5, 2.0])
+        self.assertEqual(list(mail.queue_latencies), [1.0])
+        self.assertEqual(
+            [line.split() for line in monitor.summary(now=110.0)[1:]],
+            [
+                ['proj.add', '0.03', '2', '0', '0', '500/2000', '100/500'],
+                ['proj.mail', '0.02', '0', '1', '0', '-', '1000/1000'],
+            ],
+        )
+        self.assertEqual(monitor.tasks['proj.add'].rate.rate(now=1000.0), 0.0)
+
+    def test_bounded_memory(self):
+        """The samples, the tasks waiting to be started and the task names are limited."""
+        monitor = _events.EventMonitor()
+        max_pending = mock.patch.object(_events, 'MAX_PENDING', 2)
+        with max_pending, mock.patch.object(_events, 'MAX_TASK_NAMES', 1):
+            for uuid in 'abc':
+                monitor.on_event({'type': 'task-received', 'uuid': uuid, 'name': f'proj.{uuid}'})
+            for uuid in 'abc':
+                monitor.on_event({'type': 'task-succeeded', 'uuid': uuid, 'runtime': 1.0})
+
+        self.assertEqual(list(monitor.tasks), ['proj.b', _events.OTHER])
+        self.assertEqual(len(monitor._pending), 0)
+
+        stats = _events.TaskStats()
+        stats.runtimes.extend(range(_events.SAMPLES + 10))
+        self.assertEqual(len(stats.runtimes), _events.SAMPLES)
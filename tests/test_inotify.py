@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase
+from src.celery_starter import _inotify
+
+
+class GlobTests(SimpleTestCase):
+    def test_glob_to_regex(self):
+        """** matches any number of directories, * does not cross them."""
+        regex = _inotify.glob_to_regex('**/tasks.py')
+        self.assertTrue(regex.match('tasks.py'))
+        self.assertTrue(regex.match('app/sub/tasks.py'))
+        self.assertFalse(regex.match('app/tasks.pyc'))
+        self.assertFalse(_inotify.glob_to_regex('app/*.py').match('app/sub/views.py'))
+
+
+@skipUnless(_inotify.is_supported(), 'inotify is required')
+class InotifyReloaderTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base_dir = Path(tempfile.mkdtemp()).resolve()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        for directory in ('app', 'node_modules', 'static'):
+            os.makedirs(self.base_dir / directory)
+
+        self.report = mock.MagicMock()
+        self.reloader = _inotify.InotifyReloader(
+            str(self.base_dir), include=['**/*.py'], exclude=['static/**'], report=self.report
+        )
+        self.reloader.notify_file_changed = mock.MagicMock()
+        self.ticker = self.reloader.tick()
+        self.addCleanup(self.ticker.close)
+        next(self.ticker)
+
+    def write(self, path: str) -> Path:
+        path_ = self.base_dir / path
+        path_.write_text('x = 1\n')
+        return path_
+
+    def test_included_file_changes(self):
+        """Only the changes of the included files which are not excluded are notified."""
+        tasks = self.write('app/tasks.py')
+        self.write('app/index.html')
+        self.write('node_modules/lib.py')
+        self.write('static/admin.py')
+        next(self.ticker)
+
+        self.reloader.notify_file_changed.assert_called_once_with(tasks)
+        self.assertEqual(self.report.call_args.args[0], tasks)
+
+    def test_new_directory(self):
+        """The directories created after the start are watched too."""
+        os.makedirs(self.base_dir / 'app' / 'new')
+        next(self.ticker)
+        tasks = self.write('app/new/tasks.py')
+        next(self.ticker)
+
+        self.reloader.notify_file_changed.assert_called_once_with(tasks)
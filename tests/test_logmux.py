@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+from django.test import SimpleTestCase
+from src.celery_starter._logmux import LogMux
+
+
+class LogMuxTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.written: list[str] = []
+        self.unblocked = threading.Event()
+        self.unblocked.set()
+
+    def write(self, msg: str) -> None:
+        self.unblocked.wait()
+        self.written.append(msg)
+
+    def make_mux(self, **kwargs) -> LogMux:
+        mux = LogMux(self.write, color=False, **kwargs)
+        mux.start()
+        self.addCleanup(mux.stop)
+        return mux
+
+    def make_pipe(self, mux: LogMux, name: str) -> int:
+        read_fd, write_fd = os.pipe()
+        mux.register(name, os.fdopen(read_fd, 'rb', buffering=0))
+        return write_fd
+
+    def wait_for(self, condition, timeout: float = 5) -> None:
+        deadline = time.monotonic() + timeout
+        while not condition():
+            if time.monotonic() > deadline:
+                self.fail('Timed out')
+            time.sleep(0.01)
+
+    def test_lines_are_tagged(self):
+        """Lines of every process are written with its tag, partial lines wait for the end."""
+        mux = self.make_mux()
+        heard = []
+        mux.add_listener(lambda name, line: heard.append((name, line)))
+        worker, beat = self.make_pipe(mux, 'worker'), self.make_pipe(mux, 'beat')
+
+        os.write(worker, b'first\nsec')
+        os.write(beat, b'tick\n')
+        os.write(worker, b'ond\n')
+        os.close(worker)
+        os.close(beat)
+
+        self.wait_for(lambda: len(self.written) == 3)
+        self.assertEqual(sorted(self.written), ['[beat]    tick', '[worker]  first', '[worker]  second'])
+        self.assertIn(('worker', 'second'), heard)
+
+    def test_bounded_buffer(self):
+        """A slow console drops the oldest lines instead of blocking the pipe."""
+        self.unblocked.clear()
+        mux = self.make_mux(max_lines=10)
+        heard = []
+        mux.add_listener(lambda name, line: heard.append(line))
+        worker = self.make_pipe(mux, 'worker')
+
+        os.write(worker, b''.join(b'line %d\n' % i for i in range(200_000)))
+        os.close(worker)
+        self.wait_for(lambda: len(heard) == 200_000)
+        self.unblocked.set()
+
+        self.wait_for(lambda: any(line.endswith('line 199999') for line in self.written))
+        self.assertTrue(any('dropped' in line for line in self.written))
+        self.assertLess(len(self.written), 20)
+
+    def test_log_files(self):
+        """Every process gets its own log file."""
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir)
+        mux = self.make_mux(log_dir=log_dir)
+        flower = self.make_pipe(mux, 'flower')
+
+        os.write(flower, b'Visit me at http://localhost:5555\n')
+        os.close(flower)
+
+        self.wait_for(lambda: len(self.written) == 1)
+        with open(os.path.join(log_dir, 'flower.log')) as file:
+            self.assertEqual(file.read(), 'Visit me at http://localhost:5555\n')
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import urllib.error
+import urllib.request
+
+from django.test import SimpleTestCase
+from src.celery_starter import _metrics
+
+
+class MetricsTests(SimpleTestCase):
+    def test_render(self):
+        """The metrics are rendered in the Prometheus text format."""
+        registry = _metrics.Registry()
+        counter = registry.counter('restarts_total', 'Restarts.')
+        histogram = registry.histogram('duration_seconds', 'Duration.', (1, 5))
+        counter.inc(process='worker')
+        counter.inc(2, process='worker')
+        counter.inc(process='a "b"\n')
+        histogram.observe(0.5, process='worker')
+        histogram.observe(3, process='worker')
+
+        self.assertEqual(
+            registry.render(),
+            '# HELP restarts_total Restarts.\n'
+            '# TYPE restarts_total counter\n'
+            'restarts_total{process="worker"} 3\n'
+            'restarts_total{process="a \\"b\\"\\n"} 1\n'
+            '# HELP duration_seconds Duration.\n'
+            '# TYPE duration_seconds histogram\n'
+            'duration_seconds_bucket{process="worker",le="1"} 1\n'
+            'duration_seconds_bucket{process="worker",le="5"} 2\n'
+            'duration_seconds_bucket{process="worker",le="+Inf"} 2\n'
+            'duration_seconds_sum{process="worker"} 3.5\n'
+            'duration_seconds_count{process="worker"} 2\n',
+        )
+
+    def test_server(self):
+        """The collectors update the gauges before the scrape of /metrics."""
+        registry = _metrics.Registry()
+        gauge = registry.gauge('uptime_seconds', 'Uptime.')
+        registry.add_collector(lambda: gauge.set(12.5, process='beat'))
+        server = _metrics.MetricsServer(registry, 0)
+        server.start()
+        self.addCleanup(server.stop)
+
+        url = f'http://127.0.0.1:{server.port}'
+        with urllib.request.urlopen(url + '/metrics', timeout=5) as response:
+            self.assertEqual(response.headers['Content-Type'], _metrics.CONTENT_TYPE)
+            self.assertIn('uptime_seconds{process="beat"} 12.5', response.read().decode())
+        with self.assertRaises(urllib.error.HTTPError):
+            urllib.request.urlopen(url + '/other', timeout=5)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _pool
+
+
+class PoolTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cgroup_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.cgroup_root)
+        patcher = mock.patch.object(_pool, 'CGROUP_ROOT', self.cgroup_root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write_cgroup_file(self, path: str, content: str) -> None:
+        path = os.path.join(self.cgroup_root, path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+
+    def test_cgroup_v2_limits(self):
+        """The CPU quota and the memory limit of cgroup v2 are respected."""
+        self.write_cgroup_file('cpu.max', '150000 100000\n')
+        self.write_cgroup_file('memory.max', '536870912\n')
+        with mock.patch.object(os, 'sched_getaffinity', return_value=set(range(8)), create=True):
+            self.assertEqual(_pool.cpu_limit(), 2)
+        self.assertEqual(_pool.memory_limit(), 512 * 2**20)
+
+    def test_cgroup_v1_without_limits(self):
+        """cgroup v1 without limits falls back to the CPU affinity and the physical memory."""
+        self.write_cgroup_file('cpu/cpu.cfs_quota_us', '-1\n')
+        self.write_cgroup_file('cpu/cpu.cfs_period_us', '100000\n')
+        self.write_cgroup_file('memory/memory.limit_in_bytes', '9223372036854771712\n')
+        with mock.patch.object(os, 'sched_getaffinity', return_value={0, 1, 2}, create=True):
+            self.assertEqual(_pool.cpu_limit(), 3)
+        self.assertNotEqual(_pool.memory_limit(), 9223372036854771712)
+
+    def test_choose_pool(self):
+        """The pool depends on the workload and the installed pools, prefork is limited by memory."""
+        pools = ['solo', 'threads', 'prefork']
+        self.assertEqual(
+            _pool.choose_pool('cpu', pools, cpus=8, memory=2 * _pool.MEMORY_PER_CHILD)[:2],
+            ('prefork', 2),
+        )
+        self.assertEqual(_pool.choose_pool('io', pools, cpus=2, memory=None)[:2], ('threads', 8))
+        self.assertEqual(
+            _pool.choose_pool('io', [*pools, 'gevent'], cpus=2, memory=None)[:2],
+            ('gevent', _pool.GREEN_CONCURRENCY),
+        )
+        self.assertEqual(_pool.choose_pool('cpu', ['solo', 'threads'], cpus=4)[:2], ('solo', 1))
+
+    def test_classify_workload(self):
+        """Tasks waiting for I/O are told apart from tasks burning CPU."""
+        workload, ratio = _pool.classify_workload(0.01, 0.2)
+        self.assertEqual(workload, 'io')
+        self.assertAlmostEqual(ratio, 0.05)
+        self.assertEqual(_pool.classify_workload(0.19, 0.2)[0], 'cpu')
+        self.assertEqual(_pool.classify_workload(0.0, 0.0), ('io', 0.0))
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import re
+import shutil
+import tempfile
+import tracemalloc
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _profiling
+
+
+def slow_function():
+    return sum(i * i for i in range(20_000))
+
+
+class ProfilingTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_selection(self):
+        """Only the tasks matching the globs are profiled, a sampled fraction of them."""
+        profiler = _profiling.TaskProfiler(self.directory, patterns=['proj.reports.*'], sample=0.5)
+
+        self.assertFalse(profiler.is_selected('proj.emails.send'))
+        with mock.patch('random.random', return_value=0.7):
+            self.assertFalse(profiler.is_selected('proj.reports.build'))
+        with mock.patch('random.random', return_value=0.2):
+            self.assertTrue(profiler.is_selected('proj.reports.build'))
+
+    def test_profile_task(self):
+        """The run of the task is written to a .pstats file and its hottest functions are logged."""
+        profiler = _profiling.TaskProfiler(self.directory, memory=True)
+        self.addCleanup(tracemalloc.stop)
+        task = mock.MagicMock()
+        task.name = 'proj.tasks.build'
+
+        with mock.patch.object(_profiling.logger, 'warning') as warning:
+            profiler.start(task_id='abc', task=task)
+            slow_function()
+            profiler.stop(task_id='abc', task=task)
+            profiler.stop(task_id='abc', task=task)
+
+        self.assertEqual(os.listdir(self.directory), ['proj.tasks.build-abc.pstats'])
+        warning.assert_called_once()
+        summary = warning.call_args.args[0]
+        self.assertIn('proj.tasks.build[abc]', summary)
+        self.assertIn('peak memory', summary)
+        self.assertIn('test_profiling.py', summary)
+
+    def test_peak_memory(self):
+        """The peak memory of the task does not include the previous tasks."""
+        profiler = _profiling.TaskProfiler(self.directory, memory=True)
+        self.addCleanup(tracemalloc.stop)
+        task = mock.MagicMock()
+        task.name = 'proj.tasks.build'
+
+        with mock.patch.object(_profiling.logger, 'warning') as warning:
+            for task_id, size in (('a', 32 * 2**20), ('b', 0)):
+                profiler.start(task_id=task_id, task=task)
+                data = bytearray(size)
+                del data
+                profiler.stop(task_id=task_id, task=task)
+
+        peaks = [
+            float(re.search(r'peak memory ([\d.]+) MiB', call.args[0]).group(1))
+            for call in warning.call_args_list
+        ]
+        self.assertGreaterEqual(peaks[0], 32)
+        self.assertLess(peaks[1], 1)
@@ -0,0 +1,56 @@
+from __future__ import annotations
+
+import socket
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _readiness
+
+
+class ReadinessTests(SimpleTestCase):
+    def test_flag_value(self):
+        """The value of the flag is found in any form."""
+        cmd = ['celery', 'flower', '--port=5566', '-l', 'INFO']
+        self.assertEqual(_readiness.flag_value(cmd, ('--port',)), '5566')
+        self.assertEqual(_readiness.flag_value(cmd, ('-l', '--loglevel')), 'INFO')
+        self.assertEqual(_readiness.flag_value(cmd, ('--address',), 'localhost'), 'localhost')
+        self.assertFalse(_readiness.is_quiet(cmd))
+        self.assertTrue(_readiness.is_quiet(['celery', 'beat', '--loglevel=warning']))
+
+    def test_port_open(self):
+        with socket.socket() as server:
+            server.bind(('127.0.0.1', 0))
+            server.listen()
+            port = server.getsockname()[1]
+            self.assertTrue(_readiness.port_open('127.0.0.1', port))
+        self.assertFalse(_readiness.port_open('127.0.0.1', port))
+
+    def test_ready_line_and_tail(self):
+        """The ready line of the process is noticed and the last lines are kept."""
+        readiness = _readiness.Readiness(last_lines=2)
+        readiness.reset('worker-default')
+        for line in ('one', 'two', 'default@host ready.'):
+            readiness.on_line('worker-default', line)
+        self.assertTrue(readiness.saw_ready_line('worker-default'))
+        self.assertEqual(readiness.tail('worker-default'), ['two', 'default@host ready.'])
+
+        readiness.reset('worker-default')
+        self.assertFalse(readiness.saw_ready_line('worker-default'))
+        self.assertEqual(readiness.tail('worker-default'), [])
+
+    def test_wait_ready(self):
+        """The wait ends when the probe passes, the process exits or the deadline passes."""
+        process = mock.MagicMock()
+        process.poll.return_value = None
+        deadline = time.monotonic() + 5
+        self.assertIsNone(_readiness.wait_ready(process, lambda: True, deadline))
+        self.assertEqual(
+            _readiness.wait_ready(process, lambda: False, deadline, lambda: True), 'cancelled'
+        )
+        self.assertEqual(
+            _readiness.wait_ready(process, lambda: False, time.monotonic()),
+            'startup timeout has passed',
+        )
+        process.poll.return_value = 2
+        self.assertEqual(_readiness.wait_ready(process, lambda: True, deadline), 'exited with code 2')
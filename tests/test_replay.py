@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter import _bench, _replay
+from src.celery_starter._replay import Record, Regression, TaskReport
+
+CELERY_APP_SOURCE = """
+from celery import Celery
+
+app = Celery('proj_app')
+"""
+
+
+class ReplayTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_record(self):
+        """The received tasks are appended as JSON lines and read in order, broken lines are skipped."""
+        path = os.path.join(self.directory, 'traffic.jsonl')
+        recorder = _replay.TrafficRecorder(path)
+        for moment, name, args in [(2.0, 'proj.mail', ('a@b.c',)), (1.0, 'proj.add', (1, 2))]:
+            request = mock.Mock(args=args, kwargs={'retry': False}, delivery_info={'routing_key': 'q'})
+            request.name = name
+            with mock.patch('time.time', return_value=moment):
+                recorder.received(request=request)
+        recorder.received()
+        with open(path, 'a') as file:
+            file.write('{"moment": 3.0, "task": "proj.partial"')
+
+        self.assertEqual(
+            _replay.read_records(path),
+            [
+                Record(1.0, 'proj.add', [1, 2], {'retry': False}),
+                Record(2.0, 'proj.mail', ['a@b.c'], {'retry': False}),
+            ],
+        )
+
+    def test_summarize(self):
+        """Every task name has its row, the tasks not finished are failed."""
+        names = {'a': 'proj.add', 'b': 'proj.add', 'c': 'proj.mail', 'd': 'proj.mail'}
+        enqueued = {'a': 10.0, 'b': 10.0, 'c': 10.5, 'd': 11.0}
+        finished = {'a': 10.5, 'b': 11.0, 'c': 12.0}
+
+        reports = _replay.summarize(names, enqueued, finished, {'c'})
+
+        self.assertEqual(
+            reports,
+            [
+                TaskReport(_replay.ALL, 4, 2, 1.5, 1.0, 1.5),
+                TaskReport('proj.add', 2, 0, 2.0, 0.5, 1.0),
+                TaskReport('proj.mail', 2, 2, 1 / 1.5, 1.5, 1.5),
+            ],
+        )
+        self.assertEqual(
+            [line.split() for line in _replay.format_reports(reports[1:2])],
+            [
+                ['task', 'sent', 'failed', 'tasks/s', 'p50', 'ms', 'p99', 'ms'],
+                ['proj.add', '2', '0', '2.0', '500.0', '1000.0'],
+            ],
+        )
+
+    def test_compare(self):
+        """The slowdowns above the tolerance and the new failures are regressions."""
+        path = os.path.join(self.directory, 'baseline.json')
+        _replay.save_baseline(
+            path,
+            [
+                TaskReport(_replay.ALL, 10, 0, 100.0, 0.1, 0.2),
+                TaskReport('proj.add', 10, 0, 100.0, 0.1, 0.2),
+            ],
+        )
+        baseline = _replay.load_baseline(path)
+
+        regressions = _replay.compare(
+            [
+                TaskReport(_replay.ALL, 10, 1, 70.0, 0.11, 0.2),
+                TaskReport('proj.add', 10, 1, 70.0, 0.13, 0.203),
+                TaskReport('proj.new', 1, 0, 1.0, 5.0, 5.0),
+            ],
+            baseline,
+        )
+
+        self.assertEqual(
+            regressions,
+            [
+                Regression(_replay.ALL, 'throughput', 100.0, 70.0),
+                Regression(_replay.ALL, 'failed', 0, 1),
+                Regression('proj.add', 'p50', 0.1, 0.13),
+                Regression('proj.add', 'failed', 0, 1),
+            ],
+        )
+
+    def test_replay(self):
+        """The recorded tasks are sent to a fresh worker at the recorded rate, failures are counted."""
+        with open(os.path.join(self.directory, 'proj_app.py'), 'w') as file:
+            file.write(CELERY_APP_SOURCE)
+        task = _bench.SYNTHETIC_TASKS['io']
+        records = [Record(100.0 + i * 0.1, task, [], {}) for i in range(3)]
+        records.append(Record(100.3, task, [1], {}))
+
+        with mock.patch.dict(os.environ):
+            os.environ.pop('DJANGO_SETTINGS_MODULE', None)
+            reports, error = _replay.replay(
+                ['celery', '-A', 'proj_app', 'worker'], records, 2, cwd=self.directory
+            )
+
+        self.assertEqual(error, '')
+        self.assertEqual(
+            [(report.task, report.sent, report.failed) for report in reports],
+            [(_replay.ALL, 4, 1), (task, 4, 1)],
+        )
+        self.assertGreaterEqual(reports[1].p50, 0.05)
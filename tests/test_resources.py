@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from unittest import skipUnless
+
+from django.test import SimpleTestCase
+from src.celery_starter import _resources
+
+
+@skipUnless(_resources.is_supported(), '/proc or psutil is required')
+class ResourceMonitorTests(SimpleTestCase):
+    def test_sample_includes_children(self):
+        """The usage of the process includes its children."""
+        child = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(30)'])
+        self.addCleanup(child.wait)
+        self.addCleanup(child.kill)
+        monitor = _resources.ResourceMonitor()
+
+        usage = monitor.sample({'self': os.getpid(), 'child': child.pid, 'missing': 2**22 + 1})
+
+        self.assertEqual(set(usage), {'self', 'child'})
+        self.assertGreaterEqual(usage['self'].processes, 2)
+        self.assertEqual(usage['child'].processes, 1)
+        self.assertGreater(usage['self'].rss, usage['child'].rss)
+        self.assertGreater(usage['self'].fds, 0)
+
+    def test_cpu_between_samples(self):
+        monitor = _resources.ResourceMonitor()
+        self.assertEqual(monitor.sample({'self': os.getpid()})['self'].cpu, 0.0)
+        sum(i * i for i in range(2 * 10**6))
+        self.assertGreater(monitor.sample({'self': os.getpid()})['self'].cpu, 0.0)
+
+    def test_start_time(self):
+        """The start time tells the process from the next one with the same pid."""
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        started = _resources.start_time(child.pid)
+        self.assertIsNotNone(started)
+        self.assertEqual(_resources.start_time(child.pid), started)
+        child.wait()
+        self.assertIsNone(_resources.start_time(child.pid))
+
+    def test_is_running(self):
+        """Without the start time the process is looked for by the pid alone."""
+        self.assertTrue(_resources.has_start_time())
+        self.assertTrue(_resources.is_running(os.getpid()))
+        child = subprocess.Popen([sys.executable, '-c', 'pass'])
+        child.wait()
+        self.assertFalse(_resources.is_running(child.pid))
+
+    def test_str(self):
+        usage = _resources.Usage(rss=150 * 2**20, cpu=12.4, fds=24, processes=3)
+        self.assertEqual(str(usage), '150 MiB, 12% CPU, 24 fd')
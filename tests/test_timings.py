@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import SimpleTestCase
+from src.celery_starter._timings import RestartTimings, percentile
+
+
+class RestartTimingsTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.reported: list[str] = []
+        self.timings = RestartTimings(self.reported.append)
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        self.assertEqual(percentile(values, 50), 50.0)
+        self.assertEqual(percentile(values, 95), 95.0)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+
+    @mock.patch('src.celery_starter._timings.time.monotonic')
+    def test_phases_from_log_lines(self, monotonic: mock.MagicMock):
+        """The import and ready phases are taken from the log lines of the worker."""
+        monotonic.side_effect = [10.0, 10.5, 10.6, 12.0, 13.0]
+        self.timings.begin('worker', changed_files=3)
+        self.timings.mark('worker', 'stopped')
+        self.timings.mark('worker', 'spawned')
+        self.timings.on_line('worker', '- ** ---------- .> app:         proj:0x7f')
+        self.timings.on_line('worker', '[2024-01-01 00:00:00,000: INFO/MainProcess] celery@host ready.')
+
+        self.assertEqual(
+            self.reported,
+            [
+                'worker ready in 3.00s (stopped +0.50s, spawned +0.60s, imported +2.00s) '
+                '| p50 3.00s p95 3.00s n=1'
+            ],
+        )
+        self.assertEqual(self.timings.history[0]['changed_files'], 3)
+
+    def test_json_dump(self):
+        """Every finished restart is dumped to the JSON file."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.timings.json_path = os.path.join(directory, 'timings.json')
+
+        for _ in range(2):
+            self.timings.begin('flower')
+            self.timings.on_line('flower', 'Visit me at http://localhost:5555')
+
+        with open(self.timings.json_path) as file:
+            data = json.load(file)
+        self.assertEqual(len(data['restarts']), 2)
+        self.assertEqual(data['stats']['flower']['count'], 2)
@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import tempfile
+
+from django.test import SimpleTestCase
+from src.celery_starter import _events, _trace
+
+
+def event(kind, uuid, moment, hostname='celery@host', **fields):
+    return {'type': kind, 'uuid': uuid, 'timestamp': moment, 'hostname': hostname, **fields}
+
+
+class TraceRecorderTests(SimpleTestCase):
+    def test_runs_on_slots(self):
+        """The overlapping runs of a worker are laid out on separate slots, the free slots are reused."""
+        recorder = _trace.TraceRecorder()
+        monitor = _events.EventMonitor()
+        monitor.add_listener(recorder.on_event)
+        for item in [
+            event('task-received', 'a', 100.0, name='proj.add'),
+            event('task-received', 'b', 100.0, name='proj.mail'),
+            event('task-started', 'a', 100.5),
+            event('task-started', 'b', 101.0),
+            event('task-succeeded', 'a', 102.0),
+            event('task-received', 'c', 102.0, name='proj.add', hostname='other@host'),
+            event('task-started', 'c', 102.0, hostname='other@host'),
+            event('task-received', 'd', 102.0, name='proj.add'),
+            event('task-started', 'd', 102.5),
+            event('task-failed', 'b', 103.0),
+            event('task-succeeded', 'd', 104.0),
+        ]:
+            monitor.on_event(item)
+
+        runs = [
+            (
+                run['name'],
+                run['cat'],
+                run['pid'],
+                run['tid'],
+                run['ts'],
+                run['dur'],
+                run['args'].get('queued_ms'),
+            )
+            for run in recorder.runs
+        ]
+        self.assertEqual(
+            runs,
+            [
+                ('proj.add', 'succeeded', 1, 1, 100.5e6, 1.5e6, 500.0),
+                ('proj.mail', 'failed', 1, 2, 101e6, 2e6, 1000.0),
+                ('proj.add', 'succeeded', 1, 1, 102.5e6, 1.5e6, 500.0),
+            ],
+        )
+        # c is still running on the other worker.
+        self.assertEqual(len(recorder._running), 1)
+        self.assertEqual(monitor.tasks['proj.add'].succeeded, 2)
+
+        counters = [counter['args'] for counter in recorder.counters if counter['pid'] == 1]
+        self.assertEqual(counters[0], {'queued': 1, 'running': 0})
+        self.assertEqual(max(counter['running'] for counter in counters), 2)
+        self.assertEqual(counters[-1], {'queued': 0, 'running': 0})
+
+    def test_write(self):
+        """The trace has the names of the workers and of their slots."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, 'trace.json')
+        recorder = _trace.TraceRecorder()
+        for item in [
+            event('task-started', 'a', 100.0),
+            event('task-received', 'b', 100.0, name='proj.add'),
+            event('task-revoked', 'b', 100.2),
+            event('task-succeeded', 'a', 101.0),
+        ]:
+            recorder.on_event(item)
+
+        recorder.write(path)
+
+        with open(path) as file:
+            trace = json.load(file)
+        metadata = [
+            (item['name'], item['args']['name']) for item in trace['traceEvents'] if item['ph'] == 'M'
+        ]
+        self.assertEqual(metadata, [('process_name', 'celery@host'), ('thread_name', 'slot 0')])
+        runs = [item for item in trace['traceEvents'] if item['ph'] == 'X']
+        self.assertEqual([(run['name'], run['args']) for run in runs], [('<other>', {'uuid': 'a'})])
+        self.assertFalse(recorder.changed)
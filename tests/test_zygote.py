@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import os
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+from django.test import SimpleTestCase
+from src.celery_starter import _zygote
+
+CELERY_APP_SOURCE = """
+from celery import Celery
+
+app = Celery('proj_app')
+"""
+
+
+@skipUnless(_zygote.is_supported(), 'os.fork is required')
+class ZygoteTests(SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.base_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.base_dir)
+        with open(os.path.join(self.base_dir, 'proj_app.py'), 'w') as file:
+            file.write(CELERY_APP_SOURCE)
+
+        env = {k: v for k, v in os.environ.items() if k != 'DJANGO_SETTINGS_MODULE'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.zygote = _zygote.Zygote('proj_app', self.base_dir, cwd=self.base_dir)
+            self.zygote.start()
+        self.addCleanup(self.zygote.stop)
+
+    def test_preloaded_files(self):
+        """The zygote reports the project files imported by it."""
+        self.assertTrue(self.zygote.is_preloaded(os.path.join(self.base_dir, 'proj_app.py')))
+        self.assertFalse(self.zygote.is_preloaded(os.path.join(self.base_dir, 'tasks.py')))
+
+    def test_fork(self):
+        """The forked process runs the celery command with the passed stdout."""
+        read_fd, write_fd = os.pipe()
+        null_fd = os.open(os.devnull, os.O_RDONLY)
+        process = self.zygote.fork(
+            ['celery', '-A', 'proj_app', '--version'], fds=(null_fd, write_fd, write_fd)
+        )
+        os.close(write_fd)
+        os.close(null_fd)
+
+        self.assertEqual(process.wait(timeout=30), 0)
+        with os.fdopen(read_fd) as file:
+            self.assertRegex(file.read(), r'\d+\.\d+\.\d+')
+
+    def test_terminate(self):
+        """The forked process can be stopped like a Popen object."""
+        null_fd = os.open(os.devnull, os.O_RDWR)
+        process = self.zygote.fork(
+            ['celery', '-A', 'proj_app', '-b', 'memory://', 'worker', '-P', 'solo'],
+            fds=(null_fd, null_fd, null_fd),
+        )
+        os.close(null_fd)
+        self.assertIsNone(process.poll())
+        process.terminate()
+        self.assertIsNotNone(process.wait(timeout=30))
+
+    def test_restart(self):
+        """The process forked by the previous zygote is still stopped and polled after the restart."""
+        null_fd = os.open(os.devnull, os.O_RDWR)
+        process = self.zygote.fork(
+            ['celery', '-A', 'proj_app', '-b', 'memory://', 'worker', '-P', 'solo'],
+            fds=(null_fd, null_fd, null_fd),
+        )
+        os.close(null_fd)
+        env = {k: v for k, v in os.environ.items() if k != 'DJANGO_SETTINGS_MODULE'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.zygote.restart()
+
+        self.assertIsNone(process.poll())
+        process.terminate()
+        self.assertIsNotNone(process.wait(timeout=30))
+        with self.assertRaises(LookupError):
+            self.zygote.poll(process.pid)